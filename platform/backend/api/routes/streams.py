@@ -1,17 +1,29 @@
-from fastapi import APIRouter, UploadFile, File
-import shutil
-from cv_models.tasks import process_video_for_detection
+from fastapi import APIRouter, Depends, UploadFile, File
+import os
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.services.storage import stream_upload_to_disk
+from app.services.video_service import VideoService
+from celery import chain
+from cv_models.tasks import generate_video_proxy, process_video_for_detection
 
 router = APIRouter()
 
 @router.post("/upload-video")
-async def upload_video(file: UploadFile = File(...)):
-    video_path = f"data/raw_videos/{file.filename}"
-    with open(video_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+async def upload_video(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    # Stored by content hash so re-uploads of the same footage share a file
+    stored = await stream_upload_to_disk(
+        file, "data/raw_videos", suffix=os.path.splitext(file.filename)[1]
+    )
+    # Detections are stored against the video record and paged from the videos API
+    video = VideoService(db).register_stored_file(stored, file.filename, file.content_type)
     
-    task = process_video_for_detection.delay(video_path)
-    return {"filename": file.filename, "task_id": task.id}
+    # Build the low-resolution proxy first; analysis then decodes that
+    task = chain(
+        generate_video_proxy.si(video.id, video.file_path),
+        process_video_for_detection.si(video.file_path, video.id)
+    ).apply_async()
+    return {"filename": file.filename, "video_id": video.id, "task_id": task.id, "duplicate": stored.duplicate}
 
 @router.get("/task-status/{task_id}")
 async def get_task_status(task_id: str):
@@ -25,7 +37,8 @@ async def get_task_status(task_id: str):
         response = {
             'state': task.state,
             'status': task.info.get('status', ''),
-            'result': task.info.get('detections', '')
+            # Compact summary; detections are paged via result['detections_ref']
+            'result': task.info
         }
     else:
         response = {
@@ -0,0 +1,97 @@
+"""
+Single-frame object detection for interactive callers.
+
+Frames are answered by the in-process micro-batching inference server, so
+concurrent requests share model calls instead of queueing behind Celery.
+"""
+import asyncio
+from typing import Optional
+import cv2
+import numpy as np
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from app.core.config import settings
+from cv_models.inference_server import MicroBatchInferenceServer, ServerBusyError
+
+router = APIRouter()
+
+_server: Optional[MicroBatchInferenceServer] = None
+
+
+def get_inference_server() -> MicroBatchInferenceServer:
+    """Process-wide server, started on first use"""
+    global _server
+    if _server is None:
+        from cv_models.registry import registry
+        _server = MicroBatchInferenceServer(
+            registry.get,
+            max_batch_size=settings.inference_max_batch_size,
+            max_wait=settings.inference_max_wait_ms / 1000.0,
+            queue_size=settings.inference_queue_size
+        )
+    return _server
+
+
+def shutdown_inference_server() -> None:
+    if _server is not None:
+        _server.stop()
+
+
+@router.post("/")
+async def detect_frame(
+    file: UploadFile = File(...),
+    server: MicroBatchInferenceServer = Depends(get_inference_server)
+):
+    """Detect objects on one uploaded image (JPEG/PNG)"""
+
+    data = np.frombuffer(await file.read(), dtype=np.uint8)
+    frame = cv2.imdecode(data, cv2.IMREAD_COLOR) if data.size else None
+    if frame is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not decode image"
+        )
+
+    try:
+        if not server.running:
+            # Load and warm the model off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, server.start)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Model unavailable: {e}"
+        )
+
+    try:
+        future = server.submit(frame)
+    except ServerBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+
+    try:
+        objects = await asyncio.wait_for(asyncio.wrap_future(future), settings.inference_timeout)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Inference timed out"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Inference failed: {e}"
+        )
+
+    height, width = frame.shape[:2]
+    return {
+        "width": width,
+        "height": height,
+        "objects": objects
+    }
+
+
+@router.get("/stats")
+async def detect_stats(server: MicroBatchInferenceServer = Depends(get_inference_server)):
+    """Queue depth, batch sizes and latency percentiles of the inference server"""
+    return server.stats()
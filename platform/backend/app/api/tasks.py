@@ -1,21 +1,101 @@
 """
 Task processing and status endpoints
 """
-from typing import Optional
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import redis
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.services.task_service import TaskService
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.core.celery_app import queue_stats
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_async_db
+from app.services.task_events import TaskSubscriber, broadcaster, task_payload
+from app.services.task_service import AsyncTaskService
 
 router = APIRouter()
 
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def task_event_stream(
+    subscriber: TaskSubscriber,
+    snapshot: Callable[[], Awaitable[List[Dict[str, Any]]]],
+    keepalive: float
+) -> AsyncIterator[str]:
+    """A ``snapshot`` event, then one ``task`` event per changed task"""
+    try:
+        yield _sse("snapshot", {"tasks": await snapshot()})
+        while True:
+            updates, resync = await subscriber.next(keepalive)
+            if resync:
+                yield _sse("snapshot", {"tasks": await snapshot()})
+            elif updates:
+                for update in updates:
+                    yield _sse("task", update)
+            else:
+                yield ": keep-alive\n\n"
+    finally:
+        broadcaster.unsubscribe(subscriber)
+
+
+@router.get("/stream")
+async def stream_tasks(
+    skip: int = 0,
+    limit: int = 100,
+    status_filter: Optional[str] = None,
+    task_type: Optional[str] = None
+):
+    """Server-Sent Events feed of task changes.
+
+    Sends the same page ``GET /`` would return as a ``snapshot`` event, then
+    a ``task`` event whenever a task changes (possibly only ``task_id`` and
+    ``progress``). Deltas are not limited to the page; clients merge them
+    into what they show. Nothing polls the database while the stream is
+    idle.
+    """
+
+    async def snapshot():
+        # A short-lived session: open streams must not hold pool connections
+        async with AsyncSessionLocal() as db:
+            tasks = await AsyncTaskService(db).get_tasks(
+                skip=skip, limit=limit, status=status_filter, task_type=task_type
+            )
+            return [task_payload(task) for task in tasks]
+
+    # Subscribe before the snapshot so no change falls between the two
+    subscriber = broadcaster.subscribe(task_type)
+    return StreamingResponse(
+        task_event_stream(subscriber, snapshot, settings.task_stream_keepalive),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/queues")
+async def get_queue_stats():
+    """Depth and recent wait times of each Celery queue, for sizing workers"""
+    
+    try:
+        stats = await run_in_threadpool(queue_stats)
+    except redis.RedisError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Broker unavailable: {e}"
+        )
+    
+    return {"queues": stats}
+
+
 @router.get("/{task_id}")
-async def get_task_status(task_id: str, db: Session = Depends(get_db)):
+async def get_task_status(task_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get the status of a processing task"""
     
-    task_service = TaskService(db)
-    task = task_service.get_task(task_id)
+    task_service = AsyncTaskService(db)
+    task = await task_service.get_task(task_id)
     
     if not task:
         raise HTTPException(
@@ -40,12 +120,12 @@ async def list_tasks(
     limit: int = 100,
     status_filter: Optional[str] = None,
     task_type: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List processing tasks with optional filtering"""
     
-    task_service = TaskService(db)
-    tasks = task_service.get_tasks(
+    task_service = AsyncTaskService(db)
+    tasks = await task_service.get_tasks(
         skip=skip,
         limit=limit,
         status=status_filter,
@@ -59,10 +139,10 @@ async def list_tasks(
 
 
 @router.delete("/{task_id}")
-async def cancel_task(task_id: str, db: Session = Depends(get_db)):
+async def cancel_task(task_id: str, db: AsyncSession = Depends(get_async_db)):
     """Cancel a processing task"""
     
-    task_service = TaskService(db)
+    task_service = AsyncTaskService(db)
     success = await task_service.cancel_task(task_id)
     
     if not success:
@@ -71,4 +151,25 @@ async def cancel_task(task_id: str, db: Session = Depends(get_db)):
             detail="Task not found or cannot be cancelled"
         )
     
-    return {"message": f"Task {task_id} cancelled successfully"}
\ No newline at end of file
+    return {"message": f"Task {task_id} cancelled successfully"}
+
+
+@router.post("/{task_id}/resume")
+async def resume_task(task_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Queue a failed or cancelled task again from its last checkpoint"""
+    
+    task_service = AsyncTaskService(db)
+    task = await task_service.resume_task(task_id)
+    
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found or cannot be resumed"
+        )
+    
+    return {
+        "task_id": task.task_id,
+        "status": task.status,
+        "progress": task.progress,
+        "resumable": task.checkpoint is not None
+    }
\ No newline at end of file
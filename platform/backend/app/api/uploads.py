@@ -0,0 +1,177 @@
+"""
+Resumable chunked upload endpoints
+
+Protocol:
+1. ``POST /`` with the file name and total size creates a session.
+2. ``PUT /{upload_id}`` with a ``Content-Range: bytes start-end/total``
+   header uploads one chunk; chunks may arrive in any order and in parallel.
+3. ``GET /{upload_id}`` reports received bytes and missing chunks.
+4. ``POST /{upload_id}/complete`` finalizes the upload into a video.
+
+The handlers use the blocking session from ``get_db``, so they are plain
+functions that FastAPI runs in its threadpool. Only chunk uploads are
+``async``, to stream the request body; their database work and file
+writes are handed to the threadpool.
+"""
+import os
+import re
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.database import get_db
+from app.core.config import settings
+from app.services.storage import FileTooLargeError
+from app.services.task_service import send_proxy_task
+from app.services.upload_service import UploadCapacityError, UploadService, UploadError
+from app.services.video_service import VideoService
+
+router = APIRouter()
+
+CONTENT_RANGE_PATTERN = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    total_size: int
+    content_type: Optional[str] = None
+
+
+def _get_session_or_404(upload_service: UploadService, upload_id: str):
+    session = upload_service.get_session(upload_id)
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    return session
+
+
+@router.post("/")
+def create_upload(req: UploadSessionCreate, db: Session = Depends(get_db)):
+    """Start a resumable upload"""
+
+    if req.content_type and not req.content_type.startswith('video/'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only video files are allowed"
+        )
+
+    file_extension = os.path.splitext(req.filename)[1].lower()
+    if file_extension not in settings.allowed_video_extensions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported video file extension"
+        )
+
+    if req.total_size <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Total size must be positive"
+        )
+
+    if req.total_size > settings.max_resumable_upload_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File size exceeds maximum allowed size of {settings.max_resumable_upload_size} bytes",
+        )
+
+    upload_service = UploadService(db)
+    try:
+        session = upload_service.create_session(
+            filename=req.filename,
+            total_size=req.total_size,
+            content_type=req.content_type
+        )
+    except UploadCapacityError as e:
+        raise HTTPException(
+            status_code=status.HTTP_507_INSUFFICIENT_STORAGE,
+            detail=str(e)
+        )
+
+    return upload_service.get_progress(session)
+
+
+@router.get("/{upload_id}")
+def get_upload(upload_id: str, db: Session = Depends(get_db)):
+    """Get the received byte ranges of an upload"""
+
+    upload_service = UploadService(db)
+    session = _get_session_or_404(upload_service, upload_id)
+
+    return upload_service.get_progress(session)
+
+
+@router.put("/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    content_range: str = Header(...),
+    db: Session = Depends(get_db)
+):
+    """Upload one chunk of a resumable upload"""
+
+    match = CONTENT_RANGE_PATTERN.match(content_range)
+    if not match:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Content-Range must look like 'bytes start-end/total'"
+        )
+    start, end = int(match.group(1)), int(match.group(2))
+
+    upload_service = UploadService(db)
+    session = await run_in_threadpool(_get_session_or_404, upload_service, upload_id)
+
+    if match.group(3) != "*" and int(match.group(3)) != session.total_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Content-Range total does not match the upload size"
+        )
+
+    try:
+        chunk_index = await upload_service.write_chunk(session, start, end, request.stream())
+    except FileTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e),
+        )
+    except UploadError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return {
+        "upload_id": upload_id,
+        "chunk_index": chunk_index,
+        "message": "Chunk received"
+    }
+
+
+@router.post("/{upload_id}/complete")
+def complete_upload(upload_id: str, db: Session = Depends(get_db)):
+    """Finalize a resumable upload into a video"""
+
+    upload_service = UploadService(db)
+    session = _get_session_or_404(upload_service, upload_id)
+
+    try:
+        video = upload_service.complete(session)
+    except UploadError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+    duplicate = VideoService(db).find_by_content_hash(video.content_hash, exclude_id=video.id)
+    proxy_queued = send_proxy_task(video)
+    
+    return {
+        "id": video.id,
+        "filename": video.filename,
+        "status": video.status,
+        "duplicate_of": duplicate.id if duplicate else None,
+        "proxy_queued": proxy_queued,
+        "message": "Video uploaded successfully"
+    }
@@ -1,16 +1,21 @@
 """
 Video upload and processing endpoints
 """
+import inspect
 import os
 import uuid
-from typing import List, Optional
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Body, Depends, File, Header, UploadFile, HTTPException, status
+from fastapi.responses import FileResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.core.database import get_async_db
 from app.core.config import settings
 from app.models.video import Video, ProcessingTask
-from app.services.video_service import VideoService
-from app.services.task_service import TaskService
+from app.services.storage import FileTooLargeError
+from app.services.video_service import AsyncVideoService
+from app.services.task_service import AsyncTaskService, IdempotencyKeyError, send_proxy_task
+from cv_models.events import EventDetector
 
 router = APIRouter()
 
@@ -18,7 +23,7 @@ router = APIRouter()
 @router.post("/upload")
 async def upload_video(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload a video file for processing"""
     
@@ -36,23 +41,33 @@ async def upload_video(
             detail="Unsupported video file extension"
         )
     
-    # Read the entire file to enforce upload size limits since
-    # UploadFile doesn't expose a reliable ``size`` attribute.
-    content = await file.read()
-    if len(content) > settings.max_file_size:
+    # Reject early when the multipart parser already knows the size; the
+    # limit is enforced again while streaming since ``size`` may be unset.
+    if file.size is not None and file.size > settings.max_file_size:
         raise HTTPException(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             detail=f"File size exceeds maximum allowed size of {settings.max_file_size} bytes",
         )
-    file.file.seek(0)
 
-    video_service = VideoService(db)
-    video = await video_service.save_uploaded_file(file)
+    video_service = AsyncVideoService(db)
+    try:
+        video = await video_service.save_uploaded_file(file)
+    except FileTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e),
+        )
+    
+    duplicate = await video_service.find_by_content_hash(video.content_hash, exclude_id=video.id)
+    # The proxy is ready for playback and analysis by the time they are asked for
+    proxy_queued = await run_in_threadpool(send_proxy_task, video)
     
     return {
         "id": video.id,
         "filename": video.filename,
         "status": video.status,
+        "duplicate_of": duplicate.id if duplicate else None,
+        "proxy_queued": proxy_queued,
         "message": "Video uploaded successfully"
     }
 
@@ -62,12 +77,12 @@ async def list_videos(
     skip: int = 0,
     limit: int = 100,
     status_filter: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List uploaded videos with optional filtering"""
     
-    video_service = VideoService(db)
-    videos = video_service.get_videos(skip=skip, limit=limit, status=status_filter)
+    video_service = AsyncVideoService(db)
+    videos = await video_service.get_videos(skip=skip, limit=limit, status=status_filter)
     
     return {
         "videos": videos,
@@ -76,11 +91,11 @@ async def list_videos(
 
 
 @router.get("/{video_id}")
-async def get_video(video_id: int, db: Session = Depends(get_db)):
+async def get_video(video_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get video details by ID"""
     
-    video_service = VideoService(db)
-    video = video_service.get_video(video_id)
+    video_service = AsyncVideoService(db)
+    video = await video_service.get_video(video_id)
     
     if not video:
         raise HTTPException(
@@ -91,16 +106,71 @@ async def get_video(video_id: int, db: Session = Depends(get_db)):
     return video
 
 
+@router.get("/{video_id}/proxy")
+async def get_video_proxy(video_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Stream the low-resolution analysis proxy, or the original if there is none.
+
+    The annotator plays this instead of the full-resolution upload.
+    """
+    
+    video_service = AsyncVideoService(db)
+    video = await video_service.get_video(video_id)
+    
+    if not video:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Video not found"
+        )
+    
+    path = video.proxy_path if video.proxy_path and os.path.exists(video.proxy_path) else video.file_path
+    return FileResponse(path, media_type="video/mp4" if path == video.proxy_path else video.content_type)
+
+
+@router.get("/{video_id}/thumbnail")
+async def get_video_thumbnail(
+    video_id: int,
+    frame: int = 0,
+    width: int = 320,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """JPEG thumbnail of a frame, decoded from the proxy"""
+    
+    video_service = AsyncVideoService(db)
+    video = await video_service.get_video(video_id)
+    
+    if not video:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Video not found"
+        )
+    
+    image = await video_service.render_thumbnail(video, frame, width)
+    if image is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Frame not found"
+        )
+    
+    return Response(content=image, media_type="image/jpeg")
+
+
 @router.post("/{video_id}/process")
 async def process_video(
     video_id: int,
     process_type: str = "analysis",
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Start processing a video"""
+    """Start processing a video.
+
+    Repeating a request with the same ``Idempotency-Key`` header returns
+    the task the first one created. Without a key, a request matching an
+    unfinished task for this video and process type also returns that
+    task rather than queuing the same work twice.
+    """
     
-    video_service = VideoService(db)
-    video = video_service.get_video(video_id)
+    video_service = AsyncVideoService(db)
+    video = await video_service.get_video(video_id)
     
     if not video:
         raise HTTPException(
@@ -108,16 +178,28 @@ async def process_video(
             detail="Video not found"
         )
     
-    task_service = TaskService(db)
-    task = await task_service.create_processing_task(
-        video_id=video_id,
-        task_type=process_type
-    )
+    task_service = AsyncTaskService(db)
+    try:
+        task = await task_service.create_processing_task(
+            video_id=video_id,
+            task_type=process_type,
+            idempotency_key=idempotency_key
+        )
+    except IdempotencyKeyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    
+    if task.status == "completed":
+        message = f"Reused existing analysis of identical footage for video {video_id}"
+    else:
+        message = f"Processing started for video {video_id}"
     
     return {
         "task_id": task.task_id,
         "status": task.status,
-        "message": f"Processing started for video {video_id}"
+        "message": message
     }
 
 
@@ -126,7 +208,8 @@ async def get_video_detections(
     video_id: int,
     frame_start: Optional[int] = None,
     frame_end: Optional[int] = None,
-    db: Session = Depends(get_db)
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get detection results for a video.
 
@@ -135,18 +218,31 @@ async def get_video_detections(
     frame numbers. Only detections with ``frame_number`` greater than or
     equal to ``frame_start`` and less than or equal to ``frame_end`` are
     included in the response.
+
+    With ``limit`` the response holds at most that many frames and, when
+    more remain, a ``next_frame_start`` to pass as ``frame_start`` for the
+    next page.
     """
     
-    video_service = VideoService(db)
-    detections = video_service.get_detections(
+    video_service = AsyncVideoService(db)
+    detections = await video_service.get_detections(
         video_id=video_id,
         frame_start=frame_start,
-        frame_end=frame_end
+        frame_end=frame_end,
+        limit=limit
     )
     
+    next_frame_start = None
+    if limit is not None and detections and len(detections) == limit:
+        last = detections[-1]
+        # Columnar stores return plain dicts rather than ``Detection`` rows
+        last_frame = last["frame_number"] if isinstance(last, dict) else last.frame_number
+        next_frame_start = last_frame + 1
+    
     return {
         "video_id": video_id,
-        "detections": detections
+        "detections": detections,
+        "next_frame_start": next_frame_start
     }
 
 
@@ -154,17 +250,84 @@ async def get_video_detections(
 async def get_video_events(
     video_id: int,
     event_type: Optional[str] = None,
-    db: Session = Depends(get_db)
+    version: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get detected events for a video"""
+    """Get detected events for a video.
+
+    Events come from the latest event set unless ``version`` selects an
+    earlier rescore.
+    """
     
-    video_service = VideoService(db)
-    events = video_service.get_events(
+    video_service = AsyncVideoService(db)
+    events = await video_service.get_events(
         video_id=video_id,
-        event_type=event_type
+        event_type=event_type,
+        version=version
     )
+    event_set = await video_service.get_event_set(video_id, version)
     
     return {
         "video_id": video_id,
+        "version": event_set.version if event_set else None,
         "events": events
     }
+
+
+@router.get("/{video_id}/event-sets")
+async def get_video_event_sets(video_id: int, db: AsyncSession = Depends(get_async_db)):
+    """List a video's event set versions and the detector parameters behind each"""
+    
+    video_service = AsyncVideoService(db)
+    
+    return {
+        "video_id": video_id,
+        "event_sets": await video_service.get_event_sets(video_id)
+    }
+
+
+@router.post("/{video_id}/rescore")
+async def rescore_video(
+    video_id: int,
+    detector_params: Dict[str, Any] = Body(default={}),
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Re-run event detection over stored detections with new detector parameters.
+
+    Only ``EventDetector`` arguments are accepted. The result is a new
+    event set version; no frames are decoded again. Duplicate requests
+    are handled as for ``/process``.
+    """
+    
+    video_service = AsyncVideoService(db)
+    video = await video_service.get_video(video_id)
+    
+    if not video:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Video not found"
+        )
+    
+    allowed = set(inspect.signature(EventDetector).parameters)
+    unknown = sorted(set(detector_params) - allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown detector parameters: {', '.join(unknown)}"
+        )
+    
+    task_service = AsyncTaskService(db)
+    try:
+        task = await task_service.create_rescore_task(video_id, detector_params, idempotency_key)
+    except IdempotencyKeyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    
+    return {
+        "task_id": task.task_id,
+        "status": task.status,
+        "message": f"Rescoring events for video {video_id}"
+    }
@@ -0,0 +1,190 @@
+"""
+The Celery application, its queues and task routing
+
+Work is split by how long it runs and who is waiting for it:
+
+- ``interactive``: seconds-long jobs a user is watching (rescoring)
+- ``analysis``: video ingest and detection, minutes to hours
+- ``training``: model training, hours
+
+Each queue gets its own workers with a concurrency/prefetch/time-limit
+profile from ``settings.celery_worker_profiles``, so a long training run
+can never hold up a rescore. Start one with:
+
+    python -m app.core.celery_app <queue>
+
+Periodic housekeeping (expiring abandoned uploads) is sent by a single
+``celery -A app.core.celery_app beat`` process.
+
+Within a queue, Redis message priorities order the work (lower number is
+served first). Publish and start times are recorded per queue so queue
+depth and wait time can be read back to size the workers.
+"""
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import redis
+from celery import Celery
+from celery.signals import before_task_publish, task_prerun
+from kombu import Queue
+from app.core.config import settings
+
+QUEUES = ("interactive", "analysis", "training")
+
+# Redis transport priorities: lower numbers are served first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9
+PRIORITY_STEPS = [PRIORITY_HIGH, 3, PRIORITY_NORMAL, 7, PRIORITY_LOW]
+
+TASK_ROUTES: Dict[str, Tuple[str, int]] = {
+    "cv_models.tasks.rescore_events": ("interactive", PRIORITY_HIGH),
+    # Finishes a video whose segments are all done
+    "cv_models.tasks.merge_segments": ("analysis", PRIORITY_HIGH),
+    # Queued at upload; playback and analysis of the new video wait on it
+    "cv_models.tasks.generate_video_proxy": ("analysis", PRIORITY_HIGH),
+    "cv_models.tasks.process_video_for_detection": ("analysis", PRIORITY_NORMAL),
+    "cv_models.tasks.process_video_segmented": ("analysis", PRIORITY_NORMAL),
+    "cv_models.tasks.detect_segment": ("analysis", PRIORITY_NORMAL),
+    "cv_models.tasks.backfill_events": ("analysis", PRIORITY_LOW),
+    "cv_models.tasks.train_model": ("training", PRIORITY_NORMAL),
+    "app.services.celery_tasks.expire_upload_sessions": ("interactive", PRIORITY_LOW),
+}
+
+# ``process_video_task`` runs any ProcessingTask; route it by task type
+PROCESSING_TASK_ROUTES: Dict[str, Tuple[str, int]] = {
+    "rescore": ("interactive", PRIORITY_HIGH),
+    "training": ("training", PRIORITY_NORMAL),
+}
+DEFAULT_ROUTE = ("analysis", PRIORITY_NORMAL)
+
+WAIT_SAMPLES = 1000  # Wait times kept per queue
+_WAIT_KEY = "celery:queue-wait:{}"
+
+_broker: Optional[redis.Redis] = None
+
+
+def route_task(name: str, args, kwargs, options, task=None, **kw) -> Dict[str, Any]:
+    """Celery router: queue and priority for a task about to be sent"""
+    if name == "app.services.celery_tasks.process_video_task":
+        task_type = args[2] if args and len(args) > 2 else (kwargs or {}).get("task_type")
+        queue, priority = PROCESSING_TASK_ROUTES.get(task_type, DEFAULT_ROUTE)
+    else:
+        queue, priority = TASK_ROUTES.get(name, DEFAULT_ROUTE)
+    return {"queue": queue, "priority": priority}
+
+
+celery_app = Celery(
+    "field_hockey_platform",
+    broker=settings.celery_broker_url,
+    backend=settings.celery_result_backend,
+    include=["app.services.celery_tasks", "cv_models.tasks"]
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    accept_content=["json"],
+    result_serializer="json",
+    timezone="UTC",
+    enable_utc=True,
+    task_track_started=True,
+    task_queues=[Queue(name) for name in QUEUES],
+    task_default_queue=DEFAULT_ROUTE[0],
+    task_default_priority=PRIORITY_NORMAL,
+    task_routes=(route_task,),
+    broker_transport_options={
+        "priority_steps": PRIORITY_STEPS,
+        "queue_order_strategy": "priority",
+        # Late-acked tasks are redelivered after this long; it must outlast
+        # the longest run or a healthy task would be started twice
+        "visibility_timeout": max(
+            profile.get("time_limit") or 0 for profile in settings.celery_worker_profiles.values()
+        ) + 3600,
+    },
+    worker_prefetch_multiplier=1,
+    # Run by ``celery -A app.core.celery_app beat``
+    beat_schedule={
+        "expire-upload-sessions": {
+            "task": "app.services.celery_tasks.expire_upload_sessions",
+            "schedule": settings.upload_cleanup_interval,
+        },
+    },
+)
+
+
+def _broker_client() -> redis.Redis:
+    # One client, and so one connection pool, per process; this runs before every task
+    global _broker
+    if _broker is None:
+        _broker = redis.Redis.from_url(settings.celery_broker_url, socket_connect_timeout=1, socket_timeout=1)
+    return _broker
+
+
+@before_task_publish.connect
+def stamp_publish_time(headers=None, **kwargs):
+    """Record when a task was sent, for queue wait times"""
+    if headers is not None:
+        headers.setdefault("published_at", time.time())
+
+
+@task_prerun.connect
+def record_queue_wait(task=None, **kwargs):
+    """Store how long the task sat in its queue"""
+    published_at = getattr(task.request, "published_at", None) if task is not None else None
+    queue = ((task.request.delivery_info or {}).get("routing_key") if task is not None else None)
+    if published_at is None or queue is None:
+        return
+    wait_ms = max(time.time() - float(published_at), 0.0) * 1000.0
+    try:
+        pipe = _broker_client().pipeline()
+        pipe.lpush(_WAIT_KEY.format(queue), round(wait_ms, 1))
+        pipe.ltrim(_WAIT_KEY.format(queue), 0, WAIT_SAMPLES - 1)
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Queue wait not recorded: {e}")
+
+
+def queue_stats(client: Optional[redis.Redis] = None) -> Dict[str, Dict[str, Any]]:
+    """Pending messages and recent wait-time percentiles per queue"""
+    client = client or _broker_client()
+    separator = "\x06\x16"  # kombu's key separator for priority sub-queues
+    stats = {}
+    for queue in QUEUES:
+        keys = [queue] + [f"{queue}{separator}{step}" for step in PRIORITY_STEPS if step]
+        waits = sorted(float(value) for value in client.lrange(_WAIT_KEY.format(queue), 0, -1))
+        stats[queue] = {
+            "depth": sum(client.llen(key) for key in keys),
+            "wait_samples": len(waits),
+            "wait_p50_ms": _percentile(waits, 50),
+            "wait_p95_ms": _percentile(waits, 95),
+            "wait_max_ms": waits[-1] if waits else 0.0
+        }
+    return stats
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(percent / 100.0 * (len(values) - 1))))]
+
+
+def worker_argv(queue: str) -> List[str]:
+    """``celery worker`` arguments for one queue's profile"""
+    if queue not in QUEUES:
+        raise ValueError(f"Unknown queue '{queue}'; expected one of {', '.join(QUEUES)}")
+    profile = settings.celery_worker_profiles.get(queue, {})
+    argv = [
+        "worker",
+        "--queues", queue,
+        "--hostname", f"{queue}@%h",
+        "--concurrency", str(profile.get("concurrency", 1)),
+        "--prefetch-multiplier", str(profile.get("prefetch_multiplier", 1)),
+        "--loglevel", "info",
+    ]
+    if profile.get("time_limit"):
+        argv += ["--time-limit", str(profile["time_limit"])]
+    return argv
+
+
+if __name__ == "__main__":
+    celery_app.worker_main(worker_argv(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_ROUTE[0]))
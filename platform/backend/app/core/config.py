@@ -2,7 +2,7 @@
 Core configuration settings for the application
 """
 import os
-from typing import List
+from typing import Any, Dict, List
 from pydantic_settings import BaseSettings
 
 
@@ -19,11 +19,71 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "postgresql://user:password@db:5432/app"
+    db_bulk_batch_size: int = 5000  # Rows per executemany/COPY batch for bulk writes
     
     # Redis/Celery
     redis_url: str = "redis://redis:6379/0"
     celery_broker_url: str = "redis://redis:6379/0"
     celery_result_backend: str = "redis://redis:6379/1"
+    # Worker settings per queue (see app.core.celery_app); one worker per queue
+    celery_worker_profiles: Dict[str, Dict[str, Any]] = {
+        "interactive": {"concurrency": 4, "prefetch_multiplier": 4, "time_limit": 5 * 60},
+        "analysis": {"concurrency": 2, "prefetch_multiplier": 1, "time_limit": 6 * 3600},
+        "training": {"concurrency": 1, "prefetch_multiplier": 1, "time_limit": 24 * 3600},
+    }
+    
+    # Computer vision
+    detection_model_name: str = "yolov8n.pt"
+    detection_model_version: str = "1"
+    detection_batch_size: int = 8  # Frames per inference call
+    detection_max_batch_latency: float = 0.05  # Seconds to wait for a batch to fill
+    model_registry_size: int = 2  # Models kept loaded per worker process
+    model_weights_dir: str = "data/models"  # Versioned weights live at <dir>/<version>/<model name>
+    inference_backend: str = "ultralytics"  # ultralytics, onnx, onnx-int8 or fake
+    onnx_model_dir: str = "data/models"  # Exported and quantised ONNX graphs
+    onnx_threads: int = 0  # ONNX Runtime intra-op threads; 0 lets it decide
+    onnx_calibration_video: str = ""  # Frames for static int8 quantisation; dynamic when empty
+    inference_max_batch_size: int = 8  # Frames per micro-batch of the single-frame detect endpoint
+    inference_max_wait_ms: float = 10.0  # How long a micro-batch waits to fill after its first frame
+    inference_queue_size: int = 64  # Pending detect requests before 429s
+    inference_timeout: float = 10.0  # Seconds a detect request waits for its result
+    pipeline_queue_size: int = 4  # Batches buffered between decode, inference and persistence
+    segment_seconds: float = 300.0  # Target segment length for split/merge analysis
+    segment_min_seconds: float = 0  # Videos at least this long are analysed in segments; 0 never splits
+    detection_page_size: int = 1000  # Rows fetched per round-trip when streaming stored detections
+    detection_stride: int = 1  # Run the detector on every Nth frame and track objects in between
+    detection_adaptive: bool = False  # Also detect in-between frames when tracking confidence drops
+    tracking_min_confidence: float = 0.5
+    tracking_iou_threshold: float = 0.3
+    tracking_max_age: int = 30  # Frames a track survives without a matching detection
+    # Frame sampling per task type; frames that barely differ from the last
+    # analysed one skip inference (see cv_models.sampling.SamplingPolicy).
+    # Skipped frames carry the previous objects forward, which changes the
+    # stored detections, so analyses only gate frames when enabled here or
+    # by a task's ``frame_gating`` parameter.
+    sampling_policies: Dict[str, Dict[str, Any]] = {
+        "video_analysis": {"enabled": False, "diff_threshold": 4.0, "hist_threshold": 0.15, "max_skip": 25},
+        "live": {"enabled": True, "diff_threshold": 6.0, "hist_threshold": 0.2, "max_skip": 5},
+        "annotation": {"enabled": False},
+        "training": {"enabled": False},
+    }
+    proxy_enabled: bool = True  # Analyse a low-resolution proxy instead of the original
+    proxy_dir: str = "data/proxies"
+    proxy_height: int = 540
+    proxy_fps: float = 0  # 0 keeps the original frame rate
+    proxy_gop: int = 12  # Proxy keyframe interval; 1 makes it all-intra
+    detection_storage: str = "database"  # database (JSON rows) or columnar (memory-mapped arrays)
+    detection_store_dir: str = "data/detections"
+    detection_bbox_scale: float = 8.0  # Quantisation steps per pixel for columnar bounding boxes
+    backfill_batch_size: int = 200  # Videos per backfill checkpoint
+    progress_min_interval: float = 2.0  # Seconds between progress writes to a task row
+    progress_min_delta: float = 1.0  # Percentage points progress must move before it is written
+    progress_publish_interval: float = 0.1  # Seconds between progress-only task events
+    task_events_enabled: bool = True  # Publish task changes for streaming clients
+    task_events_channel: str = "tasks:events"
+    task_stream_keepalive: float = 15.0  # Seconds between keep-alive comments on idle task streams
+    task_checkpoint_interval: float = 30.0  # Seconds between resumable checkpoints of a running analysis
+    task_cancel_ttl: int = 24 * 3600  # Seconds a cancellation flag stays in Redis
     
     # Security
     secret_key: str = "development-secret-key-change-in-production"
@@ -36,8 +96,17 @@ class Settings(BaseSettings):
     # File uploads
     upload_dir: str = "data/uploads"
     max_file_size: int = 100 * 1024 * 1024  # 100MB
+    upload_chunk_size: int = 1024 * 1024  # 1MB read/write chunks when streaming uploads to disk
     allowed_video_extensions: List[str] = [".mp4", ".mov", ".avi"]
     
+    # Resumable uploads
+    max_resumable_upload_size: int = 16 * 1024 * 1024 * 1024  # 16GB
+    resumable_chunk_size: int = 8 * 1024 * 1024  # 8MB
+    upload_session_ttl: int = 24 * 3600  # Seconds an upload may go without a chunk before it expires
+    upload_cleanup_interval: float = 15 * 60  # Seconds between sweeps for expired uploads
+    max_open_upload_sessions: int = 32
+    max_reserved_upload_bytes: int = 64 * 1024 * 1024 * 1024  # Disk preallocated for open uploads, all together
+    
     class Config:
         env_file = ".env"
 
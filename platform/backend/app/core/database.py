@@ -1,11 +1,27 @@
 """
 Database connection and session management
+
+API handlers use the async engine (asyncpg on PostgreSQL, aiosqlite on
+SQLite) through ``get_async_db`` so a query never blocks the event loop.
+Celery workers, scripts and the upload service keep the synchronous
+``SessionLocal``/``get_db`` path.
 """
+from typing import AsyncIterator
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_url(url: str) -> str:
+    """The async driver's form of a database URL"""
+    scheme, sep, rest = url.partition("://")
+    base = scheme.split("+", 1)[0]
+    return f"{_ASYNC_DRIVERS.get(base, scheme)}{sep}{rest}"
+
 # Create SQLAlchemy engine
 engine = create_engine(
     settings.database_url,
@@ -16,6 +32,16 @@ engine = create_engine(
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    async_database_url(settings.database_url),
+    pool_pre_ping=True,
+    echo=settings.debug
+)
+
+# Loaded attributes stay readable after commit; expiring them would need
+# another round trip, which async sessions cannot do implicitly
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create Base class for models
 Base = declarative_base()
 
@@ -26,4 +52,10 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -2,7 +2,7 @@
 Database models for video processing and analysis
 """
 import datetime
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, Boolean, Float
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, JSON, Text, Boolean, Float, UniqueConstraint, Index, text
 from app.core.database import Base
 
 
@@ -14,25 +14,81 @@ class Video(Base):
     filename = Column(String, nullable=False)
     original_name = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
-    file_size = Column(Integer)
+    file_size = Column(BigInteger)
     content_type = Column(String)
+    content_hash = Column(String, index=True)  # SHA-256 of the file contents
+    width = Column(Integer)
+    height = Column(Integer)
+    fps = Column(Float)
+    proxy_path = Column(String, nullable=True)  # Low-resolution copy used for analysis
+    proxy_width = Column(Integer)
+    proxy_height = Column(Integer)
+    proxy_fps = Column(Float)
     status = Column(String, default="uploaded")  # uploaded, processing, completed, failed
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
 
+class UploadSession(Base):
+    """Resumable chunked uploads in progress"""
+    __tablename__ = "upload_sessions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    upload_id = Column(String, unique=True, index=True, nullable=False)
+    original_name = Column(String, nullable=False)
+    content_type = Column(String)
+    total_size = Column(BigInteger, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    part_path = Column(String, nullable=False)  # Preallocated file the chunks are written into
+    status = Column(String, default="open")  # open, finalizing, completed, expired
+    video_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+
+class UploadChunk(Base):
+    """Chunks received for a resumable upload"""
+    __tablename__ = "upload_chunks"
+    __table_args__ = (UniqueConstraint("upload_id", "chunk_index"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    upload_id = Column(String, index=True, nullable=False)
+    chunk_index = Column(Integer, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+# Statuses of a task that has not finished yet
+IN_FLIGHT_STATUSES = ("pending", "queued", "running")
+_IN_FLIGHT = text("status IN ({})".format(", ".join(f"'{status}'" for status in IN_FLIGHT_STATUSES)))
+
+
 class ProcessingTask(Base):
     """Background processing tasks"""
     __tablename__ = "processing_tasks"
+    __table_args__ = (
+        # At most one unfinished task per video, task type and parameters
+        Index(
+            "uq_processing_tasks_in_flight", "video_id", "task_type", "params_hash",
+            unique=True, postgresql_where=_IN_FLIGHT, sqlite_where=_IN_FLIGHT
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     task_id = Column(String, unique=True, index=True, nullable=False)
     video_id = Column(Integer, nullable=True)
     task_type = Column(String, nullable=False)  # video_analysis, annotation, training
-    status = Column(String, default="pending")  # pending, running, completed, failed
+    status = Column(String, default="pending")  # pending, queued, running, completed, failed, cancelled
+    model_name = Column(String)
+    model_version = Column(String)
+    cache_key = Column(String, index=True)  # Content hash + model + sampling settings of an analysis
+    parameters = Column(JSON)  # Task arguments, e.g. detector parameters for a rescore
+    params_hash = Column(String)  # Hash of ``parameters``, for spotting duplicate submissions
+    idempotency_key = Column(String, unique=True)  # Client's Idempotency-Key header
     progress = Column(Float, default=0.0)
     result = Column(JSON)
     error_message = Column(Text)
+    checkpoint = Column(JSON(none_as_null=True))  # Where a resumed run continues: next frame, counts so far
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
@@ -40,6 +96,7 @@ class ProcessingTask(Base):
 class Detection(Base):
     """Object detection results"""
     __tablename__ = "detections"
+    __table_args__ = (Index("ix_detections_video_frame", "video_id", "frame_number"),)
     
     id = Column(Integer, primary_key=True, index=True)
     video_id = Column(Integer, nullable=False)
@@ -49,12 +106,43 @@ class Detection(Base):
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
 
+class DetectionStore(Base):
+    """Index row for a columnar detection store covering a range of frames"""
+    __tablename__ = "detection_stores"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    video_id = Column(Integer, nullable=False, index=True)
+    frame_start = Column(Integer, nullable=False)  # First frame stored
+    frame_end = Column(Integer, nullable=False)  # Last frame stored (inclusive)
+    frame_count = Column(Integer)
+    object_count = Column(Integer)
+    path = Column(String, nullable=False)  # Store directory
+    size_bytes = Column(BigInteger)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class EventSet(Base):
+    """One versioned run of event detection over a video's stored detections"""
+    __tablename__ = "event_sets"
+    __table_args__ = (UniqueConstraint("video_id", "version"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    video_id = Column(Integer, nullable=False, index=True)
+    version = Column(Integer, nullable=False)
+    source = Column(String, nullable=False)  # analysis, rescore
+    detector_params = Column(JSON)  # EventDetector arguments; empty for the defaults
+    event_count = Column(Integer, nullable=True)  # Set once all events are written
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
 class Event(Base):
     """Game events detected in videos"""
     __tablename__ = "events"
+    __table_args__ = (Index("ix_events_video_frame", "video_id", "frame_number"),)
     
     id = Column(Integer, primary_key=True, index=True)
     video_id = Column(Integer, nullable=False)
+    event_set_id = Column(Integer, nullable=True, index=True)  # Null for events from before versioning
     event_type = Column(String, nullable=False)  # goal, card, corner, penalty
     frame_number = Column(Integer, nullable=False)
     timestamp = Column(Float)  # Event timestamp in seconds
@@ -63,6 +151,23 @@ class Event(Base):
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
 
+class BackfillRun(Base):
+    """Progress checkpoint of a fleet-wide event backfill"""
+    __tablename__ = "backfill_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String, unique=True, index=True, nullable=False)
+    detector_params = Column(JSON)
+    status = Column(String, default="running")  # running, completed, failed
+    last_video_id = Column(Integer, default=0)  # Every video up to this id is done
+    videos_processed = Column(Integer, default=0)
+    videos_failed = Column(Integer, default=0)
+    events_written = Column(Integer, default=0)
+    elapsed_seconds = Column(Float, default=0.0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+
 class Annotation(Base):
     """Manual annotations for training"""
     __tablename__ = "annotations"
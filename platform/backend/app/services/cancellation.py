@@ -0,0 +1,68 @@
+"""
+Task cancellation flags in Redis.
+
+Cancelling a task marks its row ``cancelled`` and sets a short-lived
+Redis key. A running worker checks the key once per batch, which costs a
+single ``EXISTS``, rather than querying the task row, and stops at the
+next batch boundary.
+"""
+import time
+from typing import Optional
+import redis
+from app.core.config import settings
+
+_RETRY_SECONDS = 30.0  # Flags are not checked for this long after Redis fails
+_KEY = "task:cancel:{}"
+
+_client: Optional[redis.Redis] = None
+_down_until = 0.0
+
+
+def _redis() -> Optional[redis.Redis]:
+    global _client
+    if time.monotonic() < _down_until:
+        return None
+    if _client is None:
+        _client = redis.Redis.from_url(settings.redis_url, socket_connect_timeout=1, socket_timeout=1)
+    return _client
+
+
+def _failed(e: Exception) -> None:
+    global _down_until
+    _down_until = time.monotonic() + _RETRY_SECONDS
+    print(f"Task cancellation flag unavailable: {e}")
+
+
+def request_cancel(task_id: str) -> bool:
+    """Ask a running task to stop; never raises"""
+    client = _redis()
+    if client is None:
+        return False
+    try:
+        client.set(_KEY.format(task_id), 1, ex=settings.task_cancel_ttl)
+    except redis.RedisError as e:
+        _failed(e)
+        return False
+    return True
+
+
+def cancel_requested(task_id: str) -> bool:
+    """Whether the task has been cancelled; False while Redis is unreachable"""
+    client = _redis()
+    if client is None:
+        return False
+    try:
+        return bool(client.exists(_KEY.format(task_id)))
+    except redis.RedisError as e:
+        _failed(e)
+        return False
+
+
+def clear_cancel(task_id: str) -> None:
+    client = _redis()
+    if client is None:
+        return
+    try:
+        client.delete(_KEY.format(task_id))
+    except redis.RedisError as e:
+        _failed(e)
@@ -1,73 +1,113 @@
 """
-Celery task definitions (placeholder for future implementation)
+Celery task definitions
 """
-from celery import Celery
+from app.core.celery_app import celery_app
 from app.core.config import settings
 
-# Initialize Celery app
-celery_app = Celery(
-    "field_hockey_platform",
-    broker=settings.celery_broker_url,
-    backend=settings.celery_result_backend
-)
 
-# Configure Celery
-celery_app.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
-    timezone="UTC",
-    enable_utc=True,
-    task_track_started=True,
-    task_time_limit=30 * 60,  # 30 minutes
-    worker_prefetch_multiplier=1,
-)
+# API task types that run the analysis pipeline, and the sampling policy
+# (``settings.sampling_policies``) each one uses
+PIPELINE_TASK_TYPES = {
+    "analysis": "video_analysis",
+    "video_analysis": "video_analysis",
+}
 
 
-@celery_app.task(bind=True)
-def process_video_task(self, task_id: str, video_id: int, task_type: str):
+# Late acks: a task whose worker dies is redelivered and resumes from its
+# checkpoint instead of being lost
+@celery_app.task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def process_video_task(self, task_id: str, video_id: int, task_type: str, parameters: dict = None):
     """
-    Process video task - placeholder implementation
-    
-    In a full implementation, this would:
-    1. Load the video file
-    2. Run computer vision models
-    3. Extract frames and analyze content
-    4. Store results in database
-    5. Update task progress
+    Run a ``ProcessingTask`` on the computer vision pipeline.
+
+    Analysis task types decode the video, detect objects and events;
+    ``rescore`` re-runs event detection with ``parameters`` as detector
+    arguments. Status, throttled progress, the result summary and errors
+    are written to the task's row, which ``/api/v1/tasks/{task_id}`` reads.
+
+    An analysis checkpoints to the row as it goes and continues from the
+    last checkpoint when the task runs again. A cancelled task stops at
+    the next batch boundary, or never starts if it was still queued.
+
+    An analysis is split into segments analysed in parallel when
+    ``parameters`` has ``segmented`` set, or, unless it is set to False,
+    when the video is at least ``settings.segment_min_seconds`` long. The
+    segments then report to the row and the last of them completes it.
     """
-    
+    from app.core.database import SessionLocal
+    from app.services.progress import ProgressReporter
+    from app.services.video_service import VideoService
+    from cv_models import tasks as cv_tasks
+
+    reporter = ProgressReporter(task_id)
+    if not reporter.start():
+        return {"status": "cancelled", "video_id": video_id}
     try:
-        # Update task status to running
-        self.update_state(
-            state="PROGRESS",
-            meta={"current": 0, "total": 100, "status": "Starting processing..."}
-        )
-        
-        # Simulate processing steps
-        import time
-        for i in range(1, 101):
-            time.sleep(0.1)  # Simulate work
-            self.update_state(
-                state="PROGRESS",
-                meta={"current": i, "total": 100, "status": f"Processing frame {i}..."}
-            )
-        
-        # Return final result
-        return {
-            "status": "completed",
-            "frames_processed": 100,
-            "detections_found": 25,
-            "events_detected": 3
-        }
-        
+        if task_type == "rescore":
+            result = cv_tasks.rescore_events(video_id, parameters)
+        elif task_type in PIPELINE_TASK_TYPES:
+            db = SessionLocal()
+            try:
+                video = VideoService(db).get_video(video_id)
+                video_path = video.file_path if video else None
+            finally:
+                db.close()
+            options = dict(parameters or {})
+            segmented = options.pop("segmented", None)
+            callbacks = {
+                "on_progress": reporter.frames,
+                "resume": reporter.checkpoint,
+                "on_checkpoint": reporter.save_checkpoint,
+                "should_stop": reporter.should_stop
+            }
+            if video_path is None:
+                result = {"status": "error", "message": f"Video {video_id} not found"}
+            elif segmented or (segmented is None and settings.segment_min_seconds > 0):
+                result = cv_tasks.analyse_video_segmented(
+                    video_path,
+                    video_id,
+                    min_seconds=0 if segmented else settings.segment_min_seconds,
+                    task_id=task_id,
+                    task_type=PIPELINE_TASK_TYPES[task_type],
+                    **callbacks,
+                    **options
+                )
+            else:
+                result = cv_tasks.analyse_video(
+                    video_path,
+                    video_id,
+                    task_type=PIPELINE_TASK_TYPES[task_type],
+                    **callbacks,
+                    **options
+                )
+        else:
+            result = {"status": "error", "message": f"Unknown task type '{task_type}'"}
     except Exception as exc:
-        self.update_state(
-            state="FAILURE",
-            meta={"error": str(exc)}
-        )
-        raise exc
+        reporter.fail(str(exc))
+        raise
+
+    if result.get("status") in ("cancelled", "dispatched"):
+        # The row already says so, or the segments will finish it
+        return result
+    if result.get("status") == "error":
+        reporter.fail(result.get("message", "Processing failed"), result)
+    else:
+        reporter.complete(result)
+    return result
+
+
+@celery_app.task
+def expire_upload_sessions():
+    """Periodic sweep: expire abandoned resumable uploads and free their disk space"""
+    from app.core.database import SessionLocal
+    from app.services.upload_service import UploadService
+
+    db = SessionLocal()
+    try:
+        return {"expired": UploadService(db).expire_sessions()}
+    finally:
+        db.close()
 
 
 # Export for use in other modules
-__all__ = ["celery_app", "process_video_task"]
\ No newline at end of file
+__all__ = ["celery_app", "process_video_task", "expire_upload_sessions"]
\ No newline at end of file
@@ -0,0 +1,224 @@
+"""
+Columnar on-disk storage for per-frame detections
+
+A store is a directory of flat little-endian arrays plus a ``meta.json``:
+
+- ``frames.bin``  (uint32)  frame number of every stored frame, ascending
+- ``offsets.bin`` (uint64)  index of each frame's first object
+- ``class.bin``   (uint16)  class id per object (names in ``meta.json``)
+- ``conf.bin``    (float16) confidence per object
+- ``bbox.bin``    (uint16)  xyxy per object, quantised by ``bbox_scale``
+- ``track.bin``   (uint32)  track id per object, 0 when untracked
+- ``flags.bin``   (uint8)   per-object flags (``FLAG_TRACKED``, ``FLAG_SKIPPED``,
+  ``FLAG_NO_BBOX``)
+
+Stores written before the track columns existed simply lack those files.
+
+Readers memory-map the arrays, so a frame range is located with a binary
+search and only the matching slices are ever touched or decoded.
+"""
+import json
+import os
+import shutil
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+
+COLUMNS = {
+    "frames": np.dtype("<u4"),
+    "offsets": np.dtype("<u8"),
+    "class": np.dtype("<u2"),
+    "conf": np.dtype("<f2"),
+    "bbox": np.dtype("<u2"),
+    "track": np.dtype("<u4"),
+    "flags": np.dtype("u1"),
+}
+FLAG_TRACKED = 1  # Box carried by the tracker rather than detected
+FLAG_SKIPPED = 2  # Frame skipped by sampling; objects carried from the last analysed frame
+FLAG_NO_BBOX = 4  # Object has no box; its ``bbox`` row is zeros and must not be read
+_BBOX_MAX = np.iinfo(np.uint16).max
+
+
+class ColumnarDetectionWriter:
+    """Append frame-ordered detections to a new store directory"""
+
+    def __init__(self, path: str, fps: float, bbox_scale: float):
+        self.path = path
+        self.fps = fps
+        self.bbox_scale = bbox_scale
+        self.frame_count = 0
+        self.object_count = 0
+        self.first_frame: Optional[int] = None
+        self.last_frame: Optional[int] = None
+        self._class_ids: Dict[str, int] = {}
+        os.makedirs(path, exist_ok=True)
+        self._files = {name: open(os.path.join(path, f"{name}.bin"), "wb") for name in COLUMNS}
+
+    def _class_id(self, name: str) -> int:
+        if name not in self._class_ids:
+            self._class_ids[name] = len(self._class_ids)
+        return self._class_ids[name]
+
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        """Append ``{'frame', 'objects'}`` records in ascending frame order"""
+        if not records:
+            return
+        objects = [obj for det in records for obj in det['objects']]
+        counts = np.fromiter((len(det['objects']) for det in records), np.int64, len(records))
+        offsets = self.object_count + np.concatenate(([0], np.cumsum(counts)[:-1]))
+        frames = np.fromiter((det['frame'] for det in records), np.int64, len(records))
+
+        classes = np.fromiter((self._class_id(str(obj['class'])) for obj in objects), np.uint16, len(objects))
+        conf = np.fromiter(
+            (obj['conf'] if obj.get('conf') is not None else 0.0 for obj in objects), np.float32, len(objects)
+        )
+        bbox = np.array(
+            [obj['bbox'] if obj.get('bbox') is not None else (0.0, 0.0, 0.0, 0.0) for obj in objects],
+            dtype=np.float64
+        ).reshape(len(objects), 4)
+        bbox = np.clip(np.rint(bbox * self.bbox_scale), 0, _BBOX_MAX)
+        tracks = np.fromiter((obj.get('track_id') or 0 for obj in objects), np.int64, len(objects))
+        flags = np.fromiter(
+            (
+                (FLAG_TRACKED if obj.get('tracked') else 0)
+                | (FLAG_SKIPPED if obj.get('skipped') else 0)
+                | (FLAG_NO_BBOX if obj.get('bbox') is None else 0)
+                for obj in objects
+            ),
+            np.uint8,
+            len(objects)
+        )
+
+        for name, values in (
+            ("frames", frames),
+            ("offsets", offsets),
+            ("class", classes),
+            ("conf", conf),
+            ("bbox", bbox),
+            ("track", tracks),
+            ("flags", flags),
+        ):
+            self._files[name].write(values.astype(COLUMNS[name]).tobytes())
+
+        if self.first_frame is None:
+            self.first_frame = int(frames[0])
+        self.last_frame = int(frames[-1])
+        self.frame_count += len(records)
+        self.object_count += len(objects)
+
+    def close(self) -> Dict[str, Any]:
+        """Flush the arrays, write ``meta.json`` and return the metadata"""
+        for f in self._files.values():
+            f.close()
+        meta = {
+            "fps": self.fps,
+            "bbox_scale": self.bbox_scale,
+            "class_names": sorted(self._class_ids, key=self._class_ids.get),
+            "frame_count": self.frame_count,
+            "object_count": self.object_count,
+            "first_frame": self.first_frame,
+            "last_frame": self.last_frame
+        }
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        return meta
+
+    def abort(self) -> None:
+        """Discard a partially written store"""
+        for f in self._files.values():
+            f.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class ColumnarDetectionStore:
+    """Read-only, memory-mapped view of a store directory"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.class_names = self.meta["class_names"]
+        self.bbox_scale = self.meta["bbox_scale"]
+        self.fps = self.meta["fps"]
+        self.columns = {name: self._map(name, dtype) for name, dtype in COLUMNS.items()}
+        self.columns["bbox"] = self.columns["bbox"].reshape(-1, 4)
+
+    def _map(self, name: str, dtype: np.dtype) -> np.ndarray:
+        file_path = os.path.join(self.path, f"{name}.bin")
+        if not os.path.exists(file_path):
+            # Older store without this column
+            return np.zeros(self.meta["object_count"], dtype=dtype)
+        if os.path.getsize(file_path) == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(file_path, dtype=dtype, mode="r")
+
+    def _frame_bounds(self, frame_start: Optional[int], frame_end: Optional[int]):
+        """Row range of frames in the inclusive ``[frame_start, frame_end]``"""
+        frames = self.columns["frames"]
+        lo = 0 if frame_start is None else int(np.searchsorted(frames, frame_start, side="left"))
+        hi = len(frames) if frame_end is None else int(np.searchsorted(frames, frame_end, side="right"))
+        return lo, max(lo, hi)
+
+    def _object_bounds(self, lo: int, hi: int):
+        offsets = self.columns["offsets"]
+        start = int(offsets[lo]) if lo < len(offsets) else self.meta["object_count"]
+        end = int(offsets[hi]) if hi < len(offsets) else self.meta["object_count"]
+        return start, end
+
+    def arrays(self, frame_start: Optional[int] = None, frame_end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Per-object arrays for a frame range, without building any dicts.
+
+        ``frame`` repeats each object's frame number; ``bbox`` is
+        dequantised to float32 and only meaningful where ``has_bbox`` is set.
+        """
+        lo, hi = self._frame_bounds(frame_start, frame_end)
+        start, end = self._object_bounds(lo, hi)
+        counts = np.diff(
+            np.append(self.columns["offsets"][lo:hi].astype(np.int64), end)
+        )
+        flags = np.asarray(self.columns["flags"][start:end])
+        return {
+            "frame": np.repeat(self.columns["frames"][lo:hi].astype(np.int64), counts),
+            "class_id": np.asarray(self.columns["class"][start:end]),
+            "conf": np.asarray(self.columns["conf"][start:end], dtype=np.float32),
+            "bbox": np.asarray(self.columns["bbox"][start:end], dtype=np.float32) / self.bbox_scale,
+            "track_id": np.asarray(self.columns["track"][start:end], dtype=np.int64),
+            "flags": flags,
+            "has_bbox": (flags & FLAG_NO_BBOX) == 0,
+        }
+
+    def iter_frames(
+        self,
+        frame_start: Optional[int] = None,
+        frame_end: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield ``{'frame', 'objects'}`` records for an inclusive frame range"""
+        lo, hi = self._frame_bounds(frame_start, frame_end)
+        frames = self.columns["frames"]
+        offsets = self.columns["offsets"]
+        _, end_of_range = self._object_bounds(lo, hi)
+        for row in range(lo, hi):
+            start = int(offsets[row])
+            end = int(offsets[row + 1]) if row + 1 < hi else end_of_range
+            classes = self.columns["class"][start:end].tolist()
+            confs = self.columns["conf"][start:end].astype(np.float32).tolist()
+            boxes = (self.columns["bbox"][start:end] / self.bbox_scale).tolist()
+            tracks = self.columns["track"][start:end].tolist()
+            flags = self.columns["flags"][start:end].tolist()
+            objects = []
+            for cls, conf, box, track, flag in zip(classes, confs, boxes, tracks, flags):
+                obj = {'class': self.class_names[cls], 'conf': conf}
+                if not flag & FLAG_NO_BBOX:
+                    obj['bbox'] = box
+                if track:
+                    obj['track_id'] = track
+                if flag & FLAG_TRACKED:
+                    obj['tracked'] = True
+                if flag & FLAG_SKIPPED:
+                    obj['skipped'] = True
+                objects.append(obj)
+            yield {'frame': int(frames[row]), 'objects': objects}
+
+
+def remove_store(path: str) -> None:
+    """Delete a store directory"""
+    shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,190 @@
+"""
+Throttled progress reporting from workers to ``ProcessingTask`` rows.
+
+A worker may call ``update`` once per batch, so tens of thousands of times
+on a long match. The reporter only writes when progress has moved by at
+least ``min_delta`` percent *and* ``min_interval`` seconds have passed
+since the last write, so a task costs on the order of a hundred writes
+however long the video is. Every write is a single ``UPDATE ... RETURNING``
+on the row; nothing is read back separately.
+
+Each write is also published as a task event for streaming clients, and
+in between writes progress alone is published at most every
+``progress_publish_interval`` seconds, which costs no database work.
+
+The reporter also carries a task's checkpoint: ``start`` reads back the
+one left by an earlier run, so a retried or resumed analysis continues
+from it, and ``save_checkpoint`` records a new one. Cancellation is seen
+either through the Redis flag or because a write found the row cancelled.
+
+An analysis split into segments has one reporter per segment worker:
+``add_frames`` adds each segment's share to the row's progress in SQL,
+and ``save_checkpoint(state, segment=...)`` keeps the segments' states
+side by side under the checkpoint's ``segments`` key.
+"""
+import datetime
+import time
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy import case, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.video import ProcessingTask
+from app.services.cancellation import cancel_requested
+from app.services.task_events import TASK_FIELDS, publish_task_update, task_payload
+
+
+class ProgressReporter:
+    """Write one task's status, progress, result and errors back to its row"""
+
+    def __init__(
+        self,
+        task_id: str,
+        min_interval: Optional[float] = None,
+        min_delta: Optional[float] = None,
+        session_factory: Callable[[], Session] = SessionLocal
+    ):
+        self.task_id = task_id
+        self.min_interval = settings.progress_min_interval if min_interval is None else min_interval
+        self.min_delta = settings.progress_min_delta if min_delta is None else min_delta
+        self.session_factory = session_factory
+        self.progress = 0.0
+        self.writes = 0
+        self.updates = 0
+        self.publishes = 0
+        self._written_progress = 0.0
+        self._written_at = float("-inf")
+        self._published_progress = 0.0
+        self._published_at = float("-inf")
+        self._pending_progress = 0.0
+        self.checkpoint: Optional[Dict[str, Any]] = None
+        self.cancelled = False
+
+    def _write(self, **values: Any):
+        """One UPDATE of the task row, returning it; a cancelled task is left alone"""
+        db = self.session_factory()
+        try:
+            row = db.execute(
+                update(ProcessingTask)
+                .where(ProcessingTask.task_id == self.task_id, ProcessingTask.status != "cancelled")
+                .values(**values, updated_at=datetime.datetime.utcnow())
+                .returning(*(getattr(ProcessingTask, field) for field in TASK_FIELDS), ProcessingTask.checkpoint)
+            ).first()
+            db.commit()
+        finally:
+            db.close()
+        self.writes += 1
+        if row is None:
+            self.cancelled = True
+            return None
+        self._publish(task_payload(row))
+        return row
+
+    def _publish(self, payload) -> None:
+        self._published_progress, self._published_at = self.progress, time.monotonic()
+        self.publishes += publish_task_update(payload)
+
+    def start(self) -> bool:
+        """Mark the task running; False if it was cancelled before it started"""
+        self._written_at = time.monotonic()
+        row = self._write(
+            status="running",
+            # A run resuming from a checkpoint keeps the progress it had
+            progress=case((ProcessingTask.checkpoint.is_(None), 0.0), else_=ProcessingTask.progress),
+            error_message=None
+        )
+        if row is None:
+            return False
+        self.checkpoint = row.checkpoint
+        self.progress = self._written_progress = row.progress or 0.0
+        return True
+
+    def update(self, progress: float) -> bool:
+        """Record progress (0-100); returns True when it was written"""
+        self.updates += 1
+        self.progress = min(max(progress, 0.0), 100.0)
+        now = time.monotonic()
+        if self.progress - self._written_progress < self.min_delta or now - self._written_at < self.min_interval:
+            if self.progress != self._published_progress and now - self._published_at >= settings.progress_publish_interval:
+                self._publish({"task_id": self.task_id, "progress": self.progress})
+            return False
+        self._written_progress, self._written_at = self.progress, now
+        return self._write(progress=self.progress) is not None
+
+    def frames(self, done: int, total: int) -> bool:
+        """``update`` from a count of processed frames"""
+        return self.update(100.0 * done / total) if total > 0 else False
+
+    def add_frames(self, count: int, total: int) -> bool:
+        """Add ``count`` of ``total`` frames to progress that other reporters also write.
+
+        The increments are summed in the row, so concurrent segments of one
+        task add up; they are written with the same throttling as ``update``.
+        """
+        if total <= 0:
+            return False
+        self.updates += 1
+        self._pending_progress += 100.0 * count / total
+        now = time.monotonic()
+        if self._pending_progress < self.min_delta or now - self._written_at < self.min_interval:
+            return False
+        added = ProcessingTask.progress + self._pending_progress
+        self._pending_progress, self._written_at = 0.0, now
+        row = self._write(progress=case((added > 100.0, 100.0), else_=added))
+        if row is None:
+            return False
+        self.progress = self._written_progress = row.progress
+        return True
+
+    def complete(self, result: Optional[Dict[str, Any]] = None) -> bool:
+        self.progress = 100.0
+        return self._write(status="completed", progress=100.0, result=result, checkpoint=None) is not None
+
+    def fail(self, error_message: str, result: Optional[Dict[str, Any]] = None) -> bool:
+        """Mark the task failed; its checkpoint stays for a retry or resume"""
+        return self._write(
+            status="failed", progress=self.progress, error_message=error_message, result=result
+        ) is not None
+
+    def save_checkpoint(self, state: Dict[str, Any], segment: Optional[str] = None) -> None:
+        """Record where a resumed run should continue.
+
+        Written even once the task is cancelled, so that the work done up
+        to the point it stopped can be resumed. With ``segment`` the state
+        replaces only that segment's entry under ``segments``; the row is
+        locked while it is merged in.
+        """
+        db = self.session_factory()
+        try:
+            if segment is not None:
+                current = db.scalar(
+                    select(ProcessingTask.checkpoint)
+                    .where(ProcessingTask.task_id == self.task_id)
+                    .with_for_update()
+                ) or {}
+                state = {"segments": {**current.get("segments", {}), segment: state}}
+            db.execute(
+                update(ProcessingTask).where(ProcessingTask.task_id == self.task_id).values(checkpoint=state)
+            )
+            db.commit()
+        finally:
+            db.close()
+        self.writes += 1
+        self.checkpoint = state
+
+    def load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """The checkpoint currently stored, without touching the task's status"""
+        db = self.session_factory()
+        try:
+            self.checkpoint = db.scalar(
+                select(ProcessingTask.checkpoint).where(ProcessingTask.task_id == self.task_id)
+            )
+        finally:
+            db.close()
+        return self.checkpoint
+
+    def should_stop(self) -> bool:
+        """Checked at batch boundaries: has the task been cancelled?"""
+        if not self.cancelled and cancel_requested(self.task_id):
+            self.cancelled = True
+        return self.cancelled
@@ -0,0 +1,170 @@
+"""
+Streaming file storage helpers
+"""
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional, Tuple
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+
+
+class FileTooLargeError(Exception):
+    """Raised when an upload grows past the configured size limit"""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"File size exceeds maximum allowed size of {max_size} bytes")
+        self.max_size = max_size
+
+
+@dataclass
+class StoredFile:
+    """A file that has been fully written to its final location"""
+    path: str
+    size: int
+    sha256: str
+    duplicate: bool = False  # Identical content was already stored at ``path``
+
+
+def _write_chunk(buffer, digest, chunk: bytes) -> None:
+    """Hash and write one chunk; runs in the threadpool"""
+    digest.update(chunk)
+    buffer.write(chunk)
+
+
+def content_addressed_path(directory: str, sha256: str, suffix: str = "") -> str:
+    """Location of a file with the given digest inside ``directory``"""
+    return os.path.join(directory, f"{sha256}{suffix.lower()}")
+
+
+def commit_content_addressed(part_path: str, directory: str, sha256: str, suffix: str = "") -> Tuple[str, bool]:
+    """Move a finished ``.part`` file to its content-addressed location.
+
+    Returns ``(path, duplicate)``. When identical content is already
+    stored the part file is dropped and the existing path is returned.
+    """
+    path = content_addressed_path(directory, sha256, suffix)
+    if os.path.exists(path):
+        os.remove(part_path)
+        return path, True
+    os.replace(part_path, path)
+    return path, False
+
+
+def hash_file(path: str, chunk_size: Optional[int] = None) -> str:
+    """SHA-256 of a file on disk, read in bounded chunks"""
+    chunk_size = chunk_size or settings.upload_chunk_size
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _discard(buffer, path: str) -> None:
+    """Close and remove a partially written file"""
+    buffer.close()
+    if os.path.exists(path):
+        os.remove(path)
+
+
+async def stream_upload_to_disk(
+    file: UploadFile,
+    directory: str,
+    suffix: str = "",
+    max_size: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> StoredFile:
+    """Copy an upload to ``directory`` in fixed-size chunks.
+
+    Only one chunk is held in memory at a time. Bytes go to a hidden
+    ``.part`` file which is renamed to its content-addressed name (the
+    SHA-256 digest, computed in the same pass) once the whole upload has
+    been written, so readers never observe a half-written video and
+    identical uploads share one file.
+
+    Raises ``FileTooLargeError`` as soon as more than ``max_size`` bytes
+    have arrived.
+    """
+
+    chunk_size = chunk_size or settings.upload_chunk_size
+    os.makedirs(directory, exist_ok=True)
+
+    part_path = os.path.join(directory, f".{uuid.uuid4()}.part")
+
+    digest = hashlib.sha256()
+    size = 0
+    buffer = await run_in_threadpool(open, part_path, "wb")
+    try:
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_size is not None and size > max_size:
+                raise FileTooLargeError(max_size)
+            await run_in_threadpool(_write_chunk, buffer, digest, chunk)
+        await run_in_threadpool(buffer.close)
+        sha256 = digest.hexdigest()
+        path, duplicate = await run_in_threadpool(
+            commit_content_addressed, part_path, directory, sha256, suffix
+        )
+    except BaseException:
+        await run_in_threadpool(_discard, buffer, part_path)
+        raise
+
+    return StoredFile(path=path, size=size, sha256=sha256, duplicate=duplicate)
+
+
+def preallocate_file(path: str, size: int) -> None:
+    """Create ``path`` with ``size`` bytes reserved for positional writes"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        try:
+            if size:
+                os.posix_fallocate(fd, 0, size)
+        except (AttributeError, OSError):
+            # Not every platform/filesystem supports fallocate; a sparse
+            # file of the right length is good enough for pwrite.
+            os.ftruncate(fd, size)
+    finally:
+        os.close(fd)
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int) -> None:
+    """Write all of ``data`` at ``offset``, looping on short writes"""
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+async def write_stream_at(
+    path: str,
+    offset: int,
+    stream: AsyncIterator[bytes],
+    max_length: int
+) -> int:
+    """Write an async byte stream into an existing file starting at ``offset``.
+
+    Returns the number of bytes written. Raises ``FileTooLargeError`` if the
+    stream yields more than ``max_length`` bytes.
+    """
+
+    fd = await run_in_threadpool(os.open, path, os.O_WRONLY)
+    written = 0
+    try:
+        async for data in stream:
+            if not data:
+                continue
+            if written + len(data) > max_length:
+                raise FileTooLargeError(max_length)
+            await run_in_threadpool(_pwrite_all, fd, data, offset + written)
+            written += len(data)
+    finally:
+        await run_in_threadpool(os.close, fd)
+
+    return written
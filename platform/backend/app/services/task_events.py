@@ -0,0 +1,145 @@
+"""
+Task change notifications over Redis pub/sub.
+
+Workers (``ProgressReporter``) and the API (``TaskService``) publish a
+small JSON delta to ``settings.task_events_channel`` whenever a task
+changes. Each API process holds a single subscription to that channel and
+fans messages out to in-memory subscribers, one per open stream, so idle
+browser tabs cost a queue entry each rather than a database query every
+few seconds.
+
+Subscribers coalesce by task: a slow client only ever has the latest
+state of each task waiting for it, never a backlog.
+"""
+import asyncio
+import datetime
+import json
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+import redis
+from app.core.config import settings
+
+_RETRY_SECONDS = 30.0  # Publishing stays off this long after Redis fails
+_RECONNECT_SECONDS = 2.0
+
+_publisher: Optional[redis.Redis] = None
+_publisher_down_until = 0.0
+
+TASK_FIELDS = ("task_id", "video_id", "task_type", "status", "progress", "error_message", "created_at", "updated_at")
+
+
+def task_payload(task: Any) -> Dict[str, Any]:
+    """Stream representation of a task row (ORM object or result row)"""
+    payload = {}
+    for field in TASK_FIELDS:
+        value = getattr(task, field, None)
+        payload[field] = value.isoformat() if isinstance(value, datetime.datetime) else value
+    return payload
+
+
+def publish_task_update(payload: Dict[str, Any]) -> bool:
+    """Publish a task delta; never raises, and backs off while Redis is down"""
+    global _publisher, _publisher_down_until
+    if not settings.task_events_enabled or time.monotonic() < _publisher_down_until:
+        return False
+    try:
+        if _publisher is None:
+            _publisher = redis.Redis.from_url(settings.redis_url, socket_connect_timeout=1, socket_timeout=1)
+        _publisher.publish(settings.task_events_channel, json.dumps(payload, default=str))
+    except redis.RedisError as e:
+        _publisher_down_until = time.monotonic() + _RETRY_SECONDS
+        print(f"Task event publish failed: {e}")
+        return False
+    return True
+
+
+class TaskSubscriber:
+    """Latest pending update per task for one stream"""
+
+    def __init__(self, task_type: Optional[str] = None):
+        self.task_type = task_type
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.resync = False
+        self._ready = asyncio.Event()
+
+    def deliver(self, payload: Dict[str, Any]) -> None:
+        task_type = payload.get("task_type")
+        if self.task_type and task_type is not None and task_type != self.task_type:
+            return
+        task_id = payload["task_id"]
+        # Partial progress deltas merge into whatever is still unsent
+        self.pending[task_id] = {**self.pending.get(task_id, {}), **payload}
+        self._ready.set()
+
+    def request_resync(self) -> None:
+        self.resync = True
+        self.pending.clear()
+        self._ready.set()
+
+    async def next(self, timeout: float) -> Tuple[List[Dict[str, Any]], bool]:
+        """Wait up to ``timeout`` for updates; returns them and whether to resync"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return [], False
+        self._ready.clear()
+        updates, resync = list(self.pending.values()), self.resync
+        self.pending, self.resync = {}, False
+        return updates, resync
+
+
+class TaskEventBroadcaster:
+    """One Redis subscription per process, fanned out to local subscribers"""
+
+    def __init__(self, listen: bool = True):
+        self.listen = listen
+        self.subscribers: Set[TaskSubscriber] = set()
+        self._listener: Optional[asyncio.Task] = None
+
+    def subscribe(self, task_type: Optional[str] = None) -> TaskSubscriber:
+        subscriber = TaskSubscriber(task_type)
+        self.subscribers.add(subscriber)
+        if self.listen and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        return subscriber
+
+    def unsubscribe(self, subscriber: TaskSubscriber) -> None:
+        self.subscribers.discard(subscriber)
+
+    def deliver(self, payload: Dict[str, Any]) -> None:
+        for subscriber in self.subscribers:
+            subscriber.deliver(payload)
+
+    async def _listen(self) -> None:
+        import redis.asyncio as aioredis
+
+        connected_before = False
+        while True:
+            try:
+                client = aioredis.Redis.from_url(settings.redis_url)
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(settings.task_events_channel)
+                    if connected_before:
+                        # Updates may have been missed while disconnected
+                        for subscriber in self.subscribers:
+                            subscriber.request_resync()
+                    connected_before = True
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.deliver(json.loads(message["data"]))
+            except (redis.RedisError, OSError, ValueError) as e:
+                print(f"Task event subscription lost: {e}")
+                connected_before = True
+                await asyncio.sleep(_RECONNECT_SECONDS)
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+broadcaster = TaskEventBroadcaster()
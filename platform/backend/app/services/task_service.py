@@ -1,11 +1,198 @@
 """
 Task processing service
 """
+import hashlib
+import json
 import uuid
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+from sqlalchemy import Select, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.models.video import ProcessingTask
-from app.services.celery_tasks import process_video_task
+from starlette.concurrency import run_in_threadpool
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.models.video import IN_FLIGHT_STATUSES, ProcessingTask, Video
+from app.services.cancellation import clear_cancel, request_cancel
+from app.services.celery_tasks import PIPELINE_TASK_TYPES, process_video_task
+from app.services.task_events import publish_task_update, task_payload
+from app.services.video_service import AsyncVideoService, VideoService
+
+PROXY_TASK = "cv_models.tasks.generate_video_proxy"
+
+
+def detection_cache_key(content_hash: str, task_type: str) -> str:
+    """Key under which an analysis' raw detections can be reused.
+
+    Covers everything that changes the detections: the footage, the model
+    and its inference backend, and the sampling settings (stride, tracking,
+    frame gating, proxy).
+    Event detector parameters are deliberately left out; those only need
+    a rescore.
+    """
+    key = {
+        "content_hash": content_hash,
+        "model_name": settings.detection_model_name,
+        "model_version": settings.detection_model_version,
+        "inference_backend": settings.inference_backend,
+        "detection_stride": settings.detection_stride,
+        "detection_adaptive": settings.detection_adaptive,
+        "sampling": settings.sampling_policies.get(PIPELINE_TASK_TYPES.get(task_type, task_type)),
+        "proxy": [settings.proxy_enabled, settings.proxy_height, settings.proxy_fps]
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+def params_hash(parameters: Optional[Dict[str, Any]]) -> str:
+    """Stable hash of task parameters; no parameters and ``{}`` are the same"""
+    return hashlib.sha256(json.dumps(parameters or {}, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IdempotencyKeyError(Exception):
+    """Raised when an idempotency key is reused for a different request"""
+
+
+# Statements and row construction shared by ``TaskService`` and
+# ``AsyncTaskService``; only how they are executed differs
+
+def _task_by_id(task_id: str) -> Select:
+    return select(ProcessingTask).where(ProcessingTask.task_id == task_id)
+
+
+def _task_page(skip: int, limit: int, status: Optional[str], task_type: Optional[str]) -> Select:
+    statement = select(ProcessingTask)
+    
+    if status:
+        statement = statement.where(ProcessingTask.status == status)
+    
+    if task_type:
+        statement = statement.where(ProcessingTask.task_type == task_type)
+    
+    return statement.order_by(ProcessingTask.created_at.desc()).offset(skip).limit(limit)
+
+
+def _task_by_idempotency_key(idempotency_key: str) -> Select:
+    return select(ProcessingTask).where(ProcessingTask.idempotency_key == idempotency_key)
+
+
+def _in_flight_task(video_id: int, task_type: str, digest: str) -> Select:
+    return select(ProcessingTask).where(
+        ProcessingTask.video_id == video_id,
+        ProcessingTask.task_type == task_type,
+        ProcessingTask.params_hash == digest,
+        ProcessingTask.status.in_(IN_FLIGHT_STATUSES)
+    ).limit(1)
+
+
+def _reusable_task(content_hash: str, task_type: str) -> Select:
+    return select(ProcessingTask).where(
+        ProcessingTask.cache_key == detection_cache_key(content_hash, task_type),
+        ProcessingTask.task_type == task_type,
+        ProcessingTask.status == "completed"
+    ).order_by(ProcessingTask.updated_at.desc()).limit(1)
+
+
+def _check_idempotency_key(task: ProcessingTask, video_id: int, task_type: str, digest: str) -> ProcessingTask:
+    if (task.video_id, task.task_type, task.params_hash) != (video_id, task_type, digest):
+        raise IdempotencyKeyError(f"Idempotency key '{task.idempotency_key}' was used for a different request")
+    return task
+
+
+def _analysis_task(
+    video: Optional[Video],
+    video_id: int,
+    task_type: str,
+    idempotency_key: Optional[str],
+    reusable: Optional[ProcessingTask] = None
+) -> ProcessingTask:
+    """A pending analysis, or a completed one linked to ``reusable``'s results"""
+    cache_key = detection_cache_key(video.content_hash, task_type) if video and video.content_hash else None
+    if reusable:
+        return ProcessingTask(
+            task_id=str(uuid.uuid4()),
+            video_id=video_id,
+            task_type=task_type,
+            status="completed",
+            model_name=reusable.model_name,
+            model_version=reusable.model_version,
+            cache_key=cache_key,
+            params_hash=params_hash(None),
+            idempotency_key=idempotency_key,
+            progress=100.0,
+            result={
+                **(reusable.result or {}),
+                # The copied rows are paged from this video, not the source
+                "video_id": video_id,
+                "detections_ref": f"{settings.api_prefix}/videos/{video_id}/detections",
+                "events_ref": f"{settings.api_prefix}/videos/{video_id}/events",
+                "reused_from_task": reusable.task_id
+            }
+        )
+    return ProcessingTask(
+        task_id=str(uuid.uuid4()),
+        video_id=video_id,
+        task_type=task_type,
+        status="pending",
+        model_name=settings.detection_model_name,
+        model_version=settings.detection_model_version,
+        cache_key=cache_key,
+        params_hash=params_hash(None),
+        idempotency_key=idempotency_key
+    )
+
+
+def _rescore_task(video_id: int, detector_params: Dict[str, Any], idempotency_key: Optional[str]) -> ProcessingTask:
+    return ProcessingTask(
+        task_id=str(uuid.uuid4()),
+        video_id=video_id,
+        task_type="rescore",
+        status="pending",
+        parameters=detector_params,
+        params_hash=params_hash(detector_params),
+        idempotency_key=idempotency_key
+    )
+
+
+def _apply_status(
+    task: ProcessingTask,
+    status: str,
+    progress: Optional[float],
+    result: Optional[dict],
+    error_message: Optional[str]
+) -> None:
+    task.status = status
+    if progress is not None:
+        task.progress = progress
+    if result is not None:
+        task.result = result
+    if error_message is not None:
+        task.error_message = error_message
+
+
+def send_task(task: ProcessingTask) -> None:
+    """Queue a task on Celery; the Celery task id is the ``ProcessingTask.task_id``"""
+    process_video_task.apply_async(
+        (task.task_id, task.video_id, task.task_type, task.parameters),
+        task_id=task.task_id
+    )
+
+
+def send_proxy_task(video: Video) -> bool:
+    """Queue the analysis proxy of a newly stored video.
+
+    Sent by name, so the API does not import the computer vision code, and
+    without a result, which nothing reads. An unreachable broker does not
+    fail the upload and publishing is not retried: the proxy is then built
+    by the first analysis instead. Returns whether it was queued.
+    """
+    if not settings.proxy_enabled:
+        return False
+    try:
+        celery_app.send_task(PROXY_TASK, args=(video.id, video.file_path), retry=False, ignore_result=True)
+    except Exception as e:
+        print(f"Proxy not queued for video {video.id}: {e}")
+        return False
+    return True
 
 
 class TaskService:
@@ -17,37 +204,129 @@ class TaskService:
     async def create_processing_task(
         self,
         video_id: int,
-        task_type: str
+        task_type: str,
+        idempotency_key: Optional[str] = None
     ) -> ProcessingTask:
-        """Create a new processing task"""
+        """Create a new processing task.
+
+        A repeated request (same ``idempotency_key``) or a duplicate of a
+        task that has not finished yet returns that task instead.
+        """
         
-        task_id = str(uuid.uuid4())
+        existing = self.find_submitted_task(video_id, task_type, None, idempotency_key)
+        if existing:
+            return existing
         
-        # Create database record
-        task = ProcessingTask(
-            task_id=task_id,
-            video_id=video_id,
-            task_type=task_type,
-            status="pending"
-        )
+        video = self.db.scalars(select(Video).where(Video.id == video_id)).first()
+        
+        # Identical footage already analysed by the same model and sampling
+        # settings: link the stored results instead of running inference again
+        reusable = self.find_reusable_task(video_id, task_type)
+        if reusable:
+            if reusable.video_id != video_id:
+                VideoService(self.db).copy_results(reusable.video_id, video_id)
+            task = _analysis_task(video, video_id, task_type, idempotency_key, reusable)
+            inserted = self._insert(task)
+            if inserted is task:
+                publish_task_update(task_payload(task))
+            return inserted
+        
+        return self._submit(_analysis_task(video, video_id, task_type, idempotency_key))
+    
+    def find_reusable_task(self, video_id: int, task_type: str) -> Optional[ProcessingTask]:
+        """Find a completed analysis with the same detection cache key.
+
+        The match may be an earlier run on this very video, in which case
+        its detections are already in place.
+        """
+        
+        video = self.db.scalars(select(Video).where(Video.id == video_id)).first()
+        if not video or not video.content_hash:
+            return None
+        
+        return self.db.scalars(_reusable_task(video.content_hash, task_type)).first()
+    
+    def create_rescore_task(
+        self,
+        video_id: int,
+        detector_params: Dict[str, Any],
+        idempotency_key: Optional[str] = None
+    ) -> ProcessingTask:
+        """Queue event detection alone over a video's stored detections"""
+        
+        existing = self.find_submitted_task(video_id, "rescore", detector_params, idempotency_key)
+        if existing:
+            return existing
+        
+        return self._submit(_rescore_task(video_id, detector_params, idempotency_key))
+    
+    def find_submitted_task(
+        self,
+        video_id: int,
+        task_type: str,
+        parameters: Optional[Dict[str, Any]],
+        idempotency_key: Optional[str] = None
+    ) -> Optional[ProcessingTask]:
+        """The task a submission should return instead of creating one.
+
+        That is the task created under the same idempotency key, whatever
+        its status, or else an unfinished task for the same video, task
+        type and parameters. Raises ``IdempotencyKeyError`` when the key
+        was used for a different request.
+        """
+        
+        digest = params_hash(parameters)
+        if idempotency_key:
+            task = self.db.scalars(_task_by_idempotency_key(idempotency_key)).first()
+            if task:
+                return _check_idempotency_key(task, video_id, task_type, digest)
+        
+        return self.db.scalars(_in_flight_task(video_id, task_type, digest)).first()
+    
+    def _insert(self, task: ProcessingTask) -> ProcessingTask:
+        """Add a new task row, or return the one a concurrent duplicate created"""
         
         self.db.add(task)
-        self.db.commit()
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # Lost the race to an identical submission; the unique indexes
+            # on idempotency key and in-flight parameters name the winner
+            self.db.rollback()
+            existing = self.find_submitted_task(task.video_id, task.task_type, task.parameters, task.idempotency_key)
+            if existing is None:
+                raise
+            return existing
         self.db.refresh(task)
+        return task
+    
+    def _submit(self, task: ProcessingTask) -> ProcessingTask:
+        """Insert a pending task and dispatch it, unless a duplicate already exists"""
+        
+        inserted = self._insert(task)
+        if inserted is not task:
+            return inserted
+        return self.dispatch(task)
+    
+    def dispatch(self, task: ProcessingTask) -> ProcessingTask:
+        """Send a pending task to the Celery workers.
+
+        The Celery task id is the ``ProcessingTask.task_id``; the worker
+        reports progress and results back to the row.
+        """
         
-        # Submit to Celery (for now, just a placeholder)
-        # In a full implementation, this would dispatch to Celery workers
+        # Queued before sending so a fast worker's "running" is not overwritten
+        task = self.update_task_status(task.task_id, "queued")
         try:
-            # process_video_task.delay(task_id, video_id, task_type)
-            self.update_task_status(task_id, "queued")
+            send_task(task)
         except Exception as e:
-            self.update_task_status(task_id, "failed", error_message=str(e))
+            return self.update_task_status(task.task_id, "failed", error_message=f"Could not queue task: {e}")
         
         return task
     
     def get_task(self, task_id: str) -> Optional[ProcessingTask]:
         """Get task by ID"""
-        return self.db.query(ProcessingTask).filter(ProcessingTask.task_id == task_id).first()
+        return self.db.scalars(_task_by_id(task_id)).first()
     
     def get_tasks(
         self,
@@ -57,16 +336,7 @@ class TaskService:
         task_type: Optional[str] = None
     ) -> List[ProcessingTask]:
         """Get list of tasks with optional filtering"""
-        
-        query = self.db.query(ProcessingTask)
-        
-        if status:
-            query = query.filter(ProcessingTask.status == status)
-        
-        if task_type:
-            query = query.filter(ProcessingTask.task_type == task_type)
-        
-        return query.order_by(ProcessingTask.created_at.desc()).offset(skip).limit(limit).all()
+        return list(self.db.scalars(_task_page(skip, limit, status, task_type)))
     
     def update_task_status(
         self,
@@ -80,30 +350,226 @@ class TaskService:
         
         task = self.get_task(task_id)
         if task:
-            task.status = status
-            if progress is not None:
-                task.progress = progress
-            if result is not None:
-                task.result = result
-            if error_message is not None:
-                task.error_message = error_message
-            
+            _apply_status(task, status, progress, result, error_message)
             self.db.commit()
             self.db.refresh(task)
+            publish_task_update(task_payload(task))
         
         return task
     
     async def cancel_task(self, task_id: str) -> bool:
-        """Cancel a processing task"""
+        """Cancel a processing task.
+
+        A running worker sees the Redis flag and stops at its next batch
+        boundary; a queued one finds the row cancelled when it starts and
+        returns straight away, so no revoke broadcast is needed.
+        """
         
         task = self.get_task(task_id)
-        if task and task.status in ["pending", "queued", "running"]:
+        if task and task.status in IN_FLIGHT_STATUSES:
             task.status = "cancelled"
             self.db.commit()
+            publish_task_update(task_payload(task))
+            request_cancel(task_id)
             
-            # In a full implementation, also cancel the Celery task
-            # celery_app.control.revoke(task_id, terminate=True)
+            return True
+        
+        return False
+    
+    def resume_task(self, task_id: str) -> Optional[ProcessingTask]:
+        """Queue a failed or cancelled task again.
+
+        The worker continues from the task's last checkpoint, if it has
+        one, rather than from the first frame.
+        """
+        
+        task = self.get_task(task_id)
+        if not task or task.status not in ["failed", "cancelled"]:
+            return None
+        
+        # An identical task submitted since then is already doing the work
+        duplicate = self.find_submitted_task(task.video_id, task.task_type, task.parameters)
+        if duplicate:
+            return duplicate
+        
+        clear_cancel(task_id)
+        task.error_message = None
+        self.db.commit()
+        
+        return self.dispatch(task)
+
+
+class AsyncTaskService:
+    """``TaskService`` for async endpoints, on an ``AsyncSession``.
+
+    Queries are awaited. Sending to the broker and the Redis calls behind
+    task events and cancellation are blocking clients, so they run in the
+    thread pool; none of it holds up the event loop.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create_processing_task(
+        self,
+        video_id: int,
+        task_type: str,
+        idempotency_key: Optional[str] = None
+    ) -> ProcessingTask:
+        """Create a new processing task (see ``TaskService.create_processing_task``)"""
+        
+        existing = await self.find_submitted_task(video_id, task_type, None, idempotency_key)
+        if existing:
+            return existing
+        
+        video = await AsyncVideoService(self.db).get_video(video_id)
+        
+        reusable = await self.find_reusable_task(video_id, task_type)
+        if reusable:
+            if reusable.video_id != video_id:
+                await AsyncVideoService(self.db).copy_results(reusable.video_id, video_id)
+            task = _analysis_task(video, video_id, task_type, idempotency_key, reusable)
+            inserted = await self._insert(task)
+            if inserted is task:
+                await run_in_threadpool(publish_task_update, task_payload(task))
+            return inserted
+        
+        return await self._submit(_analysis_task(video, video_id, task_type, idempotency_key))
+    
+    async def find_reusable_task(self, video_id: int, task_type: str) -> Optional[ProcessingTask]:
+        """Find a completed analysis with the same detection cache key"""
+        
+        video = await AsyncVideoService(self.db).get_video(video_id)
+        if not video or not video.content_hash:
+            return None
+        
+        return (await self.db.scalars(_reusable_task(video.content_hash, task_type))).first()
+    
+    async def create_rescore_task(
+        self,
+        video_id: int,
+        detector_params: Dict[str, Any],
+        idempotency_key: Optional[str] = None
+    ) -> ProcessingTask:
+        """Queue event detection alone over a video's stored detections"""
+        
+        existing = await self.find_submitted_task(video_id, "rescore", detector_params, idempotency_key)
+        if existing:
+            return existing
+        
+        return await self._submit(_rescore_task(video_id, detector_params, idempotency_key))
+    
+    async def find_submitted_task(
+        self,
+        video_id: int,
+        task_type: str,
+        parameters: Optional[Dict[str, Any]],
+        idempotency_key: Optional[str] = None
+    ) -> Optional[ProcessingTask]:
+        """The task a submission should return instead of creating one"""
+        
+        digest = params_hash(parameters)
+        if idempotency_key:
+            task = (await self.db.scalars(_task_by_idempotency_key(idempotency_key))).first()
+            if task:
+                return _check_idempotency_key(task, video_id, task_type, digest)
+        
+        return (await self.db.scalars(_in_flight_task(video_id, task_type, digest))).first()
+    
+    async def _insert(self, task: ProcessingTask) -> ProcessingTask:
+        """Add a new task row, or return the one a concurrent duplicate created"""
+        
+        self.db.add(task)
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            existing = await self.find_submitted_task(
+                task.video_id, task.task_type, task.parameters, task.idempotency_key
+            )
+            if existing is None:
+                raise
+            return existing
+        await self.db.refresh(task)
+        return task
+    
+    async def _submit(self, task: ProcessingTask) -> ProcessingTask:
+        inserted = await self._insert(task)
+        if inserted is not task:
+            return inserted
+        return await self.dispatch(task)
+    
+    async def dispatch(self, task: ProcessingTask) -> ProcessingTask:
+        """Send a pending task to the Celery workers"""
+        
+        task = await self.update_task_status(task.task_id, "queued")
+        try:
+            await run_in_threadpool(send_task, task)
+        except Exception as e:
+            return await self.update_task_status(task.task_id, "failed", error_message=f"Could not queue task: {e}")
+        
+        return task
+    
+    async def get_task(self, task_id: str) -> Optional[ProcessingTask]:
+        """Get task by ID"""
+        return (await self.db.scalars(_task_by_id(task_id))).first()
+    
+    async def get_tasks(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[str] = None,
+        task_type: Optional[str] = None
+    ) -> List[ProcessingTask]:
+        """Get list of tasks with optional filtering"""
+        return list(await self.db.scalars(_task_page(skip, limit, status, task_type)))
+    
+    async def update_task_status(
+        self,
+        task_id: str,
+        status: str,
+        progress: Optional[float] = None,
+        result: Optional[dict] = None,
+        error_message: Optional[str] = None
+    ) -> Optional[ProcessingTask]:
+        """Update task status and progress"""
+        
+        task = await self.get_task(task_id)
+        if task:
+            _apply_status(task, status, progress, result, error_message)
+            await self.db.commit()
+            await self.db.refresh(task)
+            await run_in_threadpool(publish_task_update, task_payload(task))
+        
+        return task
+    
+    async def cancel_task(self, task_id: str) -> bool:
+        """Cancel a processing task (see ``TaskService.cancel_task``)"""
+        
+        task = await self.get_task(task_id)
+        if task and task.status in IN_FLIGHT_STATUSES:
+            task.status = "cancelled"
+            await self.db.commit()
+            await run_in_threadpool(publish_task_update, task_payload(task))
+            await run_in_threadpool(request_cancel, task_id)
             
             return True
         
-        return False
\ No newline at end of file
+        return False
+    
+    async def resume_task(self, task_id: str) -> Optional[ProcessingTask]:
+        """Queue a failed or cancelled task again from its last checkpoint"""
+        
+        task = await self.get_task(task_id)
+        if not task or task.status not in ["failed", "cancelled"]:
+            return None
+        
+        duplicate = await self.find_submitted_task(task.video_id, task.task_type, task.parameters)
+        if duplicate:
+            return duplicate
+        
+        await run_in_threadpool(clear_cancel, task_id)
+        task.error_message = None
+        await self.db.commit()
+        
+        return await self.dispatch(task)
@@ -0,0 +1,278 @@
+"""
+Resumable chunked upload service
+"""
+import datetime
+import os
+import uuid
+from typing import AsyncIterator, List, Optional
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.models.video import Video, UploadSession, UploadChunk
+from app.services.storage import (
+    StoredFile,
+    commit_content_addressed,
+    hash_file,
+    preallocate_file,
+    write_stream_at,
+)
+from app.services.video_service import VideoService
+
+# Statuses of a session that expires once idle for ``settings.upload_session_ttl``
+STALE_STATUSES = ("open", "finalizing")
+
+
+class UploadError(Exception):
+    """Raised when a chunk or finalize request does not fit the session"""
+
+
+class UploadCapacityError(UploadError):
+    """Raised when a new upload would exceed the open session or reserved byte limits"""
+
+
+class UploadService:
+    """Service for resumable uploads.
+
+    Session state lives in the database and chunks are written with
+    positional writes into a preallocated file on the shared upload
+    volume, so any API worker can accept any chunk in any order.
+
+    Preallocation reserves the whole file up front, so the number of open
+    sessions and the bytes they reserve are capped, and a session that
+    receives no chunk for ``settings.upload_session_ttl`` seconds expires
+    and its file is deleted.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_session(
+        self,
+        filename: str,
+        total_size: int,
+        content_type: Optional[str] = None
+    ) -> UploadSession:
+        """Start a resumable upload and preallocate its target file"""
+
+        # Sessions abandoned since the last sweep don't count against the limits
+        self.expire_sessions()
+        open_sessions, reserved = self.db.execute(
+            select(func.count(), func.coalesce(func.sum(UploadSession.total_size), 0))
+            .where(UploadSession.status.in_(["open", "finalizing"]))
+        ).one()
+        if open_sessions >= settings.max_open_upload_sessions:
+            raise UploadCapacityError(f"Too many uploads in progress ({open_sessions})")
+        if reserved + total_size > settings.max_reserved_upload_bytes:
+            raise UploadCapacityError("Not enough upload space reserved for a file of this size")
+
+        os.makedirs(settings.upload_dir, exist_ok=True)
+        upload_id = str(uuid.uuid4())
+        part_path = os.path.join(settings.upload_dir, f".{upload_id}.part")
+        preallocate_file(part_path, total_size)
+
+        session = UploadSession(
+            upload_id=upload_id,
+            original_name=filename,
+            content_type=content_type,
+            total_size=total_size,
+            chunk_size=settings.resumable_chunk_size,
+            part_path=part_path,
+            status="open"
+        )
+
+        self.db.add(session)
+        self.db.commit()
+        self.db.refresh(session)
+
+        return session
+
+    def get_session(self, upload_id: str) -> Optional[UploadSession]:
+        """Get upload session by ID"""
+        return self.db.query(UploadSession).filter(UploadSession.upload_id == upload_id).first()
+
+    def get_received_chunks(self, upload_id: str) -> List[int]:
+        """Get the indexes of chunks received so far, in order"""
+        rows = (
+            self.db.query(UploadChunk.chunk_index)
+            .filter(UploadChunk.upload_id == upload_id)
+            .order_by(UploadChunk.chunk_index)
+            .all()
+        )
+        return [row.chunk_index for row in rows]
+
+    def get_progress(self, session: UploadSession) -> dict:
+        """Summarise which byte ranges of an upload have arrived"""
+
+        chunk_count = -(-session.total_size // session.chunk_size)
+        received = set(self.get_received_chunks(session.upload_id))
+        missing = [index for index in range(chunk_count) if index not in received]
+
+        # ``offset`` is the end of the contiguous prefix, for clients that
+        # upload sequentially and just want to know where to resume.
+        first_missing = missing[0] if missing else chunk_count
+        offset = min(first_missing * session.chunk_size, session.total_size)
+        received_bytes = session.total_size - sum(
+            self._chunk_length(session, index) for index in missing
+        )
+
+        return {
+            "upload_id": session.upload_id,
+            "status": session.status,
+            "total_size": session.total_size,
+            "chunk_size": session.chunk_size,
+            "received_bytes": received_bytes,
+            "offset": offset,
+            "missing_chunks": missing,
+            "video_id": session.video_id
+        }
+
+    async def write_chunk(
+        self,
+        session: UploadSession,
+        start: int,
+        end: int,
+        stream: AsyncIterator[bytes]
+    ) -> int:
+        """Write the inclusive byte range ``start``-``end`` of an upload.
+
+        Ranges must line up with the session's chunk boundaries. Re-sending
+        a chunk that was already received simply overwrites it.
+        """
+
+        if session.status == "expired":
+            raise UploadError("Upload has expired")
+        if session.status != "open":
+            raise UploadError("Upload is already finalized")
+        if start % session.chunk_size != 0:
+            raise UploadError(f"Chunk must start on a multiple of {session.chunk_size} bytes")
+
+        chunk_index = start // session.chunk_size
+        expected = self._chunk_length(session, chunk_index)
+        if expected <= 0 or end - start + 1 != expected:
+            raise UploadError(f"Chunk {chunk_index} must be exactly {max(expected, 0)} bytes")
+
+        try:
+            written = await write_stream_at(session.part_path, start, stream, expected)
+        except FileNotFoundError:
+            # Expired and deleted since the session was read
+            raise UploadError("Upload has expired")
+        if written != expected:
+            raise UploadError(f"Received {written} of {expected} bytes for chunk {chunk_index}")
+
+        await run_in_threadpool(self._record_chunk, session, chunk_index, written)
+
+        return chunk_index
+
+    def _record_chunk(self, session: UploadSession, chunk_index: int, size: int) -> None:
+        """Mark a chunk as received"""
+
+        self.db.add(UploadChunk(upload_id=session.upload_id, chunk_index=chunk_index, size=size))
+        # A chunk keeps the session from expiring
+        session.updated_at = datetime.datetime.utcnow()
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # Chunk was retried; the first record already covers it
+            self.db.rollback()
+
+    def complete(self, session: UploadSession) -> Video:
+        """Turn a fully received upload into a video record.
+
+        The assembled file is hashed in one read pass and renamed to its
+        content-addressed location; it is never copied. Hashing blocks, so
+        call this from a worker thread.
+        """
+
+        if session.status == "completed":
+            return self.db.query(Video).filter(Video.id == session.video_id).first()
+        if session.status == "expired":
+            raise UploadError("Upload has expired")
+
+        progress = self.get_progress(session)
+        if progress["missing_chunks"]:
+            raise UploadError(f"Upload is missing {len(progress['missing_chunks'])} chunk(s)")
+
+        # Claim the session so concurrent finalize calls don't race the rename
+        claimed = self.db.execute(
+            update(UploadSession)
+            .where(UploadSession.upload_id == session.upload_id, UploadSession.status == "open")
+            .values(status="finalizing")
+        ).rowcount
+        self.db.commit()
+        if not claimed:
+            raise UploadError("Upload is already being finalized")
+
+        file_extension = os.path.splitext(session.original_name)[1]
+        try:
+            sha256 = hash_file(session.part_path)
+            file_path, duplicate = commit_content_addressed(
+                session.part_path, settings.upload_dir, sha256, file_extension
+            )
+
+            stored = StoredFile(path=file_path, size=session.total_size, sha256=sha256, duplicate=duplicate)
+            video = VideoService(self.db).register_stored_file(stored, session.original_name, session.content_type)
+
+            self.db.query(UploadChunk).filter(UploadChunk.upload_id == session.upload_id).delete()
+            session.status = "completed"
+            session.video_id = video.id
+            self.db.commit()
+        except Exception:
+            # Release the claim, or the session keeps its reserved space forever
+            self.db.rollback()
+            self.db.execute(
+                update(UploadSession)
+                .where(UploadSession.upload_id == session.upload_id, UploadSession.status == "finalizing")
+                .values(status="open")
+            )
+            self.db.commit()
+            raise
+
+        return video
+
+    def expire_sessions(self, now: Optional[datetime.datetime] = None) -> int:
+        """Expire uploads idle for longer than the TTL and delete their files.
+
+        Open sessions and ones left ``finalizing`` by a finalize call that
+        died part way both count. Each session is claimed with a
+        conditional update first, so a chunk arriving at the same moment
+        either keeps it alive or is refused. Returns the number of
+        sessions expired.
+        """
+
+        cutoff = (now or datetime.datetime.utcnow()) - datetime.timedelta(seconds=settings.upload_session_ttl)
+        stale = self.db.execute(
+            select(UploadSession.upload_id, UploadSession.part_path)
+            .where(UploadSession.status.in_(STALE_STATUSES), UploadSession.updated_at < cutoff)
+        ).all()
+
+        expired = 0
+        for upload_id, part_path in stale:
+            claimed = self.db.execute(
+                update(UploadSession)
+                .where(
+                    UploadSession.upload_id == upload_id,
+                    UploadSession.status.in_(STALE_STATUSES),
+                    UploadSession.updated_at < cutoff
+                )
+                .values(status="expired")
+            ).rowcount
+            if not claimed:
+                continue
+            self.db.query(UploadChunk).filter(UploadChunk.upload_id == upload_id).delete()
+            self.db.commit()
+            try:
+                os.remove(part_path)
+            except FileNotFoundError:
+                pass
+            expired += 1
+
+        self.db.commit()
+        return expired
+
+    @staticmethod
+    def _chunk_length(session: UploadSession, chunk_index: int) -> int:
+        """Number of bytes in chunk ``chunk_index`` of an upload"""
+        start = chunk_index * session.chunk_size
+        return min(session.chunk_size, session.total_size - start)
@@ -1,13 +1,146 @@
 """
 Video processing service
 """
+import csv
+import cv2
+import datetime
+import io
+import json
 import os
-import uuid
-from typing import List, Optional
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from fastapi import UploadFile
+from sqlalchemy import JSON, Delete, Select, delete, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
-from app.models.video import Video, Detection, Event
+from app.models.video import Video, Detection, DetectionStore, Event, EventSet
+from app.services.detection_store import ColumnarDetectionStore, remove_store
+from app.services.storage import StoredFile, stream_upload_to_disk
+
+
+# Statements and row construction shared by ``VideoService`` and
+# ``AsyncVideoService``; only how they are executed differs
+
+def _stored_video(stored: StoredFile, original_name: str, content_type: Optional[str]) -> Video:
+    return Video(
+        filename=os.path.basename(stored.path),
+        original_name=original_name,
+        file_path=stored.path,
+        file_size=stored.size,
+        content_type=content_type,
+        content_hash=stored.sha256,
+        status="uploaded"
+    )
+
+
+def _video_by_id(video_id: int) -> Select:
+    return select(Video).where(Video.id == video_id)
+
+
+def _video_by_content_hash(content_hash: str, exclude_id: Optional[int]) -> Select:
+    statement = select(Video).where(Video.content_hash == content_hash)
+    
+    if exclude_id is not None:
+        statement = statement.where(Video.id != exclude_id)
+    
+    return statement.order_by(Video.id).limit(1)
+
+
+def _video_page(skip: int, limit: int, status: Optional[str]) -> Select:
+    statement = select(Video)
+    
+    if status:
+        statement = statement.where(Video.status == status)
+    
+    return statement.offset(skip).limit(limit)
+
+
+def _detection_rows(
+    video_id: int,
+    frame_start: Optional[int],
+    frame_end: Optional[int],
+    limit: Optional[int]
+) -> Select:
+    statement = select(Detection).where(Detection.video_id == video_id)
+    
+    if frame_start is not None:
+        statement = statement.where(Detection.frame_number >= frame_start)
+    
+    if frame_end is not None:
+        statement = statement.where(Detection.frame_number <= frame_end)
+    
+    statement = statement.order_by(Detection.frame_number)
+    
+    if limit is not None:
+        statement = statement.limit(limit)
+    
+    return statement
+
+
+def _detection_stores(video_id: int, frame_start: Optional[int], frame_end: Optional[int]) -> Select:
+    """Stores overlapping the inclusive range ``frame_start``-``frame_end``"""
+    statement = select(DetectionStore).where(DetectionStore.video_id == video_id)
+    
+    if frame_start is not None:
+        statement = statement.where(DetectionStore.frame_end >= frame_start)
+    
+    if frame_end is not None:
+        statement = statement.where(DetectionStore.frame_start <= frame_end)
+    
+    return statement.order_by(DetectionStore.frame_start)
+
+
+def _events(video_id: int, event_set: Optional[EventSet], event_type: Optional[str]) -> Select:
+    statement = select(Event).where(Event.video_id == video_id)
+    
+    if event_set is not None:
+        statement = statement.where(Event.event_set_id == event_set.id)
+    
+    if event_type:
+        statement = statement.where(Event.event_type == event_type)
+    
+    return statement.order_by(Event.timestamp)
+
+
+def _event_sets(video_id: int) -> Select:
+    return select(EventSet).where(EventSet.video_id == video_id).order_by(EventSet.version.desc())
+
+
+def _event_set(video_id: int, version: Optional[int]) -> Select:
+    statement = select(EventSet).where(EventSet.video_id == video_id, EventSet.event_count.isnot(None))
+    
+    if version is not None:
+        statement = statement.where(EventSet.version == version)
+    
+    return statement.order_by(EventSet.version.desc()).limit(1)
+
+
+def _delete_detection_rows(video_id: int, frame_start: Optional[int], frame_end: Optional[int]) -> Delete:
+    """Detection rows in ``[frame_start, frame_end)``"""
+    statement = delete(Detection).where(Detection.video_id == video_id)
+    
+    if frame_start is not None:
+        statement = statement.where(Detection.frame_number >= frame_start)
+    
+    if frame_end is not None:
+        statement = statement.where(Detection.frame_number < frame_end)
+    
+    return statement
+
+
+def _stores_from(video_id: int, frame_start: Optional[int], frame_end: Optional[int]) -> Select:
+    """Stores starting in ``[frame_start, frame_end)``, which a re-analysis of that range replaces"""
+    statement = select(DetectionStore).where(DetectionStore.video_id == video_id)
+    
+    if frame_start is not None:
+        statement = statement.where(DetectionStore.frame_start >= frame_start)
+    
+    if frame_end is not None:
+        statement = statement.where(DetectionStore.frame_start < frame_end)
+    
+    return statement
 
 
 class VideoService:
@@ -19,38 +152,91 @@ class VideoService:
     async def save_uploaded_file(self, file: UploadFile) -> Video:
         """Save uploaded video file and create database record"""
         
-        # Ensure upload directory exists
-        os.makedirs(settings.upload_dir, exist_ok=True)
-        
-        # Generate unique filename
+        # Stream file to disk in bounded-size chunks
         file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(settings.upload_dir, unique_filename)
-        
-        # Save file to disk
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        # Create database record
-        video = Video(
-            filename=unique_filename,
-            original_name=file.filename,
-            file_path=file_path,
-            file_size=len(content),
-            content_type=file.content_type,
-            status="uploaded"
+        stored = await stream_upload_to_disk(
+            file,
+            settings.upload_dir,
+            suffix=file_extension,
+            max_size=settings.max_file_size
         )
         
+        return self.register_stored_file(stored, file.filename, file.content_type)
+    
+    def register_stored_file(
+        self,
+        stored: StoredFile,
+        original_name: str,
+        content_type: Optional[str]
+    ) -> Video:
+        """Create the database record for a file already in the content store"""
+        
+        video = _stored_video(stored, original_name, content_type)
+        
         self.db.add(video)
         self.db.commit()
         self.db.refresh(video)
         
         return video
     
+    def find_by_content_hash(self, content_hash: str, exclude_id: Optional[int] = None) -> Optional[Video]:
+        """Get the earliest video with the given content hash"""
+        return self.db.scalars(_video_by_content_hash(content_hash, exclude_id)).first()
+    
     def get_video(self, video_id: int) -> Optional[Video]:
         """Get video by ID"""
-        return self.db.query(Video).filter(Video.id == video_id).first()
+        return self.db.scalars(_video_by_id(video_id)).first()
+    
+    def set_proxy(
+        self,
+        video_id: int,
+        source: Dict[str, Any],
+        proxy_path: Optional[str] = None,
+        proxy: Optional[Dict[str, Any]] = None
+    ) -> Optional[Video]:
+        """Record a video's dimensions and, if one was made, its analysis proxy"""
+        
+        video = self.get_video(video_id)
+        if not video:
+            return None
+        
+        video.width = source["width"]
+        video.height = source["height"]
+        video.fps = source["fps"]
+        if proxy_path and proxy:
+            video.proxy_path = proxy_path
+            video.proxy_width = proxy["width"]
+            video.proxy_height = proxy["height"]
+            video.proxy_fps = proxy["fps"]
+        
+        self.db.commit()
+        self.db.refresh(video)
+        
+        return video
+    
+    @staticmethod
+    def render_thumbnail(video: Video, frame_number: int = 0, width: int = 320) -> Optional[bytes]:
+        """JPEG of one frame (original numbering), decoded from the proxy when there is one"""
+        
+        path = video.file_path
+        if video.proxy_path and os.path.exists(video.proxy_path):
+            path = video.proxy_path
+            if video.fps and video.proxy_fps:
+                frame_number = int(round(frame_number * video.proxy_fps / video.fps))
+        
+        cap = cv2.VideoCapture(path)
+        try:
+            if frame_number:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            ret, frame = cap.read()
+        finally:
+            cap.release()
+        if not ret:
+            return None
+        
+        height = max(1, round(frame.shape[0] * width / frame.shape[1]))
+        ok, encoded = cv2.imencode(".jpg", cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA))
+        return encoded.tobytes() if ok else None
     
     def get_videos(
         self,
@@ -59,13 +245,7 @@ class VideoService:
         status: Optional[str] = None
     ) -> List[Video]:
         """Get list of videos with optional filtering"""
-        
-        query = self.db.query(Video)
-        
-        if status:
-            query = query.filter(Video.status == status)
-        
-        return query.offset(skip).limit(limit).all()
+        return list(self.db.scalars(_video_page(skip, limit, status)))
     
     def update_video_status(self, video_id: int, status: str) -> Optional[Video]:
         """Update video processing status"""
@@ -79,36 +259,162 @@ class VideoService:
         return video
     
     def get_detections(
+        self,
+        video_id: int,
+        frame_start: Optional[int] = None,
+        frame_end: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[Union[Detection, Dict[str, Any]]]:
+        """Get detection results for a video.
+
+        Videos analysed into columnar stores are read by slicing the
+        memory-mapped arrays; only the requested frames are decoded.
+        """
+        
+        stores = self.get_detection_stores(video_id, frame_start, frame_end)
+        if stores:
+            return self._store_detections(video_id, stores, frame_start, frame_end, limit)
+        
+        return list(self.db.scalars(_detection_rows(video_id, frame_start, frame_end, limit)))
+    
+    def iter_detections(self, video_id: int) -> Iterator[Dict[str, Any]]:
+        """Stream all of a video's detections as ``{'frame', 'objects'}`` in frame order"""
+        
+        stores = self.get_detection_stores(video_id)
+        if stores:
+            for det in self._iter_store_frames(stores):
+                yield {'frame': det['frame'], 'objects': det['objects']}
+            return
+        
+        rows = (
+            self.db.query(Detection.frame_number, Detection.objects)
+            .filter(Detection.video_id == video_id)
+            .order_by(Detection.frame_number)
+            .yield_per(settings.detection_page_size)
+        )
+        for row in rows:
+            yield {'frame': row.frame_number, 'objects': row.objects}
+    
+    def iter_detection_arrays(self, video_id: int) -> Iterator[Tuple[Dict[str, Any], List[str]]]:
+        """Yield ``(arrays, class_names)`` for each of a video's columnar stores, in frame order"""
+        
+        for store in self.get_detection_stores(video_id):
+            reader = ColumnarDetectionStore(store.path)
+            yield reader.arrays(), reader.class_names
+    
+    def get_analysed_video_ids(self, after_id: int = 0, limit: int = 1000) -> List[int]:
+        """Ids of videos with stored detections, ascending, after ``after_id``"""
+        
+        row_ids = select(Detection.video_id).where(Detection.video_id > after_id).distinct()
+        store_ids = select(DetectionStore.video_id).where(DetectionStore.video_id > after_id).distinct()
+        video_ids = row_ids.union(store_ids).subquery()
+        rows = self.db.execute(
+            select(video_ids.c.video_id).order_by(video_ids.c.video_id).limit(limit)
+        ).all()
+        return [row.video_id for row in rows]
+    
+    def get_video_fps(self, video_id: int) -> float:
+        """Frame rate of a video's stored detections"""
+        
+        video = self.get_video(video_id)
+        if video and video.fps:
+            return video.fps
+        
+        stores = self.get_detection_stores(video_id)
+        if stores:
+            return ColumnarDetectionStore(stores[0].path).fps
+        
+        sample = (
+            self.db.query(Detection.frame_number, Detection.timestamp)
+            .filter(Detection.video_id == video_id, Detection.frame_number > 0, Detection.timestamp > 0)
+            .first()
+        )
+        return sample.frame_number / sample.timestamp if sample else 25.0
+    
+    def get_detection_stores(
         self,
         video_id: int,
         frame_start: Optional[int] = None,
         frame_end: Optional[int] = None
-    ) -> List[Detection]:
-        """Get detection results for a video"""
+    ) -> List[DetectionStore]:
+        """Get the columnar stores of a video that overlap a frame range"""
+        return list(self.db.scalars(_detection_stores(video_id, frame_start, frame_end)))
+    
+    def register_detection_store(self, video_id: int, path: str, meta: Dict[str, Any]) -> Optional[DetectionStore]:
+        """Record a finished columnar store in the index"""
         
-        query = self.db.query(Detection).filter(Detection.video_id == video_id)
+        if not meta["frame_count"]:
+            remove_store(path)
+            return None
         
-        if frame_start is not None:
-            query = query.filter(Detection.frame_number >= frame_start)
+        store = DetectionStore(
+            video_id=video_id,
+            frame_start=meta["first_frame"],
+            frame_end=meta["last_frame"],
+            frame_count=meta["frame_count"],
+            object_count=meta["object_count"],
+            path=path,
+            size_bytes=sum(entry.stat().st_size for entry in os.scandir(path))
+        )
         
-        if frame_end is not None:
-            query = query.filter(Detection.frame_number <= frame_end)
+        self.db.add(store)
+        self.db.commit()
+        self.db.refresh(store)
         
-        return query.order_by(Detection.frame_number).all()
+        return store
+    
+    @classmethod
+    def _store_detections(
+        cls,
+        video_id: int,
+        stores: List[DetectionStore],
+        frame_start: Optional[int],
+        frame_end: Optional[int],
+        limit: Optional[int]
+    ) -> List[Dict[str, Any]]:
+        """``get_detections`` rows read from columnar stores"""
+        detections = []
+        for det in cls._iter_store_frames(stores, frame_start, frame_end):
+            if limit is not None and len(detections) >= limit:
+                break
+            detections.append({
+                "video_id": video_id,
+                "frame_number": det['frame'],
+                "objects": det['objects'],
+                "timestamp": det['timestamp']
+            })
+        return detections
+    
+    @staticmethod
+    def _iter_store_frames(
+        stores: List[DetectionStore],
+        frame_start: Optional[int] = None,
+        frame_end: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        for store in stores:
+            reader = ColumnarDetectionStore(store.path)
+            for det in reader.iter_frames(frame_start, frame_end):
+                det['timestamp'] = det['frame'] / reader.fps if reader.fps else None
+                yield det
     
     def get_events(
         self,
         video_id: int,
-        event_type: Optional[str] = None
+        event_type: Optional[str] = None,
+        version: Optional[int] = None
     ) -> List[Event]:
-        """Get detected events for a video"""
-        
-        query = self.db.query(Event).filter(Event.video_id == video_id)
+        """Get detected events for a video.
+
+        Returns the latest complete event set unless ``version`` picks an
+        older one; videos analysed before event sets existed return all
+        their events.
+        """
         
-        if event_type:
-            query = query.filter(Event.event_type == event_type)
+        event_set = self.get_event_set(video_id, version)
+        if event_set is None and version is not None:
+            return []
         
-        return query.order_by(Event.timestamp).all()
+        return list(self.db.scalars(_events(video_id, event_set, event_type)))
     
     def add_detection(self, video_id: int, frame_number: int, objects: dict, timestamp: float) -> Detection:
         """Add detection result to database"""
@@ -150,4 +456,357 @@ class VideoService:
         self.db.commit()
         self.db.refresh(event)
         
-        return event
\ No newline at end of file
+        return event
+    
+    def add_detections_bulk(
+        self,
+        video_id: int,
+        detections: Iterable[Dict[str, Any]],
+        batch_size: Optional[int] = None
+    ) -> int:
+        """Insert many detections in batches and commit once.
+
+        Each item holds ``frame_number``, ``objects`` and ``timestamp``.
+        Returns the number of rows written.
+        """
+        
+        rows = (
+            {
+                "video_id": video_id,
+                "frame_number": detection["frame_number"],
+                "objects": detection.get("objects"),
+                "timestamp": detection.get("timestamp")
+            }
+            for detection in detections
+        )
+        return self._bulk_insert(Detection, rows, batch_size)
+    
+    def get_event_sets(self, video_id: int) -> List[EventSet]:
+        """Get all event set versions of a video, newest first"""
+        return list(self.db.scalars(_event_sets(video_id)))
+    
+    def get_event_set(self, video_id: int, version: Optional[int] = None) -> Optional[EventSet]:
+        """Get one complete event set, the latest when ``version`` is not given"""
+        return self.db.scalars(_event_set(video_id, version)).first()
+    
+    def create_event_set(
+        self,
+        video_id: int,
+        source: str,
+        detector_params: Optional[Dict[str, Any]] = None
+    ) -> EventSet:
+        """Open the next event set version; it is hidden until ``complete_event_set``"""
+        
+        latest = (
+            self.db.query(EventSet.version)
+            .filter(EventSet.video_id == video_id)
+            .order_by(EventSet.version.desc())
+            .first()
+        )
+        event_set = EventSet(
+            video_id=video_id,
+            version=latest.version + 1 if latest else 1,
+            source=source,
+            detector_params=detector_params or {}
+        )
+        
+        self.db.add(event_set)
+        self.db.commit()
+        self.db.refresh(event_set)
+        
+        return event_set
+    
+    def complete_event_set(self, event_set: EventSet, event_count: int) -> EventSet:
+        """Publish an event set once all of its events are written"""
+        
+        event_set.event_count = event_count
+        self.db.commit()
+        self.db.refresh(event_set)
+        
+        return event_set
+    
+    def add_events_bulk(
+        self,
+        video_id: int,
+        events: Iterable[Dict[str, Any]],
+        batch_size: Optional[int] = None,
+        event_set_id: Optional[int] = None
+    ) -> int:
+        """Insert many events in batches and commit once.
+
+        Each item holds ``event_type``, ``frame_number``, ``timestamp``,
+        ``confidence`` and ``details``. Returns the number of rows written.
+        """
+        
+        rows = (
+            {
+                "video_id": video_id,
+                "event_set_id": event_set_id,
+                "event_type": event["event_type"],
+                "frame_number": event["frame_number"],
+                "timestamp": event.get("timestamp"),
+                "confidence": event.get("confidence"),
+                "details": event.get("details")
+            }
+            for event in events
+        )
+        return self._bulk_insert(Event, rows, batch_size)
+    
+    def delete_detections(
+        self,
+        video_id: int,
+        frame_start: Optional[int] = None,
+        frame_end: Optional[int] = None
+    ) -> None:
+        """Remove a video's detections, optionally only in ``[frame_start, frame_end)``"""
+        
+        self.db.execute(_delete_detection_rows(video_id, frame_start, frame_end))
+        for store in self.db.scalars(_stores_from(video_id, frame_start, frame_end)).all():
+            self.db.delete(store)
+            # Stores may be shared with duplicate videos via copy_results
+            shared = self.db.query(DetectionStore).filter(
+                DetectionStore.path == store.path, DetectionStore.id != store.id
+            ).first()
+            if not shared:
+                remove_store(store.path)
+        self.db.commit()
+    
+    def delete_events(self, video_id: int) -> None:
+        """Remove all detected events and event sets of a video"""
+        
+        self.db.execute(delete(Event).where(Event.video_id == video_id))
+        self.db.execute(delete(EventSet).where(EventSet.video_id == video_id))
+        self.db.commit()
+    
+    def _bulk_insert(self, model, rows: Iterable[Dict[str, Any]], batch_size: Optional[int]) -> int:
+        """Write rows with COPY on PostgreSQL and executemany elsewhere"""
+        
+        batch_size = batch_size or settings.db_bulk_batch_size
+        use_copy = self.db.get_bind().dialect.name == "postgresql"
+        rows = iter(rows)
+        written = 0
+        
+        try:
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                if use_copy:
+                    self._copy_rows(model, batch)
+                else:
+                    self.db.execute(insert(model), batch)
+                written += len(batch)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        
+        return written
+    
+    def _copy_rows(self, model, batch: List[Dict[str, Any]]) -> None:
+        """Stream one batch into PostgreSQL with ``COPY ... FROM STDIN``"""
+        
+        columns = list(batch[0].keys()) + ["created_at"]
+        json_columns = {
+            column.name for column in model.__table__.columns
+            if isinstance(column.type, JSON)
+        }
+        created_at = datetime.datetime.utcnow().isoformat()
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in batch:
+            writer.writerow([
+                json.dumps(row[column]) if column in json_columns and row[column] is not None
+                else row[column]
+                for column in columns[:-1]
+            ] + [created_at])
+        buffer.seek(0)
+        
+        # The session's own connection, so COPY commits with the session
+        dbapi_connection = self.db.connection().connection
+        with dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {model.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+    
+    def copy_results(self, source_video_id: int, target_video_id: int) -> None:
+        """Link another video's detections and events to this one.
+
+        The target's own detections, stores, events and event sets are
+        removed first, so its results are exactly the source's. Rows are
+        copied server-side with ``INSERT ... SELECT`` so nothing passes
+        through Python, however long the match is.
+        """
+        
+        if source_video_id == target_video_id:
+            return
+        
+        self.delete_detections(target_video_id)
+        self.delete_events(target_video_id)
+        
+        self.db.execute(
+            insert(Detection).from_select(
+                ["video_id", "frame_number", "objects", "timestamp"],
+                select(
+                    literal(target_video_id), Detection.frame_number, Detection.objects, Detection.timestamp
+                ).where(Detection.video_id == source_video_id)
+            )
+        )
+        event_columns = ["video_id", "event_set_id", "event_type", "frame_number", "timestamp", "confidence", "details"]
+        self.db.execute(
+            insert(Event).from_select(
+                event_columns,
+                select(
+                    literal(target_video_id), Event.event_set_id, Event.event_type, Event.frame_number,
+                    Event.timestamp, Event.confidence, Event.details
+                ).where(Event.video_id == source_video_id, Event.event_set_id.is_(None))
+            )
+        )
+        # Each event set gets its own copy so the target can be re-scored independently
+        for event_set in self.get_event_sets(source_video_id):
+            copied = EventSet(
+                video_id=target_video_id,
+                version=event_set.version,
+                source=event_set.source,
+                detector_params=event_set.detector_params,
+                event_count=event_set.event_count
+            )
+            self.db.add(copied)
+            self.db.flush()
+            self.db.execute(
+                insert(Event).from_select(
+                    event_columns,
+                    select(
+                        literal(target_video_id), literal(copied.id), Event.event_type, Event.frame_number,
+                        Event.timestamp, Event.confidence, Event.details
+                    ).where(Event.event_set_id == event_set.id)
+                )
+            )
+        # Columnar stores are immutable, so the copies point at the same files
+        self.db.execute(
+            insert(DetectionStore).from_select(
+                ["video_id", "frame_start", "frame_end", "frame_count", "object_count", "path", "size_bytes"],
+                select(
+                    literal(target_video_id), DetectionStore.frame_start, DetectionStore.frame_end,
+                    DetectionStore.frame_count, DetectionStore.object_count, DetectionStore.path,
+                    DetectionStore.size_bytes
+                ).where(DetectionStore.video_id == source_video_id)
+            )
+        )
+        self.db.commit()
+
+
+class AsyncVideoService:
+    """The read side of ``VideoService`` for async endpoints.
+
+    Queries are awaited on an ``AsyncSession``. Decoding thumbnails and
+    reading columnar stores are file work, so they run in the thread pool;
+    neither blocks the event loop.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def save_uploaded_file(self, file: UploadFile) -> Video:
+        """Save uploaded video file and create database record"""
+        
+        file_extension = os.path.splitext(file.filename)[1]
+        stored = await stream_upload_to_disk(
+            file,
+            settings.upload_dir,
+            suffix=file_extension,
+            max_size=settings.max_file_size
+        )
+        
+        return await self.register_stored_file(stored, file.filename, file.content_type)
+    
+    async def register_stored_file(
+        self,
+        stored: StoredFile,
+        original_name: str,
+        content_type: Optional[str]
+    ) -> Video:
+        """Create the database record for a file already in the content store"""
+        
+        video = _stored_video(stored, original_name, content_type)
+        
+        self.db.add(video)
+        await self.db.commit()
+        await self.db.refresh(video)
+        
+        return video
+    
+    async def find_by_content_hash(self, content_hash: str, exclude_id: Optional[int] = None) -> Optional[Video]:
+        """Get the earliest video with the given content hash"""
+        return (await self.db.scalars(_video_by_content_hash(content_hash, exclude_id))).first()
+    
+    async def get_video(self, video_id: int) -> Optional[Video]:
+        """Get video by ID"""
+        return (await self.db.scalars(_video_by_id(video_id))).first()
+    
+    async def get_videos(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[str] = None
+    ) -> List[Video]:
+        """Get list of videos with optional filtering"""
+        return list(await self.db.scalars(_video_page(skip, limit, status)))
+    
+    async def render_thumbnail(self, video: Video, frame_number: int = 0, width: int = 320) -> Optional[bytes]:
+        """JPEG of one frame, decoded in a worker thread"""
+        return await run_in_threadpool(VideoService.render_thumbnail, video, frame_number, width)
+    
+    async def get_detection_stores(
+        self,
+        video_id: int,
+        frame_start: Optional[int] = None,
+        frame_end: Optional[int] = None
+    ) -> List[DetectionStore]:
+        """Get the columnar stores of a video that overlap a frame range"""
+        return list(await self.db.scalars(_detection_stores(video_id, frame_start, frame_end)))
+    
+    async def get_detections(
+        self,
+        video_id: int,
+        frame_start: Optional[int] = None,
+        frame_end: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[Union[Detection, Dict[str, Any]]]:
+        """Get detection results for a video (see ``VideoService.get_detections``)"""
+        
+        stores = await self.get_detection_stores(video_id, frame_start, frame_end)
+        if stores:
+            return await run_in_threadpool(
+                VideoService._store_detections, video_id, stores, frame_start, frame_end, limit
+            )
+        
+        return list(await self.db.scalars(_detection_rows(video_id, frame_start, frame_end, limit)))
+    
+    async def get_events(
+        self,
+        video_id: int,
+        event_type: Optional[str] = None,
+        version: Optional[int] = None
+    ) -> List[Event]:
+        """Get detected events for a video (see ``VideoService.get_events``)"""
+        
+        event_set = await self.get_event_set(video_id, version)
+        if event_set is None and version is not None:
+            return []
+        
+        return list(await self.db.scalars(_events(video_id, event_set, event_type)))
+    
+    async def get_event_sets(self, video_id: int) -> List[EventSet]:
+        """Get all event set versions of a video, newest first"""
+        return list(await self.db.scalars(_event_sets(video_id)))
+    
+    async def get_event_set(self, video_id: int, version: Optional[int] = None) -> Optional[EventSet]:
+        """Get one complete event set, the latest when ``version`` is not given"""
+        return (await self.db.scalars(_event_set(video_id, version))).first()
+    
+    async def copy_results(self, source_video_id: int, target_video_id: int) -> None:
+        """``VideoService.copy_results`` on this session; the statements run server-side"""
+        await self.db.run_sync(lambda session: VideoService(session).copy_results(source_video_id, target_video_id))
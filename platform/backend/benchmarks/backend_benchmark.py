@@ -0,0 +1,122 @@
+"""
+Throughput and accuracy of the inference backends.
+
+Runs the same clips through each backend and reports load and warm-up
+time, frames per second and box agreement with the first (reference)
+backend: recall at IoU 0.5 and mean IoU of matched boxes, plus how many
+boxes kept their class.
+
+Usage (from platform/backend):
+
+    python -m benchmarks.backend_benchmark --backends ultralytics,onnx,onnx-int8
+    python -m benchmarks.backend_benchmark --video ../../dummy_video.mp4 --model yolov8n.pt
+    python -m benchmarks.backend_benchmark --backends fake --synthetic-only
+
+Clips are the bundled ``dummy_video.mp4`` (when it decodes) and a
+synthetic clip of moving boxes. Backends that cannot load here (missing
+package or model file) are reported and skipped.
+"""
+import argparse
+import os
+import time
+from typing import Any, Dict, List
+import cv2
+import numpy as np
+from benchmarks.tracking_benchmark import agreement, synthetic_frames
+from cv_models.backends import create_backend
+from cv_models.tracking import iou_matrix
+
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+
+def read_frames(path: str, count: int) -> List[np.ndarray]:
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while cap.isOpened() and len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run(backend, frames: List[np.ndarray], batch_size: int) -> Dict[str, Any]:
+    records = []
+    started = time.perf_counter()
+    for offset in range(0, len(frames), batch_size):
+        batch = frames[offset:offset + batch_size]
+        records.extend(
+            {'frame': offset + i, 'objects': objects} for i, objects in enumerate(backend.infer_batch(batch))
+        )
+    elapsed = time.perf_counter() - started
+    return {"records": records, "fps": len(frames) / elapsed if elapsed > 0 else 0.0}
+
+
+def class_agreement(baseline: List[Dict[str, Any]], candidate: List[Dict[str, Any]]) -> float:
+    """Share of reference boxes whose best IoU match has the same class"""
+    same, total = 0, 0
+    for expected, actual in zip(baseline, candidate):
+        if not expected['objects'] or not actual['objects']:
+            total += len(expected['objects'])
+            continue
+        iou = iou_matrix(
+            np.array([obj['bbox'] for obj in expected['objects']], dtype=np.float64),
+            np.array([obj['bbox'] for obj in actual['objects']], dtype=np.float64)
+        )
+        best = iou.argmax(axis=1)
+        for obj, match, score in zip(expected['objects'], best, iou.max(axis=1)):
+            total += 1
+            same += int(score >= 0.5 and actual['objects'][match]['class'] == obj['class'])
+    return same / total if total else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backends", default="ultralytics,onnx,onnx-int8", help="First one is the reference")
+    parser.add_argument("--model", default="yolov8n.pt")
+    parser.add_argument("--video", action="append", help="Clip to run; repeatable")
+    parser.add_argument("--synthetic-only", action="store_true")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    clips = {"synthetic": list(synthetic_frames(args.frames))}
+    if not args.synthetic_only:
+        for path in args.video or [os.path.join(_REPO_ROOT, "dummy_video.mp4")]:
+            frames = read_frames(path, args.frames)
+            if frames:
+                clips[os.path.basename(path)] = frames
+            else:
+                print(f"Skipping {path}: no decodable frames")
+
+    backends = {}
+    for name in args.backends.split(","):
+        started = time.perf_counter()
+        try:
+            backend = create_backend(args.model if name != "fake" else "fake", name)
+            loaded = time.perf_counter()
+            backend.warmup()
+        except (ImportError, OSError, ValueError) as e:
+            print(f"Skipping backend {name}: {e}")
+            continue
+        backends[name] = backend
+        print(f"{name}: load {loaded - started:.2f}s, warm-up {time.perf_counter() - loaded:.2f}s")
+
+    print(f"{'clip':<20}{'backend':<14}{'fps':>9}{'speedup':>9}{'recall':>8}{'iou':>7}{'class':>7}")
+    for clip, frames in clips.items():
+        reference = None
+        for name, backend in backends.items():
+            result = run(backend, frames, args.batch_size)
+            if reference is None:
+                reference = result
+            boxes = agreement(reference["records"], result["records"])
+            classes = class_agreement(reference["records"], result["records"])
+            print(
+                f"{clip:<20}{name:<14}{result['fps']:>9.1f}{result['fps'] / reference['fps']:>8.2f}x"
+                f"{boxes['recall_iou50']:>8.3f}{boxes['mean_iou']:>7.3f}{classes:>7.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Latency and throughput of micro-batched vs one-call-per-request inference.
+
+Concurrent clients each send single frames. In ``per-request`` mode every
+request calls the model on its own (serialised by a lock, as handlers
+sharing one model would be); in ``micro-batch`` mode the requests go
+through ``MicroBatchInferenceServer``. Reports requests per second and
+p50/p99 latency as seen by the clients.
+
+Usage (from platform/backend):
+
+    python -m benchmarks.inference_server_benchmark --clients 16
+    python -m benchmarks.inference_server_benchmark --backend onnx --model yolov8n.pt
+
+Without ``--backend`` a simulated model is used: ``--call-ms`` fixed cost
+per inference call plus ``--frame-ms`` per frame, the shape of a real
+model's cost on CPU or GPU.
+"""
+import argparse
+import threading
+import time
+from typing import Any, Dict, List
+import numpy as np
+from benchmarks.tracking_benchmark import synthetic_frames
+from cv_models.backends import FakeBackend, create_backend
+from cv_models.inference_server import MicroBatchInferenceServer
+
+
+class SimulatedBackend(FakeBackend):
+    def __init__(self, call_ms: float, frame_ms: float):
+        super().__init__()
+        self.call_ms = call_ms
+        self.frame_ms = frame_ms
+
+    def infer_batch(self, frames):
+        time.sleep((self.call_ms + self.frame_ms * len(frames)) / 1000.0)
+        return super().infer_batch(frames)
+
+
+def run_clients(send, frames: List[np.ndarray], clients: int, requests: int) -> Dict[str, Any]:
+    latencies = []
+    lock = threading.Lock()
+
+    def client(offset):
+        for i in range(requests):
+            frame = frames[(offset + i) % len(frames)]
+            started = time.perf_counter()
+            send(frame)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed * 1000.0)
+
+    threads = [threading.Thread(target=client, args=(n * requests,)) for n in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backend")
+    parser.add_argument("--model", default="yolov8n.pt")
+    parser.add_argument("--call-ms", type=float, default=20.0)
+    parser.add_argument("--frame-ms", type=float, default=3.0)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client")
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    if args.backend:
+        backend = create_backend(args.model, args.backend)
+    else:
+        backend = SimulatedBackend(args.call_ms, args.frame_ms).load()
+    backend.warmup()
+    frames = list(synthetic_frames(32))
+
+    model_lock = threading.Lock()
+
+    def per_request(frame):
+        with model_lock:
+            return backend.infer_batch([frame])[0]
+
+    server = MicroBatchInferenceServer(
+        lambda: backend, max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000.0,
+        queue_size=args.clients * 2
+    )
+    server.start()
+    try:
+        results = {
+            "per-request": run_clients(per_request, frames, args.clients, args.requests),
+            "micro-batch": run_clients(lambda frame: server.submit(frame).result(), frames, args.clients, args.requests)
+        }
+        mean_batch = server.stats()["mean_batch_size"]
+    finally:
+        server.stop()
+
+    print(f"{'mode':<14}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    for mode, result in results.items():
+        print(f"{mode:<14}{result['rps']:>9.1f}{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}")
+    print(f"mean micro-batch size: {mean_batch:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Throughput vs accuracy of detect-every-N-frames tracking.
+
+Runs the same clip through full per-frame detection and through
+``StridedDetector`` at several strides, then reports frames per second,
+detector calls, box agreement with the per-frame baseline (recall at IoU
+0.5 and mean IoU of matched boxes) and how many events still match.
+
+Usage (from platform/backend):
+
+    python -m benchmarks.tracking_benchmark --video match.mp4 --model yolov8n.pt
+    python -m benchmarks.tracking_benchmark --synthetic --model-ms 25
+
+``--synthetic`` renders moving boxes and "detects" them with contours,
+adding ``--model-ms`` of sleep per detector call frame to stand in for
+model latency when no model is available.
+"""
+import argparse
+import time
+from typing import Any, Callable, Dict, List
+import cv2
+import numpy as np
+from cv_models.events import EventDetector
+from cv_models.tracking import StridedDetector, iou_matrix
+
+
+def synthetic_frames(count: int, width: int = 640, height: int = 360, objects: int = 12, seed: int = 0):
+    """Frames with smoothly moving, slightly jittering rectangles"""
+    rng = np.random.default_rng(seed)
+    position = rng.uniform([0, 0], [width - 40, height - 40], size=(objects, 2))
+    velocity = rng.uniform(-3, 3, size=(objects, 2))
+    sizes = rng.integers(12, 40, size=objects)
+    sizes[0] = 8  # the ball
+    for _ in range(count):
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        velocity += rng.normal(0, 0.2, size=velocity.shape)
+        position = np.clip(position + velocity, 0, [width - 40, height - 40])
+        for i, (x, y) in enumerate(position.astype(int)):
+            color = (255, 255, 255) if i == 0 else (0, 200, 0)
+            cv2.rectangle(frame, (x, y), (x + int(sizes[i]), y + int(sizes[i])), color, -1)
+        yield frame
+
+
+def contour_detector(model_ms: float) -> Callable[[List[np.ndarray]], List[List[Dict[str, Any]]]]:
+    def detect(frames):
+        time.sleep(model_ms / 1000.0 * len(frames))
+        results = []
+        for frame in frames:
+            height, width = frame.shape[:2]
+            objects = []
+            for cls, channel in (('ball', 0), ('player', 1)):
+                mask = (frame[..., channel] > 100) & ((frame[..., 0] > 100) == (cls == 'ball'))
+                contours, _ = cv2.findContours(mask.astype(np.uint8), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+                for contour in contours:
+                    x, y, w, h = cv2.boundingRect(contour)
+                    objects.append({
+                        'class': cls,
+                        'conf': 0.9,
+                        'bbox': [x / width, y / height, (x + w) / width, (y + h) / height]
+                    })
+            results.append(objects)
+        return results
+    return detect
+
+
+def yolo_detector(model_name: str) -> Callable[[List[np.ndarray]], List[List[Dict[str, Any]]]]:
+    from cv_models.backends import create_backend
+    return create_backend(model_name).infer_batch
+
+
+def run(frames: List[np.ndarray], detect, stride: int, adaptive: bool, batch_size: int) -> Dict[str, Any]:
+    strided = StridedDetector(detect, stride=stride, adaptive=adaptive)
+    records = []
+    started = time.perf_counter()
+    for offset in range(0, len(frames), batch_size):
+        batch = list(enumerate(frames[offset:offset + batch_size], start=offset))
+        records.extend(strided(batch))
+    elapsed = time.perf_counter() - started
+    return {"records": records, "fps": len(frames) / elapsed, **strided.stats()}
+
+
+def agreement(baseline: List[Dict[str, Any]], candidate: List[Dict[str, Any]]) -> Dict[str, float]:
+    matched, total, ious = 0, 0, []
+    for expected, actual in zip(baseline, candidate):
+        expected_boxes = np.array([obj['bbox'] for obj in expected['objects']], dtype=np.float64).reshape(-1, 4)
+        actual_boxes = np.array([obj['bbox'] for obj in actual['objects']], dtype=np.float64).reshape(-1, 4)
+        total += len(expected_boxes)
+        if len(expected_boxes) and len(actual_boxes):
+            best = iou_matrix(expected_boxes, actual_boxes).max(axis=1)
+            matched += int((best >= 0.5).sum())
+            ious.extend(best.tolist())
+    return {"recall_iou50": matched / total if total else 1.0, "mean_iou": float(np.mean(ious)) if ious else 0.0}
+
+
+def event_agreement(baseline: List[Dict[str, Any]], candidate: List[Dict[str, Any]]) -> Dict[str, int]:
+    expected = {(e['type'], e['frame']) for e in EventDetector().detect_events(baseline)}
+    actual = {(e['type'], e['frame']) for e in EventDetector().detect_events(candidate)}
+    return {"events": len(expected), "events_matched": len(expected & actual)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--video")
+    parser.add_argument("--model", default="yolov8n.pt")
+    parser.add_argument("--synthetic", action="store_true")
+    parser.add_argument("--model-ms", type=float, default=25.0)
+    parser.add_argument("--frames", type=int, default=750)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--strides", default="1,3,5,10")
+    args = parser.parse_args()
+
+    if args.synthetic or not args.video:
+        frames = list(synthetic_frames(args.frames))
+        detect = contour_detector(args.model_ms)
+    else:
+        cap = cv2.VideoCapture(args.video)
+        frames = []
+        while len(frames) < args.frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        detect = yolo_detector(args.model)
+
+    baseline = run(frames, detect, 1, False, args.batch_size)
+    print(f"{'mode':<14}{'fps':>9}{'speedup':>9}{'calls':>7}{'detected':>10}{'recall':>8}{'iou':>7}{'events':>9}")
+    modes = [(int(n), False) for n in args.strides.split(",")] + [(int(args.strides.split(",")[-1]), True)]
+    for stride, adaptive in modes:
+        result = baseline if stride == 1 and not adaptive else run(frames, detect, stride, adaptive, args.batch_size)
+        boxes = agreement(baseline["records"], result["records"])
+        events = event_agreement(baseline["records"], result["records"])
+        name = f"every {stride}" + (" adapt" if adaptive else "")
+        print(
+            f"{name:<14}{result['fps']:>9.1f}{result['fps'] / baseline['fps']:>8.2f}x{result['detector_calls']:>7}"
+            f"{result['detected_ratio']:>10.2f}{boxes['recall_iou50']:>8.3f}{boxes['mean_iou']:>7.3f}"
+            f"{events['events_matched']:>5}/{events['events']:<3}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Pluggable inference backends for object detection.
+
+Every backend follows the same life cycle: ``load()`` the model,
+``warmup()`` with a blank frame so graph building and buffer allocation
+happen before real work, then ``infer_batch(frames)`` returning one list
+of ``{'class', 'conf', 'bbox'}`` dicts per frame, boxes in xyxy pixels of
+the input frame.
+
+- ``ultralytics``: PyTorch eager execution through ``ultralytics.YOLO``
+- ``onnx``: ONNX Runtime on CPU, using an exported ``<model>.onnx``
+- ``onnx-int8``: the same graph with int8-quantised weights
+- ``fake``: deterministic contour detector for tests and benchmarks
+
+The ONNX files live in ``settings.onnx_model_dir`` and are created on
+first load when missing (export needs ultralytics, quantisation needs
+the ``onnx`` package).
+
+A model version selects its weights: ``<model_weights_dir>/<version>/<name>``
+when that file exists, otherwise the name itself (a path, or a model
+ultralytics downloads). Exported graphs are kept per version as well.
+"""
+import ast
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+from app.core.config import settings
+
+
+class InferenceBackend:
+    """Interface shared by all detection backends"""
+
+    name = ""
+
+    def __init__(self, model_name: str, version: Optional[str] = None):
+        self.model_name = model_name
+        self.version = version
+        self.weights = resolve_weights(model_name, version)
+        self.names: Dict[int, str] = {}
+
+    def load(self) -> "InferenceBackend":
+        raise NotImplementedError
+
+    def warmup(self, shape: Tuple[int, int, int] = (640, 640, 3)) -> None:
+        self.infer_batch([np.zeros(shape, dtype=np.uint8)])
+
+    def infer_batch(self, frames: List[np.ndarray]) -> List[List[Dict[str, Any]]]:
+        raise NotImplementedError
+
+
+def resolve_weights(model_name: str, version: Optional[str] = None) -> str:
+    """Weights file for ``version`` of a model, or the model name when there is no versioned copy"""
+    if version:
+        versioned = os.path.join(settings.model_weights_dir, version, os.path.basename(model_name))
+        if os.path.exists(versioned):
+            return versioned
+    return model_name
+
+
+def _boxes_to_objects(pred, names) -> list:
+    """Convert one YOLO ``Results`` object into serialisable object dicts"""
+    objects = []
+    for box in pred.boxes:
+        cls = int(box.cls[0]) if hasattr(box, 'cls') else None
+        conf = float(box.conf[0]) if hasattr(box, 'conf') else None
+        xyxy = box.xyxy[0].tolist() if hasattr(box, 'xyxy') else None
+        objects.append({
+            'class': names[cls] if cls is not None and names is not None else str(cls),
+            'conf': conf,
+            'bbox': xyxy
+        })
+    return objects
+
+
+class UltralyticsBackend(InferenceBackend):
+    """PyTorch model run through ultralytics (the original path)"""
+
+    name = "ultralytics"
+
+    def load(self):
+        from ultralytics import YOLO
+        self.model = YOLO(self.weights)
+        self.names = self.model.names
+        return self
+
+    def infer_batch(self, frames):
+        # One inference call per batch; Results come back in input order
+        preds = self.model(frames, verbose=False)
+        return [_boxes_to_objects(pred, self.names) for pred in preds]
+
+
+def onnx_model_path(model_name: str, int8: bool = False, version: Optional[str] = None) -> str:
+    """Where the exported (or quantised) ONNX graph for ``model_name`` lives"""
+    stem = os.path.splitext(os.path.basename(model_name))[0]
+    directory = os.path.join(settings.onnx_model_dir, version) if version else settings.onnx_model_dir
+    return os.path.join(directory, f"{stem}.int8.onnx" if int8 else f"{stem}.onnx")
+
+
+def export_onnx(model_name: str, target: str, imgsz: int = 640) -> str:
+    """Export an ultralytics model to ONNX with a dynamic batch dimension"""
+    from ultralytics import YOLO
+    exported = YOLO(model_name).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    os.replace(exported, target)
+    return target
+
+
+def quantize_int8(source: str, target: str, calibration_frames: Optional[List[np.ndarray]] = None, imgsz: int = 640) -> str:
+    """Write an int8 copy of an ONNX graph.
+
+    With calibration frames the weights and activations are quantised
+    statically (QDQ, per channel), which is what makes convolutions run in
+    int8 on CPU; without them only the weights are quantised dynamically.
+    """
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static
+
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    if not calibration_frames:
+        quantize_dynamic(source, target, weight_type=QuantType.QUInt8)
+        return target
+
+    import onnxruntime as ort
+    input_name = ort.InferenceSession(source, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    class _Frames(CalibrationDataReader):
+        def __init__(self):
+            self._frames = iter(calibration_frames)
+
+        def get_next(self):
+            frame = next(self._frames, None)
+            if frame is None:
+                return None
+            return {input_name: letterbox(frame, imgsz)[0][None]}
+
+    quantize_static(
+        source, target, _Frames(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8
+    )
+    return target
+
+
+def letterbox(frame: np.ndarray, size: int) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """Resize keeping the aspect ratio and pad to ``size``; returns CHW float RGB"""
+    height, width = frame.shape[:2]
+    ratio = min(size / height, size / width)
+    resized_w, resized_h = int(round(width * ratio)), int(round(height * ratio))
+    pad_x, pad_y = (size - resized_w) / 2, (size - resized_h) / 2
+    resized = cv2.resize(frame, (resized_w, resized_h), interpolation=cv2.INTER_LINEAR)
+    top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+    padded = cv2.copyMakeBorder(
+        resized, top, size - resized_h - top, left, size - resized_w - left,
+        cv2.BORDER_CONSTANT, value=(114, 114, 114)
+    )
+    blob = cv2.cvtColor(padded, cv2.COLOR_BGR2RGB).transpose(2, 0, 1).astype(np.float32) / 255.0
+    return blob, ratio, (left, top)
+
+
+class OnnxBackend(InferenceBackend):
+    """YOLOv8 ONNX graph on ONNX Runtime's CPU execution provider"""
+
+    name = "onnx"
+    int8 = False
+
+    def __init__(
+        self,
+        model_name: str,
+        model_path: Optional[str] = None,
+        imgsz: int = 640,
+        conf_threshold: float = 0.25,
+        iou_threshold: float = 0.7,
+        version: Optional[str] = None
+    ):
+        super().__init__(model_name, version)
+        self.model_path = model_path or onnx_model_path(model_name, self.int8, version)
+        self.imgsz = imgsz
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+
+    def _ensure_model(self) -> None:
+        if not os.path.exists(self.model_path):
+            export_onnx(self.weights, self.model_path, self.imgsz)
+
+    def load(self):
+        import onnxruntime as ort
+        self._ensure_model()
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if settings.onnx_threads:
+            options.intra_op_num_threads = settings.onnx_threads
+        self.session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Graphs exported without a dynamic batch take one frame per run
+        self.fixed_batch = isinstance(model_input.shape[0], int)
+        names = self.session.get_modelmeta().custom_metadata_map.get("names")
+        self.names = ast.literal_eval(names) if names else {}
+        return self
+
+    def infer_batch(self, frames):
+        if not frames:
+            return []
+        prepared = [letterbox(frame, self.imgsz) for frame in frames]
+        blobs = np.stack([blob for blob, _, _ in prepared])
+        if self.fixed_batch:
+            outputs = np.concatenate([self.session.run(None, {self.input_name: blob[None]})[0] for blob in blobs])
+        else:
+            outputs = self.session.run(None, {self.input_name: blobs})[0]
+        return [
+            self._postprocess(output, ratio, pad, frame.shape[:2])
+            for output, (_, ratio, pad), frame in zip(outputs, prepared, frames)
+        ]
+
+    def _postprocess(self, output: np.ndarray, ratio: float, pad: Tuple[float, float], shape) -> List[Dict[str, Any]]:
+        # (4 + classes, anchors): centre-size boxes then per-class scores
+        predictions = output.T
+        scores = predictions[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confs = scores[np.arange(len(scores)), class_ids]
+        keep = confs > self.conf_threshold
+        if not keep.any():
+            return []
+        boxes, class_ids, confs = predictions[keep, :4], class_ids[keep], confs[keep]
+
+        xywh = np.column_stack((boxes[:, 0] - boxes[:, 2] / 2, boxes[:, 1] - boxes[:, 3] / 2, boxes[:, 2], boxes[:, 3]))
+        kept = cv2.dnn.NMSBoxesBatched(
+            xywh.tolist(), confs.tolist(), class_ids.tolist(), self.conf_threshold, self.iou_threshold
+        )
+        kept = np.asarray(kept, dtype=np.int64).reshape(-1)
+
+        height, width = shape
+        xyxy = np.column_stack((xywh[kept, :2], xywh[kept, :2] + xywh[kept, 2:]))
+        xyxy = (xyxy - np.array([pad[0], pad[1], pad[0], pad[1]])) / ratio
+        xyxy = np.clip(xyxy, 0, [width, height, width, height])
+        return [
+            {'class': self.names.get(int(cls), str(int(cls))), 'conf': float(conf), 'bbox': box}
+            for cls, conf, box in zip(class_ids[kept], confs[kept], xyxy.tolist())
+        ]
+
+
+class Int8OnnxBackend(OnnxBackend):
+    """ONNX backend on an int8-quantised copy of the exported graph"""
+
+    name = "onnx-int8"
+    int8 = True
+
+    def _ensure_model(self) -> None:
+        if os.path.exists(self.model_path):
+            return
+        source = onnx_model_path(self.model_name, version=self.version)
+        if not os.path.exists(source):
+            export_onnx(self.weights, source, self.imgsz)
+        frames = calibration_frames(settings.onnx_calibration_video) if settings.onnx_calibration_video else None
+        quantize_int8(source, self.model_path, frames, self.imgsz)
+
+
+def calibration_frames(video_path: str, count: int = 64) -> List[np.ndarray]:
+    """Evenly spaced frames of a video, for static quantisation"""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        frames = []
+        for index in np.linspace(0, max(total - 1, 0), num=min(count, max(total, 1)), dtype=int):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+            ret, frame = cap.read()
+            if ret:
+                frames.append(frame)
+        return frames
+    finally:
+        cap.release()
+
+
+class FakeBackend(InferenceBackend):
+    """Deterministic stand-in: bright white blobs are balls, green ones players.
+
+    ``latency_ms`` per frame imitates the cost of a real model.
+    """
+
+    name = "fake"
+
+    def __init__(self, model_name: str = "fake", latency_ms: float = 0.0, version: Optional[str] = None):
+        super().__init__(model_name, version)
+        self.latency_ms = latency_ms
+
+    def load(self):
+        self.names = {0: 'ball', 1: 'player'}
+        return self
+
+    def infer_batch(self, frames):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0 * len(frames))
+        results = []
+        for frame in frames:
+            white = (frame.min(axis=2) > 200).astype(np.uint8)
+            green = ((frame[..., 1] > 100) & (frame[..., 0] < 100) & (frame[..., 2] < 100)).astype(np.uint8)
+            objects = []
+            for cls, mask in ((0, white), (1, green)):
+                contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+                for contour in sorted(contours, key=lambda c: cv2.boundingRect(c)[:2]):
+                    x, y, w, h = cv2.boundingRect(contour)
+                    objects.append({
+                        'class': self.names[cls],
+                        'conf': 0.9,
+                        'bbox': [float(x), float(y), float(x + w), float(y + h)]
+                    })
+            results.append(objects)
+        return results
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (UltralyticsBackend, OnnxBackend, Int8OnnxBackend, FakeBackend)
+}
+
+
+def create_backend(model_name: str, backend: Optional[str] = None, version: Optional[str] = None) -> InferenceBackend:
+    """Instantiate and load ``version`` of ``model_name`` on the named (or configured) backend"""
+    backend = backend or settings.inference_backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}'; expected one of {sorted(BACKENDS)}")
+    return BACKENDS[backend](model_name, version=version).load()
@@ -0,0 +1,151 @@
+"""
+Fleet-wide event backfill.
+
+Re-derives events for every video with stored detections after the
+``EventDetector`` rules change. Detection is CPU-bound pure Python/NumPy,
+so videos are spread over a process pool sized to the machine; the parent
+writes each video's events as a new event set version, publishing the set
+and advancing the checkpoint to that video in one commit, so an
+interrupted run resumes after the last video it finished and never writes
+a second set for it.
+
+Usage (from platform/backend):
+
+    python -m cv_models.backfill --params '{"goal_line_x": 0.05}'
+    python -m cv_models.backfill --run-id <id>    # resume
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.models.video import BackfillRun
+from app.services.video_service import VideoService
+from cv_models.tasks import detect_stored_events, event_rows
+
+
+def _init_worker() -> None:
+    # Pooled connections inherited from the parent must not be shared
+    engine.dispose(close=False)
+
+
+def _detect_video(video_id: int, detector_params: Optional[Dict[str, Any]]) -> Tuple[int, Optional[List[dict]], Optional[str]]:
+    """Worker: event rows for one video, or the error that stopped it"""
+    db = SessionLocal()
+    try:
+        video_service = VideoService(db)
+        events = detect_stored_events(video_service, video_id, detector_params)
+        return video_id, list(event_rows(events, video_service.get_video_fps(video_id))), None
+    except Exception as e:
+        return video_id, None, str(e)
+    finally:
+        db.close()
+
+
+def _summary(run: BackfillRun) -> Dict[str, Any]:
+    return {
+        "status": run.status,
+        "run_id": run.run_id,
+        "last_video_id": run.last_video_id,
+        "videos_processed": run.videos_processed,
+        "videos_failed": run.videos_failed,
+        "events_written": run.events_written,
+        "elapsed_seconds": run.elapsed_seconds,
+        "videos_per_second": run.videos_processed / run.elapsed_seconds if run.elapsed_seconds else 0.0
+    }
+
+
+def run_backfill(
+    detector_params: Optional[Dict[str, Any]] = None,
+    run_id: Optional[str] = None,
+    workers: Optional[int] = None,
+    batch_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """Backfill events for all analysed videos; resumes ``run_id`` if it exists"""
+    batch_size = batch_size or settings.backfill_batch_size
+    db = SessionLocal()
+    run = None
+    try:
+        run = db.query(BackfillRun).filter(BackfillRun.run_id == run_id).first() if run_id else None
+        if run is None:
+            run = BackfillRun(run_id=run_id or str(uuid.uuid4()), detector_params=detector_params or {})
+            db.add(run)
+            db.commit()
+        if run.status == "completed":
+            return _summary(run)
+        # A resumed run keeps the parameters it started with
+        detector_params = run.detector_params
+        run.status = "running"
+        db.commit()
+
+        video_service = VideoService(db)
+        started = time.perf_counter()
+        elapsed_before = run.elapsed_seconds or 0.0
+
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker) as pool:
+            def submit(video_ids):
+                return [pool.submit(_detect_video, video_id, detector_params) for video_id in video_ids]
+
+            video_ids = video_service.get_analysed_video_ids(run.last_video_id, batch_size)
+            pending = submit(video_ids)
+            while pending:
+                # Queue the next batch first so workers stay busy while this one is written
+                next_ids = video_service.get_analysed_video_ids(video_ids[-1], batch_size)
+                next_pending = submit(next_ids)
+
+                for future in pending:
+                    video_id, rows, error = future.result()
+                    if error is not None:
+                        print(f"Backfill error (video {video_id}): {error}")
+                        run.videos_failed += 1
+                        run.last_video_id = video_id
+                        db.commit()
+                        continue
+                    event_set = video_service.create_event_set(video_id, "backfill", detector_params)
+                    written = video_service.add_events_bulk(video_id, rows, event_set_id=event_set.id)
+                    run.videos_processed += 1
+                    run.events_written += written
+                    run.last_video_id = video_id
+                    # Commits the checkpoint with the set, so a resume never redoes a published video
+                    video_service.complete_event_set(event_set, written)
+
+                run.elapsed_seconds = elapsed_before + time.perf_counter() - started
+                db.commit()
+                print(
+                    f"Backfill {run.run_id}: {run.videos_processed} videos, "
+                    f"{run.videos_processed / run.elapsed_seconds:.1f} videos/s"
+                )
+                video_ids, pending = next_ids, next_pending
+
+        run.status = "completed"
+        run.elapsed_seconds = elapsed_before + time.perf_counter() - started
+        db.commit()
+        return _summary(run)
+    except BaseException:
+        db.rollback()
+        if run is not None and run.id is not None:
+            run.status = "failed"
+            db.commit()
+        raise
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-derive events for every analysed video")
+    parser.add_argument("--params", default="{}", help="EventDetector arguments as JSON")
+    parser.add_argument("--run-id", help="Resume (or name) a backfill run")
+    parser.add_argument("--workers", type=int, default=None, help="Processes; defaults to the CPU count")
+    parser.add_argument("--batch-size", type=int, default=None, help="Videos per checkpoint")
+    args = parser.parse_args()
+
+    summary = run_backfill(json.loads(args.params), args.run_id, args.workers, args.batch_size)
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,101 +2,395 @@
 Event detection logic for field hockey using YOLOv8 detection results.
 Detects goals, cards, and corners from frame-by-frame object detections.
 """
-from typing import List, Dict, Any
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Ordering of the ball-driven events within a frame; object-driven events
+# (cards, penalties, substitutions) come first, in object order.
+_GOAL, _CORNER, _PENALTY_AREA = 1, 2, 3
+
 
 class EventDetector:
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        goal_line_x: float = 0.04,  # Tighter goal line (4% of field width)
+        corner_area: float = 0.08,  # 8% of field width/height for corner detection
+        penalty_area_x: float = 0.18,  # 18% of field width for penalty circle (23m line)
+        field_width: float = 1.0,
+        field_height: float = 1.0,
+        goal_debounce_frames: int = 20,  # Require at least 20 frames between goal events
+        corner_debounce_frames: int = 12,
+        penalty_debounce_frames: int = 20,
+        substitution_debounce_frames: int = 20,
+        ball_conf: float = 0.65,
+        card_conf: float = 0.8,
+        penalty_conf: float = 0.7,
+        substitution_conf: float = 0.7,
+        goal_lookback: int = 6,  # Previous ball sightings checked before a goal
+        zone_lookback: int = 4  # Previous ball sightings checked before a corner/penalty entry
+    ):
+        self.goal_line_x = goal_line_x
+        self.corner_area = corner_area
+        self.penalty_area_x = penalty_area_x
+        self.field_width = field_width
+        self.field_height = field_height
+        self.goal_debounce_frames = goal_debounce_frames
+        self.corner_debounce_frames = corner_debounce_frames
+        self.penalty_debounce_frames = penalty_debounce_frames
+        self.substitution_debounce_frames = substitution_debounce_frames
+        self.ball_conf = ball_conf
+        self.card_conf = card_conf
+        self.penalty_conf = penalty_conf
+        self.substitution_conf = substitution_conf
+        self.goal_lookback = goal_lookback
+        self.zone_lookback = zone_lookback
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear the streaming state before a new match"""
+        # Only the look-back window of ball sightings is kept, never the
+        # whole trajectory
+        self._ball_traj: Deque[Dict[str, Any]] = deque(maxlen=max(self.goal_lookback, self.zone_lookback))
+        self._last_event: Optional[Dict[str, Any]] = None
+        self._last_goal_event = {'left': None, 'right': None}
+        self._last_corner_event = None
+        self._last_penalty_event = None
+        self._last_substitution_event = None
+
+    def feed(self, det: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Process one frame's detections and return the events it raises.
+
+        Frames must be fed in order. Memory and per-frame cost are constant:
+        the detector keeps a fixed-size deque of recent ball sightings and
+        the frame of the last event of each kind.
+        """
+        events = []
+        frame = det.get('frame')
+        objects = det.get('objects', [])
+        ball = None
+        goals = []
+        for obj in objects:
+            if obj['class'] == 'ball' and obj['conf'] > self.ball_conf:
+                ball = obj
+            if obj['class'] == 'goal_post' and obj['conf'] > self.ball_conf:
+                goals.append(obj)
+            if obj['class'] == 'card' and obj['conf'] > self.card_conf:
+                # Debounce card events: only add if not same as last frame
+                last_event = events[-1] if events else self._last_event
+                if last_event is None or last_event['type'] != 'card' or last_event['frame'] != frame-1:
+                    events.append({'type': 'card', 'frame': frame, 'details': obj})
+            if obj['class'] == 'penalty' and obj['conf'] > self.penalty_conf:
+                if self._last_penalty_event is None or (frame - self._last_penalty_event > self.penalty_debounce_frames):
+                    events.append({'type': 'penalty', 'frame': frame, 'details': obj})
+                    self._last_penalty_event = frame
+            if obj['class'] == 'substitution' and obj['conf'] > self.substitution_conf:
+                if self._last_substitution_event is None or (frame - self._last_substitution_event > self.substitution_debounce_frames):
+                    events.append({'type': 'substitution', 'frame': frame, 'details': obj})
+                    self._last_substitution_event = frame
+        # Ball trajectory tracking
+        if ball and 'bbox' in ball:
+            x_center = (ball['bbox'][0] + ball['bbox'][2]) / 2.0
+            y_center = (ball['bbox'][1] + ball['bbox'][3]) / 2.0
+            goal_recent = list(self._ball_traj)[-self.goal_lookback:] if self.goal_lookback else []
+            zone_recent = list(self._ball_traj)[-self.zone_lookback:] if self.zone_lookback else []
+            self._ball_traj.append({'frame': frame, 'x': x_center, 'y': y_center})
+            # Goal detection: ball crosses left or right goal line, debounce
+            if self._in_left_goal(x_center):
+                if self._last_goal_event['left'] is None or (frame - self._last_goal_event['left'] > self.goal_debounce_frames):
+                    if not any(self._in_left_goal(b['x']) for b in goal_recent):
+                        events.append({'type': 'goal', 'frame': frame, 'side': 'left', 'details': ball})
+                        self._last_goal_event['left'] = frame
+            elif self._in_right_goal(x_center):
+                if self._last_goal_event['right'] is None or (frame - self._last_goal_event['right'] > self.goal_debounce_frames):
+                    if not any(self._in_right_goal(b['x']) for b in goal_recent):
+                        events.append({'type': 'goal', 'frame': frame, 'side': 'right', 'details': ball})
+                        self._last_goal_event['right'] = frame
+            # Corner detection: ball in corner area, debounce
+            if self._in_corner(x_center, y_center):
+                if self._last_corner_event is None or (frame - self._last_corner_event > self.corner_debounce_frames):
+                    if not any(self._in_corner(b['x'], b['y']) for b in zone_recent):
+                        events.append({'type': 'corner', 'frame': frame, 'details': ball})
+                        self._last_corner_event = frame
+            # Penalty detection: ball enters penalty area (23m circle)
+            if self._in_penalty_area(x_center):
+                if self._last_penalty_event is None or (frame - self._last_penalty_event > self.penalty_debounce_frames):
+                    if not any(self._in_penalty_area(b['x']) for b in zone_recent):
+                        events.append({'type': 'penalty_area_entry', 'frame': frame, 'details': ball})
+                        self._last_penalty_event = frame
+        if events:
+            self._last_event = events[-1]
+        return events
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """
+        End the stream and return any events still pending.
 
-    def detect_events(self, detections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        Every event is decided on the frame that raises it, so nothing is
+        ever pending; the state is reset for the next match.
+        """
+        self.reset()
+        return []
+
+    def _in_left_goal(self, x: float) -> bool:
+        return x < self.field_width * self.goal_line_x
+
+    def _in_right_goal(self, x: float) -> bool:
+        return x > self.field_width * (1 - self.goal_line_x)
+
+    def _in_corner(self, x: float, y: float) -> bool:
+        low_x, high_x = self.field_width * self.corner_area, self.field_width * (1 - self.corner_area)
+        low_y, high_y = self.field_height * self.corner_area, self.field_height * (1 - self.corner_area)
+        return (
+            (x < low_x and y < low_y) or
+            (x > high_x and y < low_y) or
+            (x < low_x and y > high_y) or
+            (x > high_x and y > high_y)
+        )
+
+    def _in_penalty_area(self, x: float) -> bool:
+        return (x < self.field_width * self.penalty_area_x) or (x > self.field_width * (1 - self.penalty_area_x))
+
+    def detect_events(self, detections: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Improved event detection logic:
         - Goal: Detects if the ball crosses the goal line (assumes 'ball' and 'goal_post' classes, uses x/y position)
         - Card: Detects card gestures (as before)
         - Corner: Detects if the ball is near the corner area (assumes field size, uses ball position)
+
+        Runs the streaming ``feed`` over a complete sequence, so it resets
+        any stream in progress on this detector.
         """
+        self.reset()
         events = []
-        last_ball_pos = None
-        last_goal_event = {'left': None, 'right': None}
-        last_corner_event = None
-        last_penalty_event = None
-        last_substitution_event = None
-        goal_line_x = 0.04  # Tighter goal line (4% of field width)
-        field_width = 1.0
-        field_height = 1.0
-        corner_area = 0.08  # 8% of field width/height for corner detection
-        penalty_area_x = 0.18  # 18% of field width for penalty circle (23m line)
-        goal_debounce_frames = 20  # Require at least 20 frames between goal events
-        corner_debounce_frames = 12
-        penalty_debounce_frames = 20
-        substitution_debounce_frames = 20
-        ball_traj = []
-
-        for idx, det in enumerate(detections):
+        for det in detections:
+            events.extend(self.feed(det))
+        events.extend(self.flush())
+        return events
+
+    def detect_events_batch(self, detections: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Vectorised equivalent of ``detect_events``.
+
+        Detections (in frame order) are flattened once into per-object
+        arrays; zone tests and look-back windows are then array operations
+        and only the sparse candidate frames are debounced one by one. The
+        events, and their ``details`` objects, are identical to
+        ``detect_events``.
+        """
+        class_ids: Dict[str, int] = {}
+        rows, frames, classes, confs, boxes, has_bbox, objects = [], [], [], [], [], [], []
+        for row, det in enumerate(detections):
             frame = det.get('frame')
-            objects = det.get('objects', [])
-            ball = None
-            goals = []
-            for obj in objects:
-                if obj['class'] == 'ball' and obj['conf'] > 0.65:
-                    ball = obj
-                if obj['class'] == 'goal_post' and obj['conf'] > 0.65:
-                    goals.append(obj)
-                if obj['class'] == 'card' and obj['conf'] > 0.8:
-                    # Debounce card events: only add if not same as last frame
-                    if not events or events[-1]['type'] != 'card' or events[-1]['frame'] != frame-1:
-                        events.append({'type': 'card', 'frame': frame, 'details': obj})
-                if obj['class'] == 'penalty' and obj['conf'] > 0.7:
-                    if last_penalty_event is None or (frame - last_penalty_event > penalty_debounce_frames):
-                        events.append({'type': 'penalty', 'frame': frame, 'details': obj})
-                        last_penalty_event = frame
-                if obj['class'] == 'substitution' and obj['conf'] > 0.7:
-                    if last_substitution_event is None or (frame - last_substitution_event > substitution_debounce_frames):
-                        events.append({'type': 'substitution', 'frame': frame, 'details': obj})
-                        last_substitution_event = frame
-            # Ball trajectory tracking
-            if ball and 'bbox' in ball:
-                x_center = (ball['bbox'][0] + ball['bbox'][2]) / 2.0
-                y_center = (ball['bbox'][1] + ball['bbox'][3]) / 2.0
-                ball_traj.append({'frame': frame, 'x': x_center, 'y': y_center})
-                # Goal detection: ball crosses left or right goal line, debounce
-                if x_center < field_width * goal_line_x:
-                    if last_goal_event['left'] is None or (frame - last_goal_event['left'] > goal_debounce_frames):
-                        recent = [b for b in ball_traj[-7:-1] if b['x'] < field_width * goal_line_x]
-                        if not recent:
-                            events.append({'type': 'goal', 'frame': frame, 'side': 'left', 'details': ball})
-                            last_goal_event['left'] = frame
-                elif x_center > field_width * (1 - goal_line_x):
-                    if last_goal_event['right'] is None or (frame - last_goal_event['right'] > goal_debounce_frames):
-                        recent = [b for b in ball_traj[-7:-1] if b['x'] > field_width * (1 - goal_line_x)]
-                        if not recent:
-                            events.append({'type': 'goal', 'frame': frame, 'side': 'right', 'details': ball})
-                            last_goal_event['right'] = frame
-                # Corner detection: ball in corner area, debounce
-                in_corner = (
-                    (x_center < field_width * corner_area and y_center < field_height * corner_area) or
-                    (x_center > field_width * (1 - corner_area) and y_center < field_height * corner_area) or
-                    (x_center < field_width * corner_area and y_center > field_height * (1 - corner_area)) or
-                    (x_center > field_width * (1 - corner_area) and y_center > field_height * (1 - corner_area))
-                )
-                if in_corner:
-                    if last_corner_event is None or (frame - last_corner_event > corner_debounce_frames):
-                        recent = [b for b in ball_traj[-5:-1] if (
-                            (b['x'] < field_width * corner_area and b['y'] < field_height * corner_area) or
-                            (b['x'] > field_width * (1 - corner_area) and b['y'] < field_height * corner_area) or
-                            (b['x'] < field_width * corner_area and b['y'] > field_height * (1 - corner_area)) or
-                            (b['x'] > field_width * (1 - corner_area) and b['y'] > field_height * (1 - corner_area))
-                        )]
-                        if not recent:
-                            events.append({'type': 'corner', 'frame': frame, 'details': ball})
-                            last_corner_event = frame
-                # Penalty detection: ball enters penalty area (23m circle)
-                in_penalty = (x_center < field_width * penalty_area_x) or (x_center > field_width * (1 - penalty_area_x))
-                if in_penalty:
-                    if last_penalty_event is None or (frame - last_penalty_event > penalty_debounce_frames):
-                        recent = [b for b in ball_traj[-5:-1] if (b['x'] < field_width * penalty_area_x or b['x'] > field_width * (1 - penalty_area_x))]
-                        if not recent:
-                            events.append({'type': 'penalty_area_entry', 'frame': frame, 'details': ball})
-                            last_penalty_event = frame
-            last_ball_pos = ball
+            for obj in det.get('objects', []):
+                bbox = obj.get('bbox')
+                rows.append(row)
+                frames.append(frame)
+                classes.append(class_ids.setdefault(obj['class'], len(class_ids)))
+                confs.append(obj['conf'] if obj.get('conf') is not None else np.nan)
+                boxes.append(bbox if bbox is not None else (np.nan,) * 4)
+                has_bbox.append(bbox is not None)
+                objects.append(obj)
+
+        return self._detect_arrays(
+            row=np.asarray(rows, dtype=np.int64),
+            frame=np.asarray(frames, dtype=np.int64),
+            class_id=np.asarray(classes, dtype=np.int64),
+            class_names=sorted(class_ids, key=class_ids.get),
+            conf=np.asarray(confs, dtype=np.float64),
+            bbox=np.asarray(boxes, dtype=np.float64).reshape(-1, 4),
+            has_bbox=np.asarray(has_bbox, dtype=bool),
+            details=objects.__getitem__
+        )
+
+    def detect_events_columnar(self, parts: Iterable[Tuple[Dict[str, np.ndarray], Sequence[str]]]) -> List[Dict[str, Any]]:
+        """
+        Detect events straight from columnar detection arrays.
+
+        ``parts`` yields ``(arrays, class_names)`` pairs in frame order, as
+        returned by ``ColumnarDetectionStore.arrays`` and its
+        ``class_names``. No per-object dicts are built except for the
+        objects that end up in an event. Objects stored without a box
+        (``has_bbox`` false) are never used as ball positions, as in
+        ``detect_events``.
+        """
+        class_ids: Dict[str, int] = {}
+        frames, classes, confs, boxes, has_boxes, tracks = [], [], [], [], [], []
+        for arrays, names in parts:
+            lookup = np.array([class_ids.setdefault(name, len(class_ids)) for name in names], dtype=np.int64)
+            frames.append(np.asarray(arrays['frame'], dtype=np.int64))
+            classes.append(lookup[arrays['class_id']] if len(lookup) else np.asarray(arrays['class_id'], dtype=np.int64))
+            confs.append(np.asarray(arrays['conf'], dtype=np.float64))
+            boxes.append(np.asarray(arrays['bbox'], dtype=np.float64).reshape(-1, 4))
+            has_boxes.append(np.asarray(arrays.get('has_bbox', np.ones(len(arrays['frame']))), dtype=bool))
+            tracks.append(np.asarray(arrays.get('track_id', np.zeros(len(arrays['frame']))), dtype=np.int64))
+
+        frame = np.concatenate(frames) if frames else np.empty(0, dtype=np.int64)
+        class_id = np.concatenate(classes) if classes else np.empty(0, dtype=np.int64)
+        conf = np.concatenate(confs) if confs else np.empty(0)
+        bbox = np.concatenate(boxes) if boxes else np.empty((0, 4))
+        has_bbox = np.concatenate(has_boxes) if has_boxes else np.empty(0, dtype=bool)
+        track_id = np.concatenate(tracks) if tracks else np.empty(0, dtype=np.int64)
+        class_names = sorted(class_ids, key=class_ids.get)
+
+        def details(index: int) -> Dict[str, Any]:
+            obj = {
+                'class': class_names[class_id[index]],
+                'conf': float(conf[index])
+            }
+            if has_bbox[index]:
+                obj['bbox'] = bbox[index].tolist()
+            if track_id[index]:
+                obj['track_id'] = int(track_id[index])
+            return obj
+
+        return self._detect_arrays(
+            row=frame,
+            frame=frame,
+            class_id=class_id,
+            class_names=class_names,
+            conf=conf,
+            bbox=bbox,
+            has_bbox=has_bbox,
+            details=details
+        )
+
+    def _detect_arrays(
+        self,
+        row: np.ndarray,
+        frame: np.ndarray,
+        class_id: np.ndarray,
+        class_names: Sequence[str],
+        conf: np.ndarray,
+        bbox: np.ndarray,
+        has_bbox: np.ndarray,
+        details: Callable[[int], Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Shared core of the batch detectors over per-object arrays.
+
+        ``row`` groups objects into their detection record. Every event
+        gets an integer sort key that reproduces ``detect_events``'s
+        append order: ``4 * i`` for an event raised by object ``i``, and
+        ``4 * j + k`` for the k-th ball check of a frame whose last object
+        is ``j``.
+        """
+        if not len(row):
+            return []
+
+        def of_class(name: str) -> np.ndarray:
+            return class_id == class_names.index(name) if name in class_names else np.zeros(len(row), dtype=bool)
+
+        with np.errstate(invalid='ignore'):
+            is_ball = of_class('ball') & (conf > self.ball_conf)
+            is_card = of_class('card') & (conf > self.card_conf)
+            is_penalty = of_class('penalty') & (conf > self.penalty_conf)
+            is_substitution = of_class('substitution') & (conf > self.substitution_conf)
+
+        index = np.arange(len(row))
+        last_in_row = np.flatnonzero(np.r_[row[1:] != row[:-1], True])
+
+        # The ball of a frame is its last confident ball object
+        balls = np.flatnonzero(is_ball)
+        if len(balls):
+            balls = balls[np.r_[row[balls][1:] != row[balls][:-1], True]]
+        balls = balls[has_bbox[balls]]
+        ball_frame = frame[balls]
+        ball_key = 4 * last_in_row[np.searchsorted(last_in_row, balls)]
+        x = (bbox[balls, 0] + bbox[balls, 2]) / 2.0
+        y = (bbox[balls, 1] + bbox[balls, 3]) / 2.0
+
+        width, height = self.field_width, self.field_height
+        left = x < width * self.goal_line_x
+        right = x > width * (1 - self.goal_line_x)
+        corner_x = (x < width * self.corner_area) | (x > width * (1 - self.corner_area))
+        corner_y = (y < height * self.corner_area) | (y > height * (1 - self.corner_area))
+        corner = corner_x & corner_y
+        penalty_area = (x < width * self.penalty_area_x) | (x > width * (1 - self.penalty_area_x))
+
+        left_entry = left & ~self._seen_recently(left, self.goal_lookback)
+        right_entry = ~left & right & ~self._seen_recently(right, self.goal_lookback)
+        corner_entry = corner & ~self._seen_recently(corner, self.zone_lookback)
+        penalty_area_entry = penalty_area & ~self._seen_recently(penalty_area, self.zone_lookback)
+
+        # (sort key, frame, type, object index, side)
+        accepted: List[Tuple[int, int, str, int, Optional[str]]] = []
+
+        for side, entries in (('left', left_entry), ('right', right_entry)):
+            keys, frames, objects = ball_key[entries] + _GOAL, ball_frame[entries], balls[entries]
+            for i in self._debounce(frames, self.goal_debounce_frames):
+                accepted.append((keys[i], frames[i], 'goal', objects[i], side))
+
+        keys, frames, objects = ball_key[corner_entry] + _CORNER, ball_frame[corner_entry], balls[corner_entry]
+        for i in self._debounce(frames, self.corner_debounce_frames):
+            accepted.append((keys[i], frames[i], 'corner', objects[i], None))
+
+        substitutions = np.flatnonzero(is_substitution)
+        frames = frame[substitutions]
+        for i in self._debounce(frames, self.substitution_debounce_frames):
+            accepted.append((4 * substitutions[i], frames[i], 'substitution', substitutions[i], None))
+
+        # Penalty objects and penalty-area entries share one debounce
+        penalties = np.flatnonzero(is_penalty)
+        penalty_keys = np.concatenate((4 * penalties, ball_key[penalty_area_entry] + _PENALTY_AREA))
+        penalty_frames = np.concatenate((frame[penalties], ball_frame[penalty_area_entry]))
+        penalty_objects = np.concatenate((penalties, balls[penalty_area_entry]))
+        penalty_types = np.array(['penalty'] * len(penalties) + ['penalty_area_entry'] * int(penalty_area_entry.sum()))
+        order = np.argsort(penalty_keys, kind='stable')
+        penalty_keys, penalty_frames = penalty_keys[order], penalty_frames[order]
+        penalty_objects, penalty_types = penalty_objects[order], penalty_types[order]
+        for i in self._debounce(penalty_frames, self.penalty_debounce_frames):
+            accepted.append((penalty_keys[i], penalty_frames[i], str(penalty_types[i]), penalty_objects[i], None))
+
+        accepted.sort(key=lambda event: event[0])
+        accepted.extend(self._cards(np.flatnonzero(is_card), frame, accepted))
+        accepted.sort(key=lambda event: event[0])
+
+        events = []
+        for _, event_frame, event_type, obj, side in accepted:
+            event = {'type': event_type, 'frame': int(event_frame), 'details': details(int(obj))}
+            if side is not None:
+                event['side'] = side
+            events.append(event)
         return events
+
+    @staticmethod
+    def _seen_recently(mask: np.ndarray, window: int) -> np.ndarray:
+        """Whether any of the previous ``window`` entries of ``mask`` is set"""
+        counts = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+        positions = np.arange(len(mask))
+        return counts[positions] - counts[np.maximum(positions - window, 0)] > 0
+
+    @staticmethod
+    def _debounce(frames: np.ndarray, gap: int) -> List[int]:
+        """Greedily keep candidates more than ``gap`` frames after the last kept one.
+
+        ``frames`` must be non-decreasing; each kept candidate costs one
+        binary search, so runs of suppressed candidates are skipped whole.
+        """
+        if np.all(np.diff(frames) > gap):
+            return list(range(len(frames)))
+        kept = []
+        i = 0
+        while i < len(frames):
+            kept.append(i)
+            i = int(np.searchsorted(frames, frames[i] + gap, side='right'))
+        return kept
+
+    @staticmethod
+    def _cards(cards: np.ndarray, frame: np.ndarray, accepted: List[Tuple]) -> List[Tuple]:
+        """Cards are dropped when the event just before them is a card on the previous frame"""
+        other_keys = np.array([event[0] for event in accepted], dtype=np.int64)
+        kept = []
+        last_card = None
+        for card in cards:
+            key = 4 * int(card)
+            previous_other = int(np.searchsorted(other_keys, key)) - 1
+            previous_is_card = last_card is not None and (
+                previous_other < 0 or last_card[0] > other_keys[previous_other]
+            )
+            if previous_is_card and last_card[1] == frame[card] - 1:
+                continue
+            last_card = (key, frame[card], 'card', card, None)
+            kept.append(last_card)
+        return kept
@@ -0,0 +1,174 @@
+"""
+In-process micro-batching inference server for single-frame requests.
+
+Interactive callers (the annotator, live features) need one frame detected
+now. A Celery task per frame adds queueing latency, and running the model
+inside each request handler serialises the requests on the model anyway.
+Instead, requests go into a bounded queue; one worker thread keeps the
+model warm, drains whatever has arrived into a micro-batch (up to
+``max_batch_size`` frames, waiting at most ``max_wait`` seconds after the
+first) and answers each request through its future. While a batch is on
+the model the next one fills up, so batches grow with load on their own.
+A full queue is rejected immediately so callers can back off.
+
+A caller that gives up cancels its future; a cancelled request is dropped
+when the worker collects it, and once a request is collected it can no
+longer be cancelled, so delivering its result never fails.
+"""
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+import numpy as np
+from cv_models.backends import InferenceBackend
+
+_POLL_SECONDS = 0.1
+
+
+class ServerBusyError(Exception):
+    """The request queue is full"""
+
+
+class MicroBatchInferenceServer:
+    """Collect concurrent frame requests into batched inference calls"""
+
+    def __init__(
+        self,
+        get_backend: Callable[[], InferenceBackend],
+        max_batch_size: int = 8,
+        max_wait: float = 0.01,
+        queue_size: int = 64,
+        latency_window: int = 1000
+    ):
+        self.get_backend = get_backend
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.requests = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.batches = 0
+        self.batched_frames = 0
+        self.failed_batches = 0
+        self._latencies = collections.deque(maxlen=latency_window)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self.running:
+                return
+            self._stop.clear()
+            # Load and warm the model before taking requests
+            self._backend = self.get_backend()
+            self._thread = threading.Thread(target=self._run, name="inference-server", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the worker; requests still queued fail"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        while True:
+            try:
+                _, future, _ = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError("Inference server stopped"))
+
+    def submit(self, frame: np.ndarray) -> "Future[List[Dict[str, Any]]]":
+        """Queue one frame; the future resolves to its list of objects.
+
+        Raises ``ServerBusyError`` straight away when the queue is full.
+        """
+        if self._thread is None:
+            self.start()
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((frame, future, time.perf_counter()))
+        except queue.Full:
+            self.rejected += 1
+            raise ServerBusyError("Inference queue is full")
+        self.requests += 1
+        return future
+
+    def _collect(self) -> List[tuple]:
+        """Block for a first request, then gather more until full or the deadline.
+
+        Requests cancelled while queued are dropped; the rest are marked
+        running so their callers can no longer cancel them.
+        """
+        batch = []
+        try:
+            self._take(batch, self._queue.get(timeout=_POLL_SECONDS))
+        except queue.Empty:
+            return []
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Take whatever is already waiting even past the deadline
+                self._take(batch, self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _take(self, batch: List[tuple], request: tuple) -> None:
+        if request[1].set_running_or_notify_cancel():
+            batch.append(request)
+        else:
+            self.cancelled += 1
+
+    @staticmethod
+    def _deliver(future: Future, objects=None, error: BaseException = None) -> None:
+        """Resolve one request; a failure here must not stop the worker"""
+        try:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(objects)
+        except Exception as e:
+            print(f"Inference result not delivered: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            try:
+                results = self._backend.infer_batch([frame for frame, _, _ in batch])
+            except Exception as e:
+                self.failed_batches += 1
+                for _, future, _ in batch:
+                    self._deliver(future, error=e)
+                continue
+            self.batches += 1
+            self.batched_frames += len(batch)
+            finished = time.perf_counter()
+            for (_, future, queued), objects in zip(batch, results):
+                self._latencies.append(finished - queued)
+                self._deliver(future, objects)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = np.array(self._latencies) * 1000.0
+        return {
+            "running": self.running,
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "mean_batch_size": self.batched_frames / self.batches if self.batches else 0.0,
+            "latency_p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+            "latency_p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else 0.0
+        }
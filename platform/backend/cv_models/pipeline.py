@@ -0,0 +1,200 @@
+"""
+Three-stage decode -> infer -> persist pipeline for video analysis.
+
+OpenCV decoding and model inference both release the GIL, so a decoder
+thread and a persistence thread run alongside inference instead of the
+three steps taking turns. Bounded queues between the stages keep memory
+flat, and their depth and wait times show which stage is the bottleneck:
+long ``put`` waits mean the consumer is slow, long ``get`` waits mean the
+producer is.
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+def read_batches(
+    cap,
+    batch_size: int,
+    max_batch_latency: float,
+    start_frame: int = 0,
+    end_frame: Optional[int] = None
+):
+    """Yield lists of ``(frame_idx, frame)`` read from ``cap``.
+
+    A batch is emitted once it holds ``batch_size`` frames or its first
+    frame has waited ``max_batch_latency`` seconds, whichever comes first.
+    ``cap`` must already be positioned at ``start_frame``; reading stops
+    before ``end_frame`` when one is given.
+    """
+    batch = []
+    batch_started = None
+    frame_idx = start_frame
+    while cap.isOpened() and (end_frame is None or frame_idx < end_frame):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if not batch:
+            batch_started = time.perf_counter()
+        batch.append((frame_idx, frame))
+        frame_idx += 1
+        if len(batch) >= batch_size or time.perf_counter() - batch_started >= max_batch_latency:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _StageQueue:
+    """Bounded queue that records depth and blocking time"""
+
+    def __init__(self, maxsize: int, stop: threading.Event):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._stop = stop
+        self.puts = 0
+        self.depth_total = 0
+        self.max_depth = 0
+        self.put_wait = 0.0
+        self.get_wait = 0.0
+
+    def put(self, item) -> bool:
+        """Put ``item``; returns False if the pipeline was stopped while waiting"""
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=_POLL_SECONDS)
+                break
+            except queue.Full:
+                continue
+        else:
+            return False
+        if item is _DONE:
+            return True
+        self.put_wait += time.perf_counter() - started
+        depth = self._queue.qsize()
+        self.puts += 1
+        self.depth_total += depth
+        self.max_depth = max(self.max_depth, depth)
+        return True
+
+    def get(self):
+        """Get the next item, or ``_DONE`` if the pipeline was stopped"""
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                item = self._queue.get(timeout=_POLL_SECONDS)
+                break
+            except queue.Empty:
+                continue
+        else:
+            return _DONE
+        self.get_wait += time.perf_counter() - started
+        return item
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "max_depth": self.max_depth,
+            "mean_depth": self.depth_total / self.puts if self.puts else 0.0,
+            "put_wait_seconds": self.put_wait,
+            "get_wait_seconds": self.get_wait
+        }
+
+
+class DetectionPipeline:
+    """Run ``infer`` over a video with decoding and persistence overlapped.
+
+    ``infer`` takes a list of ``(frame_idx, frame)`` pairs and returns one
+    ``{'frame', 'objects'}`` record per pair. ``persist`` receives each
+    batch of records, in frame order, on the persistence thread.
+    """
+
+    def __init__(
+        self,
+        infer: Callable[[List[tuple]], List[Dict[str, Any]]],
+        persist: Callable[[List[Dict[str, Any]]], None],
+        batch_size: int,
+        max_batch_latency: float,
+        queue_size: int
+    ):
+        self.infer = infer
+        self.persist = persist
+        self.batch_size = batch_size
+        self.max_batch_latency = max_batch_latency
+        self.queue_size = queue_size
+
+    def run(self, cap, start_frame: int = 0, end_frame: Optional[int] = None) -> Dict[str, Any]:
+        """Process frames ``[start_frame, end_frame)`` of ``cap``; returns per-stage statistics"""
+        stop = threading.Event()
+        frames = _StageQueue(self.queue_size, stop)
+        results = _StageQueue(self.queue_size, stop)
+        busy = {"decode": 0.0, "infer": 0.0, "persist": 0.0}
+        counts = {"frames": 0, "batches": 0}
+        errors: List[BaseException] = []
+
+        def fail(exc: BaseException):
+            errors.append(exc)
+            stop.set()
+
+        def decode():
+            try:
+                batches = read_batches(cap, self.batch_size, self.max_batch_latency, start_frame, end_frame)
+                while True:
+                    started = time.perf_counter()
+                    batch = next(batches, _DONE)
+                    busy["decode"] += time.perf_counter() - started
+                    if not frames.put(batch) or batch is _DONE:
+                        return
+            except BaseException as e:
+                fail(e)
+
+        def persist():
+            try:
+                while True:
+                    records = results.get()
+                    if records is _DONE:
+                        return
+                    started = time.perf_counter()
+                    self.persist(records)
+                    busy["persist"] += time.perf_counter() - started
+            except BaseException as e:
+                fail(e)
+
+        decoder = threading.Thread(target=decode, name="pipeline-decode", daemon=True)
+        persister = threading.Thread(target=persist, name="pipeline-persist", daemon=True)
+        started = time.perf_counter()
+        decoder.start()
+        persister.start()
+        try:
+            while True:
+                batch = frames.get()
+                if batch is _DONE:
+                    break
+                infer_started = time.perf_counter()
+                records = self.infer(batch)
+                busy["infer"] += time.perf_counter() - infer_started
+                counts["frames"] += len(records)
+                counts["batches"] += 1
+                if not results.put(records):
+                    break
+            results.put(_DONE)
+        except BaseException as e:
+            fail(e)
+        finally:
+            decoder.join()
+            persister.join()
+
+        if errors:
+            raise errors[0]
+
+        elapsed = time.perf_counter() - started
+        return {
+            "frames": counts["frames"],
+            "batches": counts["batches"],
+            "elapsed_seconds": elapsed,
+            "stages": {name: {"busy_seconds": seconds} for name, seconds in busy.items()},
+            "queues": {"frames": frames.stats(), "results": results.stats()}
+        }
@@ -0,0 +1,79 @@
+"""
+Low-resolution analysis proxies.
+
+The detector resizes its input to 640 px anyway, so decoding a 1080p or 4K
+original for analysis wastes most of the decode time. At ingest each video
+gets a proxy: scaled down, optionally at a lower frame rate, with a short
+GOP so segment seeks land on a keyframe. Detections made on the proxy are
+mapped back to the original's pixel coordinates and frame numbers.
+"""
+import os
+import subprocess
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class ProxyMapping:
+    """Converts proxy frame numbers and boxes back to the original video"""
+
+    scale_x: float = 1.0
+    scale_y: float = 1.0
+    frame_ratio: float = 1.0  # Original frames per proxy frame
+
+    @property
+    def identity(self) -> bool:
+        return self.scale_x == 1.0 and self.scale_y == 1.0 and self.frame_ratio == 1.0
+
+    def frame(self, proxy_frame: int) -> int:
+        return int(round(proxy_frame * self.frame_ratio))
+
+    def objects(self, objects: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self.scale_x == 1.0 and self.scale_y == 1.0:
+            return objects
+        mapped = []
+        for obj in objects:
+            bbox = obj.get('bbox')
+            if bbox is not None:
+                x1, y1, x2, y2 = bbox
+                obj = {**obj, 'bbox': [x1 * self.scale_x, y1 * self.scale_y, x2 * self.scale_x, y2 * self.scale_y]}
+            mapped.append(obj)
+        return mapped
+
+
+def proxy_path(proxy_dir: str, content_hash: str, height: int, fps: float) -> str:
+    """Content-addressed proxy location, shared by duplicate uploads"""
+    rate = f"_{fps:g}fps" if fps else ""
+    return os.path.join(proxy_dir, f"{content_hash}_{height}p{rate}.mp4")
+
+
+def proxy_command(source: str, target: str, height: int, fps: float = 0, gop: int = 12) -> List[str]:
+    """ffmpeg arguments for a short-GOP, audio-free H.264 proxy"""
+    filters = [f"scale=-2:{height}"]
+    if fps:
+        filters.append(f"fps={fps:g}")
+    return [
+        "ffmpeg", "-y", "-v", "error", "-i", source,
+        "-an", "-vf", ",".join(filters),
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-pix_fmt", "yuv420p",
+        # Fixed keyframe interval; gop=1 makes the proxy all-intra
+        "-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0",
+        target
+    ]
+
+
+def generate_proxy(source: str, target: str, height: int, fps: float = 0, gop: int = 12) -> Optional[str]:
+    """Encode ``source`` into ``target``; returns the path, or None if ffmpeg failed"""
+    if os.path.exists(target):
+        return target
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    partial = f"{target}.part.mp4"
+    try:
+        subprocess.run(proxy_command(source, partial, height, fps, gop), capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Proxy generation failed: {e}")
+        if os.path.exists(partial):
+            os.remove(partial)
+        return None
+    os.replace(partial, target)
+    return target
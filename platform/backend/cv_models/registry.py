@@ -0,0 +1,114 @@
+"""
+Per-worker registry of loaded detection models.
+
+Each Celery worker process keeps a small LRU of warm models so tasks stop
+paying deserialisation and first-inference cost on every call. Models are
+inference backends (see ``cv_models.backends``), keyed by name, version
+and backend; the version picks the weights that are loaded.
+
+A model is loaded outside the registry lock: callers asking for the same
+model wait on its load, while lookups of other models carry on.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+from celery.signals import worker_process_init
+from app.core.config import settings
+from cv_models.backends import InferenceBackend, create_backend
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        max_models: int = 2,
+        loader: Callable[[str, str, str], InferenceBackend] = create_backend,
+        warmup_shape: Tuple[int, int, int] = (640, 640, 3)
+    ):
+        self.max_models = max_models
+        self._loader = loader
+        self._warmup_shape = warmup_shape
+        self._models: "OrderedDict[Tuple[str, str, str], InferenceBackend]" = OrderedDict()
+        self._metrics: Dict[Tuple[str, str, str], Dict[str, float]] = {}
+        self._loading: Dict[Tuple[str, str, str], Future] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, name: Optional[str], version: Optional[str], backend: Optional[str]) -> Tuple[str, str, str]:
+        return (
+            name or settings.detection_model_name,
+            version or settings.detection_model_version,
+            backend or settings.inference_backend
+        )
+
+    def get(self, name: Optional[str] = None, version: Optional[str] = None, backend: Optional[str] = None) -> InferenceBackend:
+        """Return a warm model, loading it (and evicting the LRU one) if needed"""
+        key = self._key(name, version, backend)
+        with self._lock:
+            metrics = self._metrics.setdefault(key, {"hits": 0, "loads": 0, "evictions": 0})
+            if key in self._models:
+                self._models.move_to_end(key)
+                metrics["hits"] += 1
+                return self._models[key]
+            loading = self._loading.get(key)
+            waiting = loading is not None
+            if waiting:
+                metrics["hits"] += 1
+            else:
+                loading = self._loading[key] = Future()
+        if waiting:
+            # Another thread is loading this model; its result (or error) is ours
+            return loading.result()
+
+        try:
+            model, timings = self._load(key)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            loading.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._loading[key]
+            metrics["loads"] += 1
+            metrics.update(timings)
+            self._models[key] = model
+            while len(self._models) > self.max_models:
+                evicted, _ = self._models.popitem(last=False)
+                self._metrics[evicted]["evictions"] += 1
+        loading.set_result(model)
+        return model
+
+    def _load(self, key: Tuple[str, str, str]) -> Tuple[InferenceBackend, Dict[str, float]]:
+        name, version, backend = key
+        started = time.perf_counter()
+        model = self._loader(name, backend, version)
+        loaded = time.perf_counter()
+        # The first call builds the graph and allocates buffers; do it here
+        # rather than on a real frame
+        model.warmup(self._warmup_shape)
+        warmed = time.perf_counter()
+        return model, {"load_seconds": loaded - started, "warmup_seconds": warmed - loaded}
+
+    def stats(self, name: Optional[str] = None, version: Optional[str] = None, backend: Optional[str] = None) -> Dict[str, Any]:
+        """Load/warm-up timings and cache counters, for one model or all of them"""
+        if name is not None or version is not None or backend is not None:
+            key = self._key(name, version, backend)
+            return {**self._metrics.get(key, {}), "loaded": key in self._models}
+        return {
+            "{}@{}/{}".format(*key): {**metrics, "loaded": key in self._models}
+            for key, metrics in self._metrics.items()
+        }
+
+
+registry = ModelRegistry(max_models=settings.model_registry_size)
+
+
+@worker_process_init.connect
+def preload_default_model(**kwargs):
+    """Load and warm the default model as each worker process starts"""
+    try:
+        registry.get()
+    except Exception as e:
+        # Tasks will retry the load; don't take the worker process down
+        print(f"Model preload failed: {e}")
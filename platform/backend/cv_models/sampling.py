@@ -0,0 +1,86 @@
+"""
+Motion and scene-change gating of frames before inference.
+
+Replays, crowd shots and breaks leave long stretches where nothing on the
+pitch changes. Each frame is compared with the last frame that went to the
+model using a downscaled greyscale difference and a histogram distance;
+unchanged frames are skipped and reuse the previous detections.
+"""
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Optional
+import cv2
+import numpy as np
+
+
+@dataclass
+class SamplingPolicy:
+    """How aggressively a task type may skip inference"""
+
+    enabled: bool = False
+    diff_threshold: float = 4.0  # Mean absolute grey-level change (0-255) that counts as motion
+    hist_threshold: float = 0.15  # Bhattacharyya distance that counts as a scene change
+    max_skip: int = 25  # Never skip more than this many frames in a row
+    width: int = 64  # Width frames are downscaled to before comparing
+
+    @classmethod
+    def from_dict(cls, values: Optional[Dict[str, Any]]) -> "SamplingPolicy":
+        names = {field.name for field in fields(cls)}
+        return cls(**{key: value for key, value in (values or {}).items() if key in names})
+
+
+class FrameGate:
+    """Decide per frame whether it differs enough to be worth detecting"""
+
+    def __init__(self, policy: SamplingPolicy):
+        self.policy = policy
+        self.processed = 0
+        self.skipped = 0
+        self._reference: Optional[np.ndarray] = None
+        self._reference_hist: Optional[np.ndarray] = None
+        self._run = 0
+
+    def _signature(self, frame: np.ndarray):
+        height, width = frame.shape[:2]
+        size = (self.policy.width, max(1, round(height * self.policy.width / width)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        hist = cv2.calcHist([small], [0], None, [32], [0, 256])
+        cv2.normalize(hist, hist)
+        return small, hist
+
+    def should_process(self, frame: np.ndarray) -> bool:
+        """True when ``frame`` should go to the model"""
+        if not self.policy.enabled:
+            self.processed += 1
+            return True
+
+        small, hist = self._signature(frame)
+        changed = (
+            self._reference is None
+            or self._run >= self.policy.max_skip
+            or float(cv2.absdiff(small, self._reference).mean()) > self.policy.diff_threshold
+            or cv2.compareHist(hist, self._reference_hist, cv2.HISTCMP_BHATTACHARYYA) > self.policy.hist_threshold
+        )
+        if changed:
+            self._reference, self._reference_hist = small, hist
+            self._run = 0
+            self.processed += 1
+        else:
+            self._run += 1
+            self.skipped += 1
+        return changed
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.processed + self.skipped
+        return {
+            "enabled": self.policy.enabled,
+            "processed_frames": self.processed,
+            "skipped_frames": self.skipped,
+            "skip_ratio": self.skipped / total if total else 0.0
+        }
+
+
+def carry_forward(objects: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Objects for a skipped frame: the last processed frame's, marked ``skipped``"""
+    return [{**obj, 'skipped': True} for obj in objects]
@@ -0,0 +1,74 @@
+"""
+Video probing and keyframe-aligned segment planning for split/merge analysis.
+"""
+import json
+import subprocess
+from typing import Dict, List, Tuple
+import cv2
+
+
+def probe_video(video_path: str) -> Dict[str, float]:
+    """Frame count, frame rate and dimensions of a video"""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video {video_path}")
+        return {
+            "frame_count": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+            "fps": cap.get(cv2.CAP_PROP_FPS) or 25.0,
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        }
+    finally:
+        cap.release()
+
+
+def keyframe_indices(video_path: str, fps: float) -> List[int]:
+    """Frame indexes of the video's keyframes.
+
+    Reads packet flags with ``ffprobe`` (no decoding). Returns an empty list
+    when ffprobe is unavailable, in which case segments fall back to fixed
+    lengths and each segment's seek decodes forward from the preceding
+    keyframe.
+    """
+    command = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags", "-of", "json", video_path
+    ]
+    try:
+        output = subprocess.run(command, capture_output=True, check=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return []
+
+    keyframes = set()
+    for packet in json.loads(output).get("packets", []):
+        if "K" in packet.get("flags", "") and packet.get("pts_time") not in (None, "N/A"):
+            keyframes.add(int(round(float(packet["pts_time"]) * fps)))
+    return sorted(keyframes)
+
+
+def plan_segments(
+    frame_count: int,
+    segment_frames: int,
+    keyframes: List[int] = None
+) -> List[Tuple[int, int]]:
+    """Split ``[0, frame_count)`` into ``(start, end)`` ranges of about ``segment_frames``.
+
+    Each boundary after the first is moved forward to the next keyframe so
+    every segment starts on one and its seek is exact and cheap.
+    """
+    boundaries = [0]
+    candidates = sorted(k for k in (keyframes or []) if 0 < k < frame_count)
+    target = segment_frames
+    while target < frame_count:
+        if keyframes:
+            boundary = next((k for k in candidates if k >= target), None)
+            if boundary is None:
+                break
+        else:
+            boundary = target
+        if boundary > boundaries[-1]:
+            boundaries.append(boundary)
+        target = boundary + segment_frames
+    boundaries.append(frame_count)
+    return list(zip(boundaries[:-1], boundaries[1:]))
@@ -1,81 +1,749 @@
-
-from celery import Celery
-from ultralytics import YOLO
+from celery import chord, group
 import cv2
+import os
+import uuid
+from app.core.celery_app import celery_app
+from app.core.config import settings
 from cv_models.events import EventDetector
-from data.models import DetectionResult, EventResult
-from data.db import SessionLocal
+from cv_models.pipeline import DetectionPipeline
+from cv_models.registry import registry
+from cv_models.proxy import ProxyMapping, generate_proxy, proxy_path
+from cv_models.sampling import FrameGate, SamplingPolicy, carry_forward
+from cv_models.tracking import MultiObjectTracker, StridedDetector
+from cv_models.segments import keyframe_indices, plan_segments, probe_video
+from app.core.database import SessionLocal
+from app.services.detection_store import ColumnarDetectionWriter
+from app.services.progress import ProgressReporter
+from app.services.video_service import VideoService
 import json
+import subprocess
+import sys
 import time
+from typing import Any, Callable, Dict, Tuple
 
-# Initialize Celery
-celery_app = Celery('video_processor', broker='redis://redis:6379/0', backend='redis://redis:6379/0')
 
-@celery_app.task
-def process_video_for_detection(video_path: str):
-    model = YOLO('yolov8n.pt')
-    cap = cv2.VideoCapture(video_path)
+class TaskCancelled(Exception):
+    """Raised at a batch boundary when the running task was cancelled"""
+
+
+def _ensure_proxy(video_id: int, video_path: str) -> Tuple[str, ProxyMapping]:
+    """Path to analyse for a video, generating its proxy on first use.
+
+    Falls back to the original when proxies are disabled, the original is
+    already small enough or ffmpeg fails.
+    """
+    db = SessionLocal()
+    try:
+        video_service = VideoService(db)
+        video = video_service.get_video(video_id)
+        if video is None or not settings.proxy_enabled:
+            return video_path, ProxyMapping()
+
+        if not (video.proxy_path and os.path.exists(video.proxy_path)):
+            source = probe_video(video_path)
+            if source["height"] <= settings.proxy_height and not settings.proxy_fps:
+                video_service.set_proxy(video_id, source)
+                return video_path, ProxyMapping()
+
+            target = proxy_path(
+                settings.proxy_dir, video.content_hash or str(video_id), settings.proxy_height, settings.proxy_fps
+            )
+            if generate_proxy(video_path, target, settings.proxy_height, settings.proxy_fps, settings.proxy_gop) is None:
+                return video_path, ProxyMapping()
+            video = video_service.set_proxy(video_id, source, target, probe_video(target))
+
+        return video.proxy_path, ProxyMapping(
+            scale_x=video.width / video.proxy_width,
+            scale_y=video.height / video.proxy_height,
+            frame_ratio=video.fps / video.proxy_fps
+        )
+    finally:
+        db.close()
+
+
+def _detect_frames(
+    video_path: str,
+    video_id: int,
+    start_frame: int = 0,
+    end_frame: int = None,
+    batch_size: int = None,
+    max_batch_latency: float = None,
+    model_name: str = None,
+    model_version: str = None,
+    detect_every_n: int = None,
+    adaptive: bool = None,
+    task_type: str = "video_analysis",
+    frame_gating: bool = None,
+    backend: str = None,
+    on_progress: Callable[[int, int], Any] = None,
+    resume: Dict[str, Any] = None,
+    on_checkpoint: Callable[[Dict[str, Any]], Any] = None,
+    checkpoint_interval: float = None,
+    should_stop: Callable[[], bool] = None
+) -> dict:
+    """Run detection over frames ``[start_frame, end_frame)`` and store them.
+
+    Detections are written batch by batch, to the ``detections`` table or
+    to a columnar store depending on ``settings.detection_storage``, and
+    not kept in memory; only a summary is returned.
+
+    With ``detect_every_n`` above 1 (or ``adaptive``) the model only runs
+    on every Nth frame and a tracker fills the frames in between. When the
+    ``task_type``'s sampling policy is enabled, or ``frame_gating`` turns
+    it on for this run, frames it finds unchanged skip inference entirely
+    and repeat the last analysed frame's objects.
+
+    ``backend`` picks the inference backend (``settings.inference_backend``
+    by default). ``on_progress(done, total)`` is called with frame counts
+    after every stored batch.
+
+    Every ``checkpoint_interval`` seconds the stored detections are made
+    durable and ``on_checkpoint(state)`` receives the next frame to decode
+    and the counts so far; passing that state back as ``resume`` continues
+    from there instead of the first frame. Tracking and frame gating start
+    afresh at the resume point, as they do at a segment boundary. Event
+    detection runs afterwards over the stored detections, so it has no
+    state to save. ``should_stop()`` is checked after every stored batch;
+    when it returns True a last checkpoint is taken and ``TaskCancelled``
+    is raised.
+    """
+    batch_size = batch_size or settings.detection_batch_size
+    if max_batch_latency is None:
+        max_batch_latency = settings.detection_max_batch_latency
+    model_name = model_name or settings.detection_model_name
+    model_version = model_version or settings.detection_model_version
+    detect_every_n = detect_every_n or settings.detection_stride
+    if adaptive is None:
+        adaptive = settings.detection_adaptive
+    if checkpoint_interval is None:
+        checkpoint_interval = settings.task_checkpoint_interval
+
+    backend = backend or settings.inference_backend
+
+    # Warm instance from this worker process's registry
+    model = registry.get(model_name, model_version, backend)
+    # Decode the low-resolution proxy; detections are stored in the
+    # original's coordinates and frame numbers
+    analysis_path, mapping = _ensure_proxy(video_id, video_path)
+    cap = cv2.VideoCapture(analysis_path)
     if not cap.isOpened():
-        print(f"Error: Could not open video {video_path}")
-        return {"status": "error", "message": "Could not open video"}
-
-    results = []
-    frame_idx = 0
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        # YOLOv8 inference
-        preds = model(frame)
-        # Convert YOLO output to a serializable format (dummy structure for now)
-        objects = []
-        for pred in preds:
-            # Each pred is a Results object; convert to dict
-            for box in pred.boxes:
-                cls = int(box.cls[0]) if hasattr(box, 'cls') else None
-                conf = float(box.conf[0]) if hasattr(box, 'conf') else None
-                xyxy = box.xyxy[0].tolist() if hasattr(box, 'xyxy') else None
-                objects.append({
-                    'class': model.names[cls] if cls is not None and hasattr(model, 'names') else str(cls),
-                    'conf': conf,
-                    'bbox': xyxy
-                })
-        det = {'frame': frame_idx, 'objects': objects}
-        results.append(det)
-        frame_idx += 1
-    cap.release()
-
-    # Store detections in DB
+        raise ValueError("Could not open video")
+    fps = (cap.get(cv2.CAP_PROP_FPS) or 25.0) * mapping.frame_ratio
+    # Progress is counted in the decoded (proxy) frames
+    last_frame = end_frame if end_frame is not None else int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    total_frames = max(last_frame - start_frame, 0)
+    summary = {"frames": 0, "objects": 0}
+    policy = SamplingPolicy.from_dict(settings.sampling_policies.get(task_type))
+    if frame_gating is not None:
+        policy.enabled = frame_gating
+    gate = FrameGate(policy)
+
+    # Frames before a matching checkpoint are already stored
+    read_from = start_frame
+    if resume and resume.get("path") == analysis_path and start_frame <= resume["next_frame"] <= last_frame:
+        read_from = resume["next_frame"]
+        summary["frames"], summary["objects"] = resume["frames"], resume["objects"]
+        gate.processed, gate.skipped = resume["processed_frames"], resume["skipped_frames"]
+    if read_from:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, read_from)
+
     db = SessionLocal()
     try:
-        for det in results:
-            db.add(DetectionResult(video_path=video_path, frame=det['frame'], detections=det['objects']))
-        db.commit()
-    except Exception as e:
-        db.rollback()
-        print(f"DB error: {e}")
-        return {"status": "error", "message": str(e)}
+        VideoService(db).delete_detections(
+            video_id,
+            mapping.frame(read_from),
+            mapping.frame(end_frame) if end_frame is not None else None
+        )
     finally:
         db.close()
 
-    # Event detection
-    event_detector = EventDetector()
-    events = event_detector.detect_events(results)
+    def new_writer(first_frame):
+        if settings.detection_storage != "columnar":
+            return None
+        # Unique per run: duplicate videos may still reference an older store
+        return ColumnarDetectionWriter(
+            os.path.join(settings.detection_store_dir, str(video_id), f"{first_frame:010d}-{uuid.uuid4().hex[:8]}"),
+            fps,
+            settings.detection_bbox_scale
+        )
+
+    def seal(current):
+        # Finish a columnar store and add it to the index
+        meta = current.close()
+        db = SessionLocal()
+        try:
+            VideoService(db).register_detection_store(video_id, current.path, meta)
+        finally:
+            db.close()
+
+    writer = new_writer(read_from)
+
+    def detect(frames):
+        # One inference call per batch, results in input order
+        return model.infer_batch(frames)
+
+    strided = None
+    if detect_every_n > 1 or adaptive:
+        strided = StridedDetector(
+            detect,
+            stride=detect_every_n,
+            start_frame=read_from,
+            adaptive=adaptive,
+            min_confidence=settings.tracking_min_confidence,
+            tracker=MultiObjectTracker(
+                iou_threshold=settings.tracking_iou_threshold,
+                max_age=settings.tracking_max_age
+            )
+        )
+
+    last_objects = []
+    last_checkpoint = time.monotonic()
+
+    def infer(batch):
+        kept = [(frame_idx, frame) for frame_idx, frame in batch if gate.should_process(frame)]
+        if not kept:
+            detected = []
+        elif strided is not None:
+            detected = strided(kept)
+        else:
+            detected = [
+                {'frame': frame_idx, 'objects': objects}
+                for (frame_idx, _), objects in zip(kept, detect([frame for _, frame in kept]))
+            ]
 
-    # Store events in DB
+        # Skipped frames stay on the timeline with the previous objects
+        by_frame = {record['frame']: record for record in detected}
+        records = []
+        for frame_idx, _ in batch:
+            record = by_frame.get(frame_idx)
+            if record is None:
+                record = {'frame': frame_idx, 'objects': carry_forward(last_objects)}
+            else:
+                last_objects[:] = record['objects']
+            records.append(record)
+        return records
+
+    def persist(records):
+        # Store detections as each batch comes off the inference stage
+        nonlocal writer, last_checkpoint
+        next_frame = records[-1]['frame'] + 1
+        if not mapping.identity:
+            records = [
+                {'frame': mapping.frame(det['frame']), 'objects': mapping.objects(det['objects'])}
+                for det in records
+            ]
+        if writer is not None:
+            writer.write_batch(records)
+        else:
+            db = SessionLocal()
+            try:
+                VideoService(db).add_detections_bulk(video_id, (
+                    {'frame_number': det['frame'], 'objects': det['objects'], 'timestamp': det['frame'] / fps}
+                    for det in records
+                ))
+            finally:
+                db.close()
+        summary["frames"] += len(records)
+        summary["objects"] += sum(len(det['objects']) for det in records)
+        if on_progress is not None:
+            on_progress(summary["frames"], total_frames)
+
+        stop = should_stop is not None and should_stop()
+        if on_checkpoint is not None and (stop or time.monotonic() - last_checkpoint >= checkpoint_interval):
+            # Columnar stores only count once sealed, so roll over to a new one
+            if writer is not None:
+                seal(writer)
+                writer = new_writer(next_frame)
+            on_checkpoint({
+                "path": analysis_path,
+                "next_frame": next_frame,
+                "frames": summary["frames"],
+                "objects": summary["objects"],
+                "processed_frames": gate.processed,
+                "skipped_frames": gate.skipped
+            })
+            last_checkpoint = time.monotonic()
+        if stop:
+            raise TaskCancelled(f"Stopped before frame {next_frame}")
+
+    pipeline = DetectionPipeline(
+        infer,
+        persist,
+        batch_size=batch_size,
+        max_batch_latency=max_batch_latency,
+        queue_size=settings.pipeline_queue_size
+    )
+    try:
+        stats = pipeline.run(cap, start_frame=read_from, end_frame=end_frame)
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    finally:
+        cap.release()
+
+    if writer is not None:
+        seal(writer)
+
+    elapsed = stats["elapsed_seconds"]
+    summary["fps"] = fps
+    summary["metrics"] = {
+        "frames": stats["frames"],
+        "batch_size": batch_size,
+        "batches": stats["batches"],
+        "mean_batch_size": stats["frames"] / stats["batches"] if stats["batches"] else 0.0,
+        "inference_seconds": stats["stages"]["infer"]["busy_seconds"],
+        "fps": stats["frames"] / elapsed if elapsed > 0 else 0.0,
+        "pipeline": stats,
+        "backend": backend,
+        "model": registry.stats(model_name, model_version, backend)
+    }
+    summary["metrics"]["sampling"] = gate.stats()
+    if strided is not None:
+        summary["metrics"]["tracking"] = strided.stats()
+    return summary
+
+
+def detect_stored_events(video_service: VideoService, video_id: int, detector_params: dict = None) -> list:
+    """Run event detection over a video's stored detections"""
+    event_detector = EventDetector(**(detector_params or {}))
+    if video_service.get_detection_stores(video_id):
+        # Columnar detections go straight into the vectorised detector
+        return event_detector.detect_events_columnar(video_service.iter_detection_arrays(video_id))
+    return event_detector.detect_events(video_service.iter_detections(video_id))
+
+
+def event_rows(events: list, fps: float):
+    """``add_events_bulk`` rows for detected events"""
+    return (
+        {
+            'event_type': event['type'],
+            'frame_number': event['frame'],
+            'timestamp': event['frame'] / fps,
+            'confidence': event['details'].get('conf'),
+            'details': {**event['details'], 'side': event['side']} if 'side' in event else event['details']
+        }
+        for event in events
+    )
+
+
+def event_counts(events: list) -> dict:
+    counts = {}
+    for event in events:
+        counts[event['type']] = counts.get(event['type'], 0) + 1
+    return counts
+
+
+def _detect_and_store_events(
+    video_id: int,
+    fps: float,
+    detector_params: dict = None,
+    source: str = "analysis"
+) -> Tuple[dict, int]:
+    """Run event detection over the stored detections into a new event set.
+
+    A fresh analysis replaces all earlier event sets, since the detections
+    they were derived from are gone; a rescore adds the next version.
+    Returns the counts per event type and the event set version.
+    """
     db = SessionLocal()
     try:
-        for event in events:
-            db.add(EventResult(video_path=video_path, event_type=event['type'], frame=event['frame'], details=event['details']))
-        db.commit()
+        video_service = VideoService(db)
+        events = detect_stored_events(video_service, video_id, detector_params)
+
+        # Store events in DB
+        if source == "analysis":
+            video_service.delete_events(video_id)
+        event_set = video_service.create_event_set(video_id, source, detector_params)
+        written = video_service.add_events_bulk(video_id, event_rows(events, fps), event_set_id=event_set.id)
+        video_service.complete_event_set(event_set, written)
+        version = event_set.version
+    finally:
+        db.close()
+
+    return event_counts(events), version
+
+
+def _completed_summary(
+    video_id: int,
+    frames: int,
+    objects: int,
+    event_counts: dict,
+    metrics: dict,
+    event_set_version: int = None
+) -> dict:
+    """Compact task result; detections and events are paged from the API"""
+    return {
+        "status": "completed",
+        "video_id": video_id,
+        "frames": frames,
+        "objects": objects,
+        "events": sum(event_counts.values()),
+        "event_counts": event_counts,
+        "event_set_version": event_set_version,
+        "skip_ratio": metrics.get("sampling", {}).get("skip_ratio", 0.0),
+        "detections_ref": f"{settings.api_prefix}/videos/{video_id}/detections",
+        "events_ref": f"{settings.api_prefix}/videos/{video_id}/events",
+        "metrics": metrics
+    }
+
+
+def analyse_video(
+    video_path: str,
+    video_id: int,
+    on_progress: Callable[[int, int], Any] = None,
+    resume: Dict[str, Any] = None,
+    on_checkpoint: Callable[[Dict[str, Any]], Any] = None,
+    should_stop: Callable[[], bool] = None,
+    **options
+) -> dict:
+    """Detect objects and events over a whole video in this process.
+
+    The progress, checkpoint and cancellation callbacks are those of
+    ``_detect_frames``; they cannot be sent to Celery, so a caller that
+    needs them (``process_video_task``) runs this directly. Other keyword
+    arguments are passed to ``_detect_frames``.
+    """
+    try:
+        summary = _detect_frames(
+            video_path,
+            video_id,
+            on_progress=on_progress,
+            resume=resume,
+            on_checkpoint=on_checkpoint,
+            should_stop=should_stop,
+            **options
+        )
+    except TaskCancelled as e:
+        return {"status": "cancelled", "video_id": video_id, "message": str(e)}
+    except ValueError as e:
+        print(f"Error: {e} {video_path}")
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        print(f"Pipeline error: {e}")
+        return {"status": "error", "message": str(e)}
+
+    try:
+        event_counts, event_set_version = _detect_and_store_events(video_id, summary["fps"])
     except Exception as e:
-        db.rollback()
         print(f"DB error (events): {e}")
         return {"status": "error", "message": str(e)}
+
+    return _completed_summary(
+        video_id, summary["frames"], summary["objects"], event_counts, summary["metrics"], event_set_version
+    )
+
+
+@celery_app.task
+def process_video_for_detection(
+    video_path: str,
+    video_id: int,
+    batch_size: int = None,
+    max_batch_latency: float = None,
+    model_name: str = None,
+    model_version: str = None,
+    detect_every_n: int = None,
+    adaptive: bool = None,
+    task_type: str = "video_analysis",
+    frame_gating: bool = None,
+    backend: str = None
+):
+    """Detect objects and events over a whole video (see ``analyse_video``)"""
+    return analyse_video(
+        video_path,
+        video_id,
+        batch_size=batch_size,
+        max_batch_latency=max_batch_latency,
+        model_name=model_name,
+        model_version=model_version,
+        detect_every_n=detect_every_n,
+        adaptive=adaptive,
+        task_type=task_type,
+        frame_gating=frame_gating,
+        backend=backend
+    )
+
+
+@celery_app.task
+def generate_video_proxy(video_id: int, video_path: str):
+    """Ingest step: build the analysis proxy for a newly uploaded video"""
+    try:
+        path, mapping = _ensure_proxy(video_id, video_path)
+    except ValueError as e:
+        print(f"Error: {e} {video_path}")
+        return {"status": "error", "message": str(e)}
+    return {
+        "status": "completed",
+        "video_id": video_id,
+        "proxy_path": path if path != video_path else None,
+        "scale": [mapping.scale_x, mapping.scale_y],
+        "frame_ratio": mapping.frame_ratio
+    }
+
+
+def _plan_video_segments(video_path: str, video_id: int, segment_seconds: float = None) -> dict:
+    """Keyframe-aligned frame ranges of the video that is analysed.
+
+    Boundaries are proxy frame numbers, which is what each segment decodes.
+    The container's frame count is only an estimate, so the last range is
+    left open to run to the real end of the stream.
+    """
+    analysis_path, mapping = _ensure_proxy(video_id, video_path)
+    info = probe_video(analysis_path)
+    segment_seconds = segment_seconds or settings.segment_seconds
+    segments = plan_segments(
+        info["frame_count"],
+        max(1, int(segment_seconds * info["fps"])),
+        keyframe_indices(analysis_path, info["fps"])
+    )
+    return {
+        "ranges": segments[:-1] + [(segments[-1][0], None)],
+        "frame_count": info["frame_count"],
+        "duration": info["frame_count"] / info["fps"],
+        "fps": info["fps"] * mapping.frame_ratio
+    }
+
+
+def analyse_video_segmented(
+    video_path: str,
+    video_id: int,
+    segment_seconds: float = None,
+    min_seconds: float = 0,
+    task_id: str = None,
+    on_progress: Callable[[int, int], Any] = None,
+    resume: Dict[str, Any] = None,
+    on_checkpoint: Callable[[Dict[str, Any]], Any] = None,
+    should_stop: Callable[[], bool] = None,
+    **options
+) -> dict:
+    """Split a video into keyframe-aligned segments analysed in parallel.
+
+    Segments are dispatched as a chord of ``detect_segment`` tasks; once all
+    of them have stored their detections ``merge_segments`` runs event
+    detection over the whole match. Extra keyword arguments are passed to
+    each segment (batch size, model name/version, backend).
+
+    With ``task_id`` the segments report to that ``ProcessingTask`` and
+    ``merge_segments`` completes it. A video shorter than ``min_seconds``,
+    or too short to split, is analysed in a single pass here instead, with
+    the progress, checkpoint and cancellation callbacks.
+    """
+    try:
+        plan = _plan_video_segments(video_path, video_id, segment_seconds)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+
+    if len(plan["ranges"]) <= 1 or plan["duration"] < min_seconds:
+        return analyse_video(
+            video_path,
+            video_id,
+            on_progress=on_progress,
+            resume=resume,
+            on_checkpoint=on_checkpoint,
+            should_stop=should_stop,
+            **options
+        )
+
+    header = group(
+        detect_segment.s(
+            video_path, video_id, start, end, task_id=task_id, total_frames=plan["frame_count"], **options
+        )
+        for start, end in plan["ranges"]
+    )
+    result = chord(header)(merge_segments.s(video_id, plan["fps"], task_id=task_id))
+    return {
+        "status": "dispatched",
+        "video_id": video_id,
+        "segments": len(plan["ranges"]),
+        "merge_task_id": result.id
+    }
+
+
+@celery_app.task
+def process_video_segmented(
+    video_path: str,
+    video_id: int,
+    segment_seconds: float = None,
+    min_seconds: float = 0,
+    task_id: str = None,
+    **options
+):
+    """Analyse a video as parallel segments (see ``analyse_video_segmented``)"""
+    return analyse_video_segmented(
+        video_path, video_id, segment_seconds=segment_seconds, min_seconds=min_seconds, task_id=task_id, **options
+    )
+
+
+# Late acks: a segment whose worker dies is redelivered and resumes from
+# its checkpoint
+@celery_app.task(acks_late=True, reject_on_worker_lost=True)
+def detect_segment(
+    video_path: str,
+    video_id: int,
+    start_frame: int,
+    end_frame: int = None,
+    task_id: str = None,
+    total_frames: int = None,
+    **options
+):
+    """Detect objects on one segment of a video and store them.
+
+    With ``task_id`` the segment adds its frames to the task's progress
+    (out of ``total_frames``), stops at a batch boundary once the task is
+    cancelled and checkpoints under its start frame, continuing from that
+    checkpoint when it runs again. Failures are returned rather than raised
+    so ``merge_segments`` still runs and can mark the task failed.
+    """
+    reporter = ProgressReporter(task_id) if task_id else None
+    callbacks = {}
+    if reporter is not None:
+        if reporter.should_stop():
+            return {"status": "cancelled", "start_frame": start_frame}
+        segment = str(start_frame)
+        resume = (reporter.load_checkpoint() or {}).get("segments", {}).get(segment)
+        counted = resume["frames"] if resume else 0
+
+        def on_progress(done, total):
+            nonlocal counted
+            reporter.add_frames(done - counted, total_frames or total)
+            counted = done
+
+        callbacks = {
+            "on_progress": on_progress,
+            "resume": resume,
+            "on_checkpoint": lambda state: reporter.save_checkpoint(state, segment=segment),
+            "should_stop": reporter.should_stop
+        }
+
+    try:
+        summary = _detect_frames(
+            video_path, video_id, start_frame=start_frame, end_frame=end_frame, **callbacks, **options
+        )
+    except TaskCancelled:
+        return {"status": "cancelled", "start_frame": start_frame}
+    except Exception as e:
+        print(f"Segment error: {e}")
+        return {"status": "error", "start_frame": start_frame, "message": str(e)}
+    return {
+        "status": "completed",
+        "start_frame": start_frame,
+        "frames": summary["frames"],
+        "objects": summary["objects"],
+        "metrics": summary["metrics"]
+    }
+
+
+@celery_app.task
+def merge_segments(segment_results: list, video_id: int, fps: float, task_id: str = None):
+    """Detect events across all stored segment detections.
+
+    The stored detections are streamed back in frame order and event
+    detection runs once over the combined stream, so trajectories and
+    debounce windows carry across segment boundaries exactly as they would
+    in a single pass. With ``task_id`` the result, or the first segment's
+    error, is written to the task; a cancelled task is left as it is.
+    """
+    reporter = ProgressReporter(task_id) if task_id else None
+    segment_results = sorted(segment_results, key=lambda segment: segment["start_frame"])
+
+    if any(segment.get("status") == "cancelled" for segment in segment_results):
+        return {"status": "cancelled", "video_id": video_id}
+    failed = [segment for segment in segment_results if segment.get("status") == "error"]
+    if failed:
+        result = {
+            "status": "error",
+            "message": f"Segment at frame {failed[0]['start_frame']} failed: {failed[0]['message']}"
+        }
+        if reporter is not None:
+            reporter.fail(result["message"], result)
+        return result
+
+    try:
+        event_counts, event_set_version = _detect_and_store_events(video_id, fps)
+    except Exception as e:
+        print(f"DB error (events): {e}")
+        result = {"status": "error", "message": str(e)}
+        if reporter is not None:
+            reporter.fail(result["message"], result)
+        return result
+
+    frames = sum(segment["frames"] for segment in segment_results)
+    skipped = sum(segment["metrics"].get("sampling", {}).get("skipped_frames", 0) for segment in segment_results)
+    result = _completed_summary(
+        video_id,
+        frames,
+        sum(segment["objects"] for segment in segment_results),
+        event_counts,
+        {
+            "segments": [segment["metrics"] for segment in segment_results],
+            "sampling": {"skipped_frames": skipped, "skip_ratio": skipped / frames if frames else 0.0}
+        },
+        event_set_version
+    )
+    if reporter is not None:
+        reporter.complete(result)
+    return result
+
+
+@celery_app.task
+def rescore_events(video_id: int, detector_params: dict = None):
+    """Re-run only event detection, with new detector parameters, over stored detections.
+
+    No frames are decoded and no model runs; the result is a new event set
+    version alongside the earlier ones.
+    """
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        video = VideoService(db).get_video(video_id)
+        if video is None:
+            return {"status": "error", "message": f"Video {video_id} not found"}
+        fps = video.fps
+        video_path = video.file_path
     finally:
         db.close()
 
-    return {"status": "completed", "detections": results, "events": events}
+    try:
+        fps = fps or probe_video(video_path)["fps"]
+        event_counts, event_set_version = _detect_and_store_events(
+            video_id, fps, detector_params, source="rescore"
+        )
+    except (TypeError, ValueError) as e:
+        print(f"Error (rescore): {e}")
+        return {"status": "error", "message": str(e)}
+
+    return {
+        "status": "completed",
+        "video_id": video_id,
+        "event_set_version": event_set_version,
+        "events": sum(event_counts.values()),
+        "event_counts": event_counts,
+        "detector_params": detector_params or {},
+        "events_ref": f"{settings.api_prefix}/videos/{video_id}/events?version={event_set_version}",
+        "elapsed_seconds": time.perf_counter() - started
+    }
+
+
+@celery_app.task
+def backfill_events(detector_params: dict = None, run_id: str = None, workers: int = None):
+    """Re-derive events for every analysed video (see ``cv_models.backfill``).
+
+    Celery's prefork workers are daemonic and cannot start a process pool,
+    so the backfill runs as its own process.
+    """
+    command = [sys.executable, "-m", "cv_models.backfill", "--params", json.dumps(detector_params or {})]
+    if run_id:
+        command += ["--run-id", run_id]
+    if workers:
+        command += ["--workers", str(workers)]
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        result = subprocess.run(command, cwd=backend_dir, capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError as e:
+        print(f"Error (backfill): {e.stderr}")
+        return {"status": "error", "message": e.stderr.strip().splitlines()[-1] if e.stderr.strip() else str(e)}
+    # The summary is the last line of output
+    return json.loads(result.stdout.strip().splitlines()[-1])
 
 
 @celery_app.task(bind=True)
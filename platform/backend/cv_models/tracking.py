@@ -0,0 +1,242 @@
+"""
+Lightweight multi-object tracking for detect-every-N-frames analysis.
+
+Players and the ball move smoothly between frames, so the detector only
+needs to run on some of them. A constant-velocity Kalman filter per object
+carries boxes through the frames in between, and greedy IoU association
+links each detection to a track so objects keep a stable ``track_id``.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+
+# State is (cx, cy, w, h, vx, vy, vw, vh); only the box is observed
+_F = np.eye(8)
+_F[:4, 4:] = np.eye(4)
+_H = np.eye(4, 8)
+
+
+def _to_state(bbox) -> np.ndarray:
+    x1, y1, x2, y2 = bbox
+    return np.array([(x1 + x2) / 2.0, (y1 + y2) / 2.0, x2 - x1, y2 - y1], dtype=np.float64)
+
+
+def _to_bbox(state: np.ndarray) -> List[float]:
+    cx, cy, w, h = state[:4]
+    w, h = max(w, 0.0), max(h, 0.0)
+    return [cx - w / 2.0, cy - h / 2.0, cx + w / 2.0, cy + h / 2.0]
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of two ``(n, 4)`` arrays of xyxy boxes"""
+    if not len(boxes_a) or not len(boxes_b):
+        return np.zeros((len(boxes_a), len(boxes_b)))
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    width = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    height = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    intersection = width * height
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+class _Track:
+    """Constant-velocity Kalman filter over one object's box"""
+
+    def __init__(self, track_id: int, obj: Dict[str, Any]):
+        self.track_id = track_id
+        self.obj = obj
+        self.frames_since_update = 0
+        self.x = np.zeros(8)
+        self.x[:4] = _to_state(obj['bbox'])
+        scale = max(self.x[2], self.x[3], 1e-6)
+        # Velocity is unknown at birth
+        self.P = np.diag([scale, scale, scale, scale, 10 * scale, 10 * scale, 10 * scale, 10 * scale]) ** 2 / 100
+        self._scale = scale
+
+    def predict(self) -> None:
+        q = (self._scale / 20) ** 2
+        self.x = _F @ self.x
+        self.P = _F @ self.P @ _F.T + np.diag([q, q, q, q, q / 4, q / 4, q / 4, q / 4])
+        self.frames_since_update += 1
+
+    def update(self, obj: Dict[str, Any]) -> None:
+        z = _to_state(obj['bbox'])
+        self._scale = max(z[2], z[3], 1e-6)
+        r = (self._scale / 10) ** 2
+        innovation = z - _H @ self.x
+        S = _H @ self.P @ _H.T + np.eye(4) * r
+        K = self.P @ _H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ innovation
+        self.P = (np.eye(8) - K @ _H) @ self.P
+        self.obj = obj
+        self.frames_since_update = 0
+
+    @property
+    def bbox(self) -> List[float]:
+        return _to_bbox(self.x)
+
+
+class MultiObjectTracker:
+    """Greedy IoU association of detections to Kalman tracks, per class"""
+
+    def __init__(self, iou_threshold: float = 0.3, max_age: int = 30, confidence_decay: float = 0.95):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.confidence_decay = confidence_decay
+        self.tracks: List[_Track] = []
+        self.match_ratio = 1.0
+        self._next_id = 1
+
+    @property
+    def confidence(self) -> float:
+        """How much the current predictions can be trusted, from 0 to 1.
+
+        Falls with every frame since the last detection, and starts lower
+        when that detection did not line up with the existing tracks.
+        """
+        frames = min((track.frames_since_update for track in self.tracks), default=0)
+        return self.match_ratio * self.confidence_decay ** frames
+
+    def update(self, objects: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Advance one frame and correct the tracks with its detections.
+
+        Returns the detections, each with its ``track_id``.
+        """
+        for track in self.tracks:
+            track.predict()
+
+        boxed = [i for i, obj in enumerate(objects) if obj.get('bbox') is not None]
+        matches = self._associate([objects[i] for i in boxed])
+        matched_tracks = set()
+        results = [dict(obj) for obj in objects]
+        for det_pos, track_pos in matches:
+            track = self.tracks[track_pos]
+            track.update(objects[boxed[det_pos]])
+            results[boxed[det_pos]]['track_id'] = track.track_id
+            matched_tracks.add(track_pos)
+
+        matched_dets = {det_pos for det_pos, _ in matches}
+        tracks_before = len(self.tracks)
+        for det_pos, index in enumerate(boxed):
+            if det_pos not in matched_dets:
+                track = _Track(self._next_id, objects[index])
+                self._next_id += 1
+                self.tracks.append(track)
+                results[index]['track_id'] = track.track_id
+
+        expected = max(tracks_before, len(boxed))
+        self.match_ratio = len(matches) / expected if expected else 1.0
+        self._expire()
+        return results
+
+    def predict(self) -> List[Dict[str, Any]]:
+        """Advance one frame without a detection; returns the predicted objects"""
+        for track in self.tracks:
+            track.predict()
+        self._expire()
+        results = []
+        for track in self.tracks:
+            conf = track.obj.get('conf')
+            results.append({
+                **track.obj,
+                'conf': conf * self.confidence_decay ** track.frames_since_update if conf is not None else None,
+                'bbox': track.bbox,
+                'track_id': track.track_id,
+                'tracked': True
+            })
+        return results
+
+    def _associate(self, objects: List[Dict[str, Any]]) -> List[tuple]:
+        """Greedy highest-IoU-first matching between same-class pairs"""
+        if not objects or not self.tracks:
+            return []
+        det_boxes = np.array([obj['bbox'] for obj in objects], dtype=np.float64)
+        track_boxes = np.array([track.bbox for track in self.tracks], dtype=np.float64)
+        iou = iou_matrix(det_boxes, track_boxes)
+        same_class = (
+            np.array([obj['class'] for obj in objects], dtype=object)[:, None]
+            == np.array([track.obj['class'] for track in self.tracks], dtype=object)[None, :]
+        )
+        iou[~same_class] = 0.0
+
+        matches = []
+        used_dets, used_tracks = set(), set()
+        for flat in np.argsort(-iou, axis=None):
+            det_pos, track_pos = np.unravel_index(flat, iou.shape)
+            if iou[det_pos, track_pos] < self.iou_threshold:
+                break
+            if det_pos in used_dets or track_pos in used_tracks:
+                continue
+            matches.append((int(det_pos), int(track_pos)))
+            used_dets.add(det_pos)
+            used_tracks.add(track_pos)
+        return matches
+
+    def _expire(self) -> None:
+        self.tracks = [track for track in self.tracks if track.frames_since_update <= self.max_age]
+
+
+class StridedDetector:
+    """Run the detector on every ``stride``-th frame and track in between.
+
+    ``detect`` takes a list of frames and returns one list of object dicts
+    per frame. Scheduled keyframes of a batch go to the detector in one
+    call; with ``adaptive`` an in-between frame is also detected when the
+    tracker's confidence drops below ``min_confidence``.
+    """
+
+    def __init__(
+        self,
+        detect: Callable[[List[Any]], List[List[Dict[str, Any]]]],
+        stride: int,
+        start_frame: int = 0,
+        adaptive: bool = False,
+        min_confidence: float = 0.5,
+        tracker: Optional[MultiObjectTracker] = None
+    ):
+        self.detect = detect
+        self.stride = max(stride, 1)
+        self.start_frame = start_frame
+        self.adaptive = adaptive
+        self.min_confidence = min_confidence
+        self.tracker = tracker or MultiObjectTracker()
+        self.detected_frames = 0
+        self.tracked_frames = 0
+        self.detector_calls = 0
+
+    def __call__(self, batch: List[tuple]) -> List[Dict[str, Any]]:
+        """Turn ``(frame_idx, frame)`` pairs into ``{'frame', 'objects'}`` records"""
+        keyframes = [i for i, (frame_idx, _) in enumerate(batch) if (frame_idx - self.start_frame) % self.stride == 0]
+        detections = {}
+        if keyframes:
+            detections = dict(zip(keyframes, self._detect([batch[i][1] for i in keyframes])))
+
+        records = []
+        for i, (frame_idx, frame) in enumerate(batch):
+            if i not in detections and self.adaptive and self.tracker.confidence < self.min_confidence:
+                detections[i] = self._detect([frame])[0]
+            if i in detections:
+                objects = self.tracker.update(detections[i])
+                self.detected_frames += 1
+            else:
+                objects = self.tracker.predict()
+                self.tracked_frames += 1
+            records.append({'frame': frame_idx, 'objects': objects})
+        return records
+
+    def _detect(self, frames: List[Any]) -> List[List[Dict[str, Any]]]:
+        self.detector_calls += 1
+        return self.detect(frames)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.detected_frames + self.tracked_frames
+        return {
+            "stride": self.stride,
+            "adaptive": self.adaptive,
+            "detected_frames": self.detected_frames,
+            "tracked_frames": self.tracked_frames,
+            "detector_calls": self.detector_calls,
+            "detected_ratio": self.detected_frames / total if total else 0.0
+        }
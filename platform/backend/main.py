@@ -5,8 +5,9 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.api import videos, tasks
+from app.core.database import async_engine, engine, Base
+from app.api import videos, tasks, uploads, detect
+from app.services.task_events import broadcaster
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -35,12 +36,32 @@ app.include_router(
     tags=["videos"]
 )
 
+app.include_router(
+    uploads.router,
+    prefix=f"{settings.api_prefix}/uploads",
+    tags=["uploads"]
+)
+
 app.include_router(
     tasks.router,
     prefix=f"{settings.api_prefix}/tasks",
     tags=["tasks"]
 )
 
+app.include_router(
+    detect.router,
+    prefix=f"{settings.api_prefix}/detect",
+    tags=["detect"]
+)
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    """Stop the single-frame inference worker and the task event subscription, and close async connections"""
+    detect.shutdown_inference_server()
+    await broadcaster.stop()
+    await async_engine.dispose()
+
 
 @app.get("/")
 async def root():
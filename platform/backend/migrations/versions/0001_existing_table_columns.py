@@ -0,0 +1,120 @@
+"""Add the columns and indexes create_all cannot add to existing tables
+
+Databases created before content-addressed uploads, proxies, task
+checkpoints and duplicate-submission detection have ``videos``,
+``processing_tasks``, ``detections`` and ``events`` tables without the
+newer columns, and ``create_all`` never alters a table that exists. New
+tables (upload sessions, detection stores, event sets, backfill runs) are
+still created by ``create_all``.
+
+Every step checks the live schema first, so upgrading a database that
+``create_all`` built from the current models is a no-op.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+IN_FLIGHT = sa.text("status IN ('pending', 'queued', 'running')")
+
+COLUMNS = {
+    "videos": [
+        sa.Column("content_hash", sa.String()),
+        sa.Column("width", sa.Integer()),
+        sa.Column("height", sa.Integer()),
+        sa.Column("fps", sa.Float()),
+        sa.Column("proxy_path", sa.String(), nullable=True),
+        sa.Column("proxy_width", sa.Integer()),
+        sa.Column("proxy_height", sa.Integer()),
+        sa.Column("proxy_fps", sa.Float()),
+    ],
+    "processing_tasks": [
+        sa.Column("model_name", sa.String()),
+        sa.Column("model_version", sa.String()),
+        sa.Column("cache_key", sa.String()),
+        sa.Column("parameters", sa.JSON()),
+        sa.Column("params_hash", sa.String()),
+        sa.Column("idempotency_key", sa.String()),
+        sa.Column("checkpoint", sa.JSON(none_as_null=True)),
+    ],
+    "events": [
+        sa.Column("event_set_id", sa.Integer(), nullable=True),
+    ],
+}
+
+# (table, name, columns, options)
+INDEXES = [
+    ("videos", "ix_videos_content_hash", ["content_hash"], {}),
+    ("processing_tasks", "ix_processing_tasks_cache_key", ["cache_key"], {}),
+    # ``unique=True`` on the model; a unique index behaves the same and SQLite can add it
+    ("processing_tasks", "uq_processing_tasks_idempotency_key", ["idempotency_key"], {"unique": True}),
+    (
+        "processing_tasks", "uq_processing_tasks_in_flight", ["video_id", "task_type", "params_hash"],
+        {"unique": True, "postgresql_where": IN_FLIGHT, "sqlite_where": IN_FLIGHT},
+    ),
+    ("detections", "ix_detections_video_frame", ["video_id", "frame_number"], {}),
+    ("events", "ix_events_event_set_id", ["event_set_id"], {}),
+    ("events", "ix_events_video_frame", ["video_id", "frame_number"], {}),
+]
+
+
+def _existing_columns(inspector, table):
+    return {column["name"] for column in inspector.get_columns(table)}
+
+
+def _existing_indexes(inspector, table):
+    """Names and column lists of a table's indexes and unique constraints"""
+    # Columns declared ``unique=True`` are constraints, unnamed on SQLite
+    found = inspector.get_indexes(table) + inspector.get_unique_constraints(table)
+    return {index["name"] for index in found}, {tuple(index["column_names"]) for index in found}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    for table, columns in COLUMNS.items():
+        if table not in tables:
+            continue
+        existing = _existing_columns(inspector, table)
+        for column in columns:
+            if column.name not in existing:
+                op.add_column(table, column)
+
+    for table, name, columns, options in INDEXES:
+        if table not in tables:
+            continue
+        names, column_lists = _existing_indexes(sa.inspect(bind), table)
+        if name not in names and tuple(columns) not in column_lists:
+            op.create_index(name, table, columns, **options)
+
+    # Files over 2 GB; SQLite integers are already 64-bit
+    if "videos" in tables and bind.dialect.name != "sqlite":
+        op.alter_column("videos", "file_size", type_=sa.BigInteger(), existing_type=sa.Integer())
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    for table, name, columns, options in reversed(INDEXES):
+        if table in tables and name in _existing_indexes(inspector, table)[0]:
+            op.drop_index(name, table_name=table)
+
+    for table, columns in COLUMNS.items():
+        if table not in tables:
+            continue
+        existing = _existing_columns(inspector, table)
+        with op.batch_alter_table(table) as batch:
+            for column in columns:
+                if column.name in existing:
+                    batch.drop_column(column.name)
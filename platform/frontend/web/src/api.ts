@@ -11,6 +11,10 @@ export interface Video {
   status: string;
   file_size?: number;
   content_type?: string;
+  width?: number;
+  height?: number;
+  fps?: number;
+  proxy_path?: string | null;
   created_at: string;
   updated_at: string;
 }
@@ -34,6 +38,17 @@ export interface Detection {
   created_at: string;
 }
 
+export interface UploadProgress {
+  upload_id: string;
+  status: string;
+  total_size: number;
+  chunk_size: number;
+  received_bytes: number;
+  offset: number;
+  missing_chunks: number[];
+  video_id?: number;
+}
+
 export interface Event {
   id: number;
   video_id: number;
@@ -95,6 +110,61 @@ export class ApiService {
     });
   }
 
+  // Resumable upload: chunks are sent in parallel and retried individually,
+  // and an interrupted upload can be resumed by passing its upload_id back in.
+  static async uploadVideoResumable(
+    file: File,
+    onProgress?: (receivedBytes: number, totalBytes: number) => void,
+    parallel = 4,
+    uploadId?: string
+  ): Promise<{ id: number; filename: string; status: string; message: string }> {
+    const session: UploadProgress = uploadId
+      ? await this.request(`/uploads/${uploadId}`)
+      : await this.request('/uploads/', {
+          method: 'POST',
+          body: JSON.stringify({
+            filename: file.name,
+            total_size: file.size,
+            content_type: file.type,
+          }),
+        });
+
+    const pending = [...session.missing_chunks];
+    let received = session.received_bytes;
+    onProgress?.(received, file.size);
+
+    const sendChunk = async (index: number) => {
+      const start = index * session.chunk_size;
+      const end = Math.min(start + session.chunk_size, file.size) - 1;
+      for (let attempt = 0; ; attempt++) {
+        try {
+          await this.request(`/uploads/${session.upload_id}`, {
+            method: 'PUT',
+            headers: {
+              'Content-Type': 'application/octet-stream',
+              'Content-Range': `bytes ${start}-${end}/${file.size}`,
+            },
+            body: file.slice(start, end + 1),
+          });
+          break;
+        } catch (err) {
+          if (attempt >= 2) throw err;
+        }
+      }
+      received += end - start + 1;
+      onProgress?.(received, file.size);
+    };
+
+    const worker = async () => {
+      for (let index = pending.shift(); index !== undefined; index = pending.shift()) {
+        await sendChunk(index);
+      }
+    };
+    await Promise.all(Array.from({ length: parallel }, worker));
+
+    return this.request(`/uploads/${session.upload_id}/complete`, { method: 'POST' });
+  }
+
   static async getVideos(skip = 0, limit = 100, status?: string): Promise<{ videos: Video[]; count: number }> {
     const params = new URLSearchParams({
       skip: skip.toString(),
@@ -112,9 +182,27 @@ export class ApiService {
     return this.request(`/videos/${videoId}`);
   }
 
-  static async processVideo(videoId: number, processType = 'analysis'): Promise<{ task_id: string; status: string; message: string }> {
+  // Low-resolution proxy (falls back to the original) for playback and annotation
+  static getVideoProxyUrl(videoId: number): string {
+    return `${API_BASE_URL}/videos/${videoId}/proxy`;
+  }
+
+  static getVideoThumbnailUrl(videoId: number, frame = 0, width = 320): string {
+    return `${API_BASE_URL}/videos/${videoId}/thumbnail?frame=${frame}&width=${width}`;
+  }
+
+  // Retrying with the same idempotency key returns the original task
+  static async processVideo(
+    videoId: number,
+    processType = 'analysis',
+    idempotencyKey?: string
+  ): Promise<{ task_id: string; status: string; message: string }> {
     return this.request(`/videos/${videoId}/process`, {
       method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        ...(idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {}),
+      },
       body: JSON.stringify({ process_type: processType }),
     });
   }
@@ -143,6 +231,41 @@ export class ApiService {
     return this.request(`/videos/${videoId}/events${query}`);
   }
 
+  // Re-run event detection over stored detections; creates a new event set version
+  static async rescoreVideo(
+    videoId: number,
+    detectorParams: Record<string, number> = {},
+    idempotencyKey?: string
+  ): Promise<{ task_id: string; status: string; message: string }> {
+    return this.request(`/videos/${videoId}/rescore`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        ...(idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {}),
+      },
+      body: JSON.stringify(detectorParams),
+    });
+  }
+
+  static async getVideoEventSets(videoId: number): Promise<{ video_id: number; event_sets: any[] }> {
+    return this.request(`/videos/${videoId}/event-sets`);
+  }
+
+  // Detect objects on a single frame (e.g. a canvas snapshot); answered
+  // by the micro-batching inference server. Rejected with 429 when busy.
+  static async detectFrame(
+    image: Blob
+  ): Promise<{ width: number; height: number; objects: any[] }> {
+    const formData = new FormData();
+    formData.append('file', image, 'frame.jpg');
+
+    return this.request('/detect/', {
+      method: 'POST',
+      headers: {}, // Remove Content-Type header for FormData
+      body: formData,
+    });
+  }
+
   // Task Management
   static async getTaskStatus(taskId: string): Promise<Task> {
     return this.request(`/tasks/${taskId}`);
@@ -165,9 +288,40 @@ export class ApiService {
     return this.request(`/tasks/?${params.toString()}`);
   }
 
+  // Live task feed: a snapshot of the requested page, then one delta per
+  // changed task (sometimes only task_id and progress). EventSource
+  // reconnects on its own, and every connection starts with a snapshot.
+  static streamTasks(
+    onSnapshot: (tasks: Task[]) => void,
+    onUpdate: (update: Partial<Task> & { task_id: string }) => void,
+    skip = 0,
+    limit = 100,
+    status?: string,
+    taskType?: string
+  ): EventSource {
+    const params = new URLSearchParams({
+      skip: skip.toString(),
+      limit: limit.toString(),
+    });
+
+    if (status) params.append('status_filter', status);
+    if (taskType) params.append('task_type', taskType);
+
+    const source = new EventSource(`${API_BASE_URL}/tasks/stream?${params.toString()}`);
+    source.addEventListener('snapshot', (e) => onSnapshot(JSON.parse((e as MessageEvent).data).tasks));
+    source.addEventListener('task', (e) => onUpdate(JSON.parse((e as MessageEvent).data)));
+    return source;
+  }
+
   static async cancelTask(taskId: string): Promise<{ message: string }> {
     return this.request(`/tasks/${taskId}`, {
       method: 'DELETE',
     });
   }
+
+  static async resumeTask(taskId: string): Promise<{ task_id: string; status: string; progress: number; resumable: boolean }> {
+    return this.request(`/tasks/${taskId}/resume`, {
+      method: 'POST',
+    });
+  }
 }
@@ -39,12 +39,35 @@ const TaskMonitor: React.FC = () => {
     loadTasks();
   }, [loadTasks]);
 
+  // Live updates pushed by the server instead of polling
   useEffect(() => {
     if (!autoRefresh) return;
 
-    const interval = setInterval(loadTasks, 5000); // Refresh every 5 seconds
-    return () => clearInterval(interval);
-  }, [autoRefresh, loadTasks]);
+    const source = ApiService.streamTasks(
+      (snapshot) => {
+        setTasks(snapshot);
+        setTotalCount(snapshot.length);
+      },
+      (update) => {
+        setTasks((current) => {
+          if (current.some((task) => task.task_id === update.task_id)) {
+            return current.map((task) => (task.task_id === update.task_id ? { ...task, ...update } : task));
+          }
+          // A new task belongs at the top of the first page
+          if (currentPage === 0 && update.created_at && (!statusFilter || update.status === statusFilter)) {
+            return [update as Task, ...current].slice(0, pageSize);
+          }
+          return current;
+        });
+        setSelectedTask((current) => (current?.task_id === update.task_id ? { ...current, ...update } : current));
+      },
+      currentPage * pageSize,
+      pageSize,
+      statusFilter || undefined,
+      typeFilter || undefined
+    );
+    return () => source.close();
+  }, [autoRefresh, currentPage, statusFilter, typeFilter]);
 
   const handleTaskSelect = async (taskId: string) => {
     try {
@@ -65,6 +88,16 @@ const TaskMonitor: React.FC = () => {
     }
   };
 
+  const handleResumeTask = async (taskId: string) => {
+    try {
+      await ApiService.resumeTask(taskId);
+      setSelectedTask(null);
+      await loadTasks();
+    } catch (err) {
+      setError(err instanceof Error ? err.message : 'Failed to resume task');
+    }
+  };
+
   const formatDate = (dateString: string): string => {
     return new Date(dateString).toLocaleString();
   };
@@ -107,7 +140,7 @@ const TaskMonitor: React.FC = () => {
                 checked={autoRefresh}
                 onChange={(e) => setAutoRefresh(e.target.checked)}
               />
-              Auto-refresh (5s)
+              Live updates
             </label>
             
             <select
@@ -220,6 +253,18 @@ const TaskMonitor: React.FC = () => {
                     🚫 Cancel
                   </button>
                 )}
+
+                {(task.status === 'failed' || task.status === 'cancelled') && (
+                  <button
+                    className="resume-btn"
+                    onClick={(e) => {
+                      e.stopPropagation();
+                      handleResumeTask(task.task_id);
+                    }}
+                  >
+                    ▶️ Resume
+                  </button>
+                )}
               </div>
             ))}
           </div>
@@ -342,6 +387,17 @@ const TaskMonitor: React.FC = () => {
                 </button>
               </div>
             )}
+
+            {(selectedTask.status === 'failed' || selectedTask.status === 'cancelled') && (
+              <div className="task-actions">
+                <button
+                  className="resume-btn"
+                  onClick={() => handleResumeTask(selectedTask.task_id)}
+                >
+                  ▶️ Resume Task
+                </button>
+              </div>
+            )}
           </div>
         </div>
       )}
@@ -2,6 +2,8 @@ import React, { useState, useEffect, useCallback } from 'react';
 import { ApiService, Video } from '../api';
 import './VideoManager.css';
 
+const RESUMABLE_UPLOAD_THRESHOLD = 64 * 1024 * 1024;
+
 const VideoManager: React.FC = () => {
   const [videos, setVideos] = useState<Video[]>([]);
   const [loading, setLoading] = useState(false);
@@ -46,10 +48,10 @@ const VideoManager: React.FC = () => {
         return;
       }
       
-      // Check file size (100MB limit)
-      const maxSize = 100 * 1024 * 1024;
+      // Check file size (16GB limit for resumable uploads)
+      const maxSize = 16 * 1024 * 1024 * 1024;
       if (file.size > maxSize) {
-        setError('File size exceeds 100MB limit');
+        setError('File size exceeds 16GB limit');
         return;
       }
       
@@ -64,7 +66,10 @@ const VideoManager: React.FC = () => {
     setUploading(true);
     setError('');
     try {
-      const response = await ApiService.uploadVideo(selectedFile);
+      // Large recordings go through the resumable chunked upload API
+      const response = selectedFile.size > RESUMABLE_UPLOAD_THRESHOLD
+        ? await ApiService.uploadVideoResumable(selectedFile)
+        : await ApiService.uploadVideo(selectedFile);
       console.log('Upload successful:', response);
       setSelectedFile(null);
       
@@ -0,0 +1,90 @@
+import asyncio
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import text
+
+# Use SQLite database for tests
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+# Ensure backend is importable
+backend_path = Path(__file__).parent.parent / "platform" / "backend"
+sys.path.append(str(backend_path))
+
+from main import app  # noqa: E402,F401
+from app.core.database import AsyncSessionLocal, SessionLocal, async_database_url, async_engine  # noqa: E402
+from app.models.video import ProcessingTask, Video  # noqa: E402
+from app.services.task_service import AsyncTaskService  # noqa: E402
+from app.services.video_service import AsyncVideoService  # noqa: E402
+
+SLOW_QUERY = text("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 3000000) SELECT count(*) FROM c")
+
+
+def test_async_database_url_picks_async_drivers():
+    assert async_database_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert async_database_url("postgresql+psycopg2://u@db/app") == "postgresql+asyncpg://u@db/app"
+    assert async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+
+
+def test_async_services_read_and_write():
+    db = SessionLocal()
+    try:
+        video = Video(filename=f"{uuid.uuid4().hex}.mp4", original_name="match.mp4", file_path="/nonexistent.mp4")
+        db.add(video)
+        db.commit()
+        task_id = str(uuid.uuid4())
+        db.add(ProcessingTask(task_id=task_id, video_id=video.id, task_type="analysis", status="running"))
+        db.commit()
+        video_id = video.id
+    finally:
+        db.close()
+
+    async def scenario():
+        async with AsyncSessionLocal() as session:
+            assert (await AsyncVideoService(session).get_video(video_id)).original_name == "match.mp4"
+            assert await AsyncVideoService(session).get_detections(video_id) == []
+            service = AsyncTaskService(session)
+            assert (await service.get_task(task_id)).status == "running"
+            assert task_id in [task.task_id for task in await service.get_tasks(status="running")]
+            assert await service.cancel_task(task_id) is True
+            assert await service.cancel_task(task_id) is False
+        await async_engine.dispose()
+
+    asyncio.run(scenario())
+
+    db = SessionLocal()
+    try:
+        assert db.query(ProcessingTask).filter(ProcessingTask.task_id == task_id).first().status == "cancelled"
+    finally:
+        db.close()
+
+
+def test_slow_query_does_not_block_the_event_loop():
+    async def scenario():
+        gaps = []
+
+        async def ticker(done):
+            last = time.perf_counter()
+            while not done.is_set():
+                await asyncio.sleep(0.005)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        done = asyncio.Event()
+        ticks = asyncio.create_task(ticker(done))
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as session:
+            assert (await session.execute(SLOW_QUERY)).scalar() == 3000000
+        elapsed = time.perf_counter() - started
+        done.set()
+        await ticks
+        await async_engine.dispose()
+        return elapsed, max(gaps)
+
+    elapsed, longest_gap = asyncio.run(scenario())
+    # The loop kept running other work for the whole query
+    assert longest_gap < elapsed / 2
@@ -0,0 +1,133 @@
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Use SQLite database for tests
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+# Ensure backend is importable
+backend_path = Path(__file__).parent.parent / "platform" / "backend"
+sys.path.append(str(backend_path))
+
+from cv_models.backends import FakeBackend, OnnxBackend, create_backend, letterbox  # noqa: E402
+from cv_models.registry import ModelRegistry  # noqa: E402
+
+
+def _frame():
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    frame[100:108, 50:58] = 255  # ball
+    frame[20:60, 200:220] = (0, 200, 0)  # player
+    return frame
+
+
+def test_fake_backend_is_deterministic():
+    backend = create_backend("fake", "fake")
+    first, second = backend.infer_batch([_frame(), _frame()])
+    assert first == second
+    assert first == [
+        {"class": "ball", "conf": 0.9, "bbox": [50.0, 100.0, 58.0, 108.0]},
+        {"class": "player", "conf": 0.9, "bbox": [200.0, 20.0, 220.0, 60.0]},
+    ]
+    assert backend.infer_batch([]) == []
+
+
+def test_registry_loads_and_warms_backends_once():
+    loads = []
+
+    def loader(name, backend, version):
+        loads.append((name, backend, version))
+        return FakeBackend(name, version=version).load()
+
+    registry = ModelRegistry(max_models=1, loader=loader, warmup_shape=(32, 32, 3))
+    assert registry.get("m", "1", "fake") is registry.get("m", "1", "fake")
+    registry.get("m", "1", "other")
+    assert loads == [("m", "fake", "1"), ("m", "other", "1")]
+    assert registry.stats("m", "1", "fake")["evictions"] == 1
+    assert "m@1/other" in registry.stats()
+
+
+def test_model_versions_load_their_own_weights(tmp_path, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "model_weights_dir", str(tmp_path))
+    (tmp_path / "2").mkdir()
+    (tmp_path / "2" / "yolov8n.pt").write_bytes(b"weights")
+
+    registry = ModelRegistry(max_models=2, warmup_shape=(32, 32, 3))
+    first, second = registry.get("yolov8n.pt", "1", "fake"), registry.get("yolov8n.pt", "2", "fake")
+    assert first is not second
+    assert first.weights == "yolov8n.pt"
+    assert second.weights == str(tmp_path / "2" / "yolov8n.pt")
+    assert OnnxBackend("yolov8n.pt", version="2").model_path != OnnxBackend("yolov8n.pt", version="1").model_path
+
+
+def test_slow_load_does_not_block_other_models():
+    import threading
+
+    started, release = threading.Event(), threading.Event()
+    loads = []
+
+    def loader(name, backend, version):
+        loads.append(name)
+        if name == "slow":
+            started.set()
+            assert release.wait(5)
+        return FakeBackend(name).load()
+
+    registry = ModelRegistry(max_models=3, loader=loader, warmup_shape=(32, 32, 3))
+    cached = registry.get("cached", "1", "fake")
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("slow", "1", "fake"))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    # The slow load is in progress; a cached model is still served at once
+    assert started.wait(5)
+    assert registry.get("cached", "1", "fake") is cached
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(results) == 2 and results[0] is results[1]
+    assert loads == ["cached", "slow"]
+
+
+def test_failed_load_is_retried():
+    attempts = []
+
+    def loader(name, backend, version):
+        attempts.append(name)
+        if len(attempts) == 1:
+            raise OSError("weights missing")
+        return FakeBackend(name).load()
+
+    registry = ModelRegistry(loader=loader, warmup_shape=(32, 32, 3))
+    with pytest.raises(OSError):
+        registry.get("m", "1", "fake")
+    assert registry.get("m", "1", "fake").model_name == "m"
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_backend("yolov8n.pt", "tensorrt")
+
+
+def test_onnx_postprocess_maps_boxes_back_to_the_frame():
+    backend = OnnxBackend("yolov8n.pt", model_path="unused.onnx", imgsz=64)
+    backend.names = {0: "ball", 1: "player"}
+    _, ratio, pad = letterbox(np.zeros((32, 64, 3), dtype=np.uint8), 64)
+    assert (ratio, pad) == (1.0, (0, 16))
+
+    # Two overlapping players and one ball, as (cx, cy, w, h, score per class) anchors
+    anchors = np.array([
+        [20, 30, 10, 10, 0.0, 0.9],
+        [21, 30, 10, 10, 0.0, 0.8],
+        [40, 40, 4, 4, 0.6, 0.0],
+        [10, 10, 4, 4, 0.1, 0.1],
+    ], dtype=np.float32)
+    objects = backend._postprocess(anchors.T, ratio, pad, (32, 64))
+    assert [obj["class"] for obj in objects] == ["player", "ball"]
+    assert objects[0]["bbox"] == [15.0, 9.0, 25.0, 19.0]
+    assert objects[1]["bbox"] == pytest.approx([38.0, 22.0, 42.0, 26.0])
@@ -0,0 +1,72 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Use SQLite database for tests
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+# Ensure backend is importable
+backend_path = Path(__file__).parent.parent / "platform" / "backend"
+sys.path.append(str(backend_path))
+
+from app.core import celery_app as celery_module  # noqa: E402
+from app.core.celery_app import celery_app, queue_stats, route_task, worker_argv  # noqa: E402
+
+
+class FakeBroker:
+    def __init__(self, lists):
+        self.lists = lists
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    def lrange(self, key, start, end):
+        return list(self.lists.get(key, []))
+
+
+def test_tasks_route_to_queues_by_latency_class():
+    process = "app.services.celery_tasks.process_video_task"
+    assert route_task(process, ("t", 1, "rescore", {}), {}, {}) == {"queue": "interactive", "priority": 0}
+    assert route_task(process, ("t", 1, "analysis"), {}, {}) == {"queue": "analysis", "priority": 5}
+    assert route_task(process, (), {"task_type": "training"}, {})["queue"] == "training"
+    assert route_task("cv_models.tasks.backfill_events", (), {}, {}) == {"queue": "analysis", "priority": 9}
+    assert route_task("cv_models.tasks.train_model", (), {}, {})["queue"] == "training"
+    assert route_task("somewhere.else", (), {}, {})["queue"] == "analysis"
+
+
+def test_single_app_registers_all_tasks():
+    celery_app.loader.import_default_modules()
+    assert "app.services.celery_tasks.process_video_task" in celery_app.tasks
+    assert "cv_models.tasks.train_model" in celery_app.tasks
+
+
+def test_worker_argv_uses_queue_profile(monkeypatch):
+    monkeypatch.setitem(
+        celery_module.settings.celery_worker_profiles, "interactive",
+        {"concurrency": 3, "prefetch_multiplier": 2, "time_limit": 60}
+    )
+    argv = worker_argv("interactive")
+    assert argv[:3] == ["worker", "--queues", "interactive"]
+    assert argv[argv.index("--concurrency") + 1] == "3"
+    assert argv[argv.index("--prefetch-multiplier") + 1] == "2"
+    assert argv[argv.index("--time-limit") + 1] == "60"
+    with pytest.raises(ValueError):
+        worker_argv("gpu")
+
+
+def test_queue_stats_counts_priority_lists_and_waits():
+    broker = FakeBroker({
+        "analysis": [b"m1", b"m2"],
+        "analysis\x06\x169": [b"m3"],
+        "celery:queue-wait:analysis": [b"40", b"10", b"30", b"20"],
+    })
+    stats = queue_stats(broker)
+    assert stats["analysis"]["depth"] == 3
+    assert stats["analysis"]["wait_samples"] == 4
+    assert stats["analysis"]["wait_max_ms"] == 40.0
+    assert stats["analysis"]["wait_p50_ms"] in (20.0, 30.0)
+    assert stats["interactive"] == {
+        "depth": 0, "wait_samples": 0, "wait_p50_ms": 0.0, "wait_p95_ms": 0.0, "wait_max_ms": 0.0
+    }
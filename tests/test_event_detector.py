@@ -0,0 +1,109 @@
+import random
+import sys
+from pathlib import Path
+
+# Ensure backend is importable
+backend_path = Path(__file__).parent.parent / "platform" / "backend"
+sys.path.append(str(backend_path))
+
+from app.services.detection_store import ColumnarDetectionStore, ColumnarDetectionWriter  # noqa: E402
+from cv_models.events import EventDetector  # noqa: E402
+
+
+def _fixture(seed, frames=2000):
+    """Random walk of the ball plus occasional cards, penalties and substitutions"""
+    rng = random.Random(seed)
+    detections = []
+    x = 0.5
+    for frame in range(frames):
+        objects = []
+        for _ in range(rng.choice([0, 0, 1, 1, 2, 3])):
+            cls = rng.choice(["ball", "ball", "ball", "card", "penalty", "substitution", "goal_post", "player"])
+            if cls == "ball":
+                x = min(max(x + rng.uniform(-0.15, 0.15), 0.0), 1.0)
+                y = rng.random()
+                bbox = [x - 0.01, y - 0.01, x + 0.01, y + 0.01]
+                objects.append({"class": cls, "conf": rng.choice([0.5, 0.75, 0.875]), "bbox": bbox})
+            else:
+                objects.append({"class": cls, "conf": rng.choice([0.625, 0.75, 0.875, 0.9375]), "bbox": [0.0, 0.0, 1.0, 1.0]})
+        detections.append({"frame": frame, "objects": objects})
+    return detections
+
+
+def test_batch_matches_frame_by_frame():
+    detector = EventDetector()
+    for seed in range(20):
+        detections = _fixture(seed)
+        assert detector.detect_events_batch(detections) == detector.detect_events(detections)
+
+
+def test_batch_handles_edge_cases():
+    detector = EventDetector()
+    ball = {"class": "ball", "conf": 0.9, "bbox": [0.0, 0.5, 0.02, 0.52]}
+    detections = [
+        {"frame": 0, "objects": []},
+        # Cards held over consecutive frames are reported once
+        {"frame": 1, "objects": [{"class": "card", "conf": 0.9}]},
+        {"frame": 2, "objects": [{"class": "card", "conf": 0.9}]},
+        # A penalty object and a penalty-area entry share one debounce
+        {"frame": 3, "objects": [{"class": "penalty", "conf": 0.8}, ball]},
+        # A later ball without a box hides an earlier one in the same frame
+        {"frame": 40, "objects": [ball, {"class": "ball", "conf": 0.9}]},
+        {"frame": 41, "objects": [{"class": "card", "conf": 0.9}, ball]},
+    ]
+    assert detector.detect_events_batch(detections) == detector.detect_events(detections)
+    assert detector.detect_events_batch([]) == []
+
+
+def test_columnar_matches_frame_by_frame(tmp_path):
+    detector = EventDetector()
+    detections = _fixture(7)
+    writer = ColumnarDetectionWriter(str(tmp_path / "store"), fps=25.0, bbox_scale=4096.0)
+    writer.write_batch(detections)
+    writer.close()
+    store = ColumnarDetectionStore(str(tmp_path / "store"))
+
+    expected = detector.detect_events(detections)
+    events = detector.detect_events_columnar([(store.arrays(), store.class_names)])
+    assert [(e["type"], e["frame"], e.get("side")) for e in events] == [
+        (e["type"], e["frame"], e.get("side")) for e in expected
+    ]
+
+
+def test_columnar_ignores_objects_without_a_box(tmp_path):
+    detector = EventDetector()
+    detections = _fixture(3, frames=600)
+    # Balls without a box, some alone in their frame; stored boxes would put them at (0, 0)
+    for det in detections[::7]:
+        det["objects"] = [{"class": "ball", "conf": 0.9}] + det["objects"][:1]
+    writer = ColumnarDetectionWriter(str(tmp_path / "store"), fps=25.0, bbox_scale=4096.0)
+    writer.write_batch(detections)
+    writer.close()
+    store = ColumnarDetectionStore(str(tmp_path / "store"))
+
+    read_back = list(store.iter_frames())
+    assert read_back[0]["objects"][0]["class"] == "ball"
+    assert "bbox" not in read_back[0]["objects"][0]
+    assert [len(det["objects"]) for det in read_back] == [len(det["objects"]) for det in detections]
+
+    expected = detector.detect_events(detections)
+    assert expected
+    events = detector.detect_events_columnar([(store.arrays(), store.class_names)])
+    assert [(e["type"], e["frame"], e.get("side")) for e in events] == [
+        (e["type"], e["frame"], e.get("side")) for e in expected
+    ]
+    assert detector.detect_events(read_back) == detector.detect_events_batch(read_back)
+
+
+def test_streaming_feed_matches_batch_with_bounded_state():
+    detector = EventDetector()
+    detections = _fixture(11, frames=5000)
+    streamed = []
+    for det in detections:
+        new_events = detector.feed(det)
+        # Events are emitted on the frame that raises them
+        assert all(event["frame"] == det["frame"] for event in new_events)
+        streamed.extend(new_events)
+        assert len(detector._ball_traj) <= max(detector.goal_lookback, detector.zone_lookback)
+    streamed.extend(detector.flush())
+    assert streamed == detector.detect_events_batch(detections)
@@ -0,0 +1,175 @@
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+# Use SQLite database for tests
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+# Ensure backend is importable
+backend_path = Path(__file__).parent.parent / "platform" / "backend"
+sys.path.append(str(backend_path))
+
+from main import app  # noqa: E402
+from app.api.detect import get_inference_server  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from cv_models.backends import FakeBackend  # noqa: E402
+from cv_models.inference_server import MicroBatchInferenceServer, ServerBusyError  # noqa: E402
+
+
+class SlowBackend(FakeBackend):
+    """Fake model with a fixed cost per call, recording batch sizes"""
+
+    def __init__(self, call_seconds=0.02, gate=None):
+        super().__init__()
+        self.call_seconds = call_seconds
+        self.gate = gate
+        self.batch_sizes = []
+
+    def infer_batch(self, frames):
+        if self.gate is not None:
+            self.gate.wait()
+        time.sleep(self.call_seconds)
+        self.batch_sizes.append(len(frames))
+        return super().infer_batch(frames)
+
+
+def _frame(x):
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    frame[50:56, x:x + 6] = 255
+    return frame
+
+
+def test_concurrent_requests_share_batches():
+    backend = SlowBackend().load()
+    server = MicroBatchInferenceServer(lambda: backend, max_batch_size=8, max_wait=0.005)
+    try:
+        results = {}
+
+        def request(x):
+            results[x] = server.submit(_frame(x)).result(timeout=5)
+
+        threads = [threading.Thread(target=request, args=(x,)) for x in range(10, 42, 2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Every caller gets the objects of its own frame
+        assert all(objects[0]["bbox"][0] == x for x, objects in results.items())
+        assert sum(backend.batch_sizes) == 16
+        assert len(backend.batch_sizes) < 16
+        assert max(backend.batch_sizes) <= 8
+        assert server.stats()["mean_batch_size"] > 1
+    finally:
+        server.stop()
+
+
+def test_full_queue_is_rejected():
+    gate = threading.Event()
+    backend = SlowBackend(call_seconds=0, gate=gate).load()
+    server = MicroBatchInferenceServer(lambda: backend, max_batch_size=1, max_wait=0, queue_size=2)
+    try:
+        futures = [server.submit(_frame(10))]
+        # Let the worker take the first frame, then fill the queue behind it
+        time.sleep(0.05)
+        futures += [server.submit(_frame(10)), server.submit(_frame(10))]
+        with pytest.raises(ServerBusyError):
+            server.submit(_frame(10))
+        assert server.stats()["rejected"] == 1
+        gate.set()
+        assert all(len(future.result(timeout=5)) == 1 for future in futures)
+    finally:
+        gate.set()
+        server.stop()
+
+
+def test_detect_endpoint():
+    gate = threading.Event()
+    backend = SlowBackend(call_seconds=0, gate=gate).load()
+    server = MicroBatchInferenceServer(lambda: backend, max_batch_size=1, max_wait=0, queue_size=1)
+    app.dependency_overrides[get_inference_server] = lambda: server
+    try:
+        client = TestClient(app)
+        image = cv2.imencode(".png", _frame(20))[1].tobytes()
+
+        gate.set()
+        response = client.post("/api/v1/detect/", files={"file": ("frame.png", image, "image/png")})
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["width"], body["height"]) == (160, 120)
+        assert body["objects"] == [{"class": "ball", "conf": 0.9, "bbox": [20.0, 50.0, 26.0, 56.0]}]
+
+        response = client.post("/api/v1/detect/", files={"file": ("frame.png", b"not an image", "image/png")})
+        assert response.status_code == 400
+
+        # Worker blocked on one frame and the queue full: the next request backs off
+        gate.clear()
+        server.submit(_frame(20))
+        time.sleep(0.05)
+        server.submit(_frame(20))
+        response = client.post("/api/v1/detect/", files={"file": ("frame.png", image, "image/png")})
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "1"
+        assert client.get("/api/v1/detect/stats").json()["rejected"] == 1
+    finally:
+        gate.set()
+        server.stop()
+        app.dependency_overrides.pop(get_inference_server, None)
+
+
+def test_cancelled_request_is_dropped_and_others_are_served():
+    gate = threading.Event()
+    backend = SlowBackend(call_seconds=0, gate=gate).load()
+    server = MicroBatchInferenceServer(lambda: backend, max_batch_size=4, max_wait=0.005)
+    try:
+        first = server.submit(_frame(10))
+        # Worker holds the first frame; the next two wait in the queue
+        time.sleep(0.05)
+        abandoned, waiting = server.submit(_frame(20)), server.submit(_frame(30))
+        assert abandoned.cancel()
+        gate.set()
+        assert first.result(timeout=5)[0]["bbox"][0] == 10
+        assert waiting.result(timeout=5)[0]["bbox"][0] == 30
+        assert backend.batch_sizes == [1, 1]
+        assert server.stats()["cancelled"] == 1
+        assert server.running
+    finally:
+        gate.set()
+        server.stop()
+
+
+def test_timed_out_request_does_not_stop_the_server(monkeypatch):
+    gate = threading.Event()
+    backend = SlowBackend(call_seconds=0, gate=gate).load()
+    server = MicroBatchInferenceServer(lambda: backend, max_batch_size=4, max_wait=0.005)
+    app.dependency_overrides[get_inference_server] = lambda: server
+    try:
+        client = TestClient(app)
+        image = cv2.imencode(".png", _frame(20))[1].tobytes()
+
+        # Worker blocked on another frame: this request gives up and cancels its future
+        busy = server.submit(_frame(10))
+        time.sleep(0.05)
+        monkeypatch.setattr(settings, "inference_timeout", 0.1)
+        response = client.post("/api/v1/detect/", files={"file": ("frame.png", image, "image/png")})
+        assert response.status_code == 504
+
+        gate.set()
+        assert busy.result(timeout=5)[0]["bbox"][0] == 10
+        monkeypatch.setattr(settings, "inference_timeout", 5.0)
+        response = client.post("/api/v1/detect/", files={"file": ("frame.png", image, "image/png")})
+        assert response.status_code == 200
+        assert response.json()["objects"][0]["bbox"] == [20.0, 50.0, 26.0, 56.0]
+        assert server.running
+        assert server.stats()["cancelled"] == 1
+    finally:
+        gate.set()
+        server.stop()
+        app.dependency_overrides.pop(get_inference_server, None)
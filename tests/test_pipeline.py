@@ -0,0 +1,133 @@
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Ensure backend is importable
+backend_path = Path(__file__).parent.parent / "platform" / "backend"
+sys.path.append(str(backend_path))
+
+from cv_models.pipeline import DetectionPipeline  # noqa: E402
+
+
+class _Capture:
+    """Stands in for ``cv2.VideoCapture``; frame ``i`` is just ``i``"""
+
+    def __init__(self, frames, fail_at=None):
+        self.frames = frames
+        self.fail_at = fail_at
+        self.position = 0
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.position == self.fail_at:
+            raise IOError("decode failed")
+        if self.position >= self.frames:
+            return False, None
+        self.position += 1
+        return True, self.position - 1
+
+
+def _infer(batch):
+    # Uneven stage times, so the threads interleave differently each batch
+    time.sleep(random.random() * 0.002)
+    return [{"frame": frame_idx, "objects": [frame]} for frame_idx, frame in batch]
+
+
+def _pipeline(persist, batch_size=4, queue_size=2):
+    return DetectionPipeline(_infer, persist, batch_size=batch_size, max_batch_latency=60.0, queue_size=queue_size)
+
+
+def _pipeline_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("pipeline-")]
+
+
+def test_records_are_persisted_in_frame_order():
+    persisted = []
+
+    def persist(records):
+        time.sleep(random.random() * 0.002)
+        persisted.extend(records)
+
+    stats = _pipeline(persist).run(_Capture(103), start_frame=0)
+    assert [record["frame"] for record in persisted] == list(range(103))
+    assert [record["objects"] for record in persisted] == [[i] for i in range(103)]
+    # 25 full batches and a short last one
+    assert (stats["frames"], stats["batches"]) == (103, 26)
+
+
+def test_frame_range_is_respected():
+    persisted = []
+    capture = _Capture(50)
+    capture.position = 10
+    _pipeline(persisted.extend).run(capture, start_frame=10, end_frame=30)
+    assert [record["frame"] for record in persisted] == list(range(10, 30))
+
+
+def test_decoder_error_reaches_the_caller():
+    with pytest.raises(IOError, match="decode failed"):
+        _pipeline(lambda records: None).run(_Capture(100, fail_at=9))
+    assert not _pipeline_threads()
+
+
+def test_persist_error_reaches_the_caller():
+    def persist(records):
+        raise RuntimeError("database is gone")
+
+    with pytest.raises(RuntimeError, match="database is gone"):
+        _pipeline(persist).run(_Capture(100))
+    assert not _pipeline_threads()
+
+
+def test_infer_error_reaches_the_caller():
+    def infer(batch):
+        raise ValueError("bad model output")
+
+    pipeline = DetectionPipeline(infer, lambda records: None, batch_size=4, max_batch_latency=60.0, queue_size=2)
+    with pytest.raises(ValueError, match="bad model output"):
+        pipeline.run(_Capture(100))
+    assert not _pipeline_threads()
+
+
+class _Stopped(Exception):
+    pass
+
+
+def test_stopping_from_persist_shuts_down_with_full_queues():
+    persisted = []
+    release = threading.Event()
+
+    def persist(records):
+        persisted.extend(records)
+        if len(persisted) == 4:
+            # Hold the persister until the decoder has filled its queue and is blocked
+            release.wait(2.0)
+            raise _Stopped()
+
+    pipeline = _pipeline(persist, batch_size=4, queue_size=1)
+    outcome = {}
+
+    def run():
+        try:
+            pipeline.run(_Capture(10000))
+        except _Stopped as e:
+            outcome["error"] = e
+
+    runner = threading.Thread(target=run)
+    runner.start()
+    time.sleep(0.3)
+    # Both queues are full: the decoder and inference stage are blocked on put
+    assert runner.is_alive()
+    release.set()
+    runner.join(5.0)
+
+    assert not runner.is_alive(), "pipeline deadlocked after being stopped"
+    assert isinstance(outcome.get("error"), _Stopped)
+    assert not _pipeline_threads()
+    # Nothing after the stop point was persisted
+    assert [record["frame"] for record in persisted] == [0, 1, 2, 3]
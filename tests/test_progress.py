@@ -0,0 +1,255 @@
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+# Use SQLite database for tests
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+# Ensure backend is importable
+backend_path = Path(__file__).parent.parent / "platform" / "backend"
+sys.path.append(str(backend_path))
+
+from main import app  # noqa: E402,F401
+from app.core.config import settings  # noqa: E402
+from app.core.database import SessionLocal  # noqa: E402
+from app.models.video import ProcessingTask, Video  # noqa: E402
+from app.services import celery_tasks, progress  # noqa: E402
+from app.services.progress import ProgressReporter  # noqa: E402
+from app.services.video_service import VideoService  # noqa: E402
+from app.services.task_service import TaskService  # noqa: E402
+from cv_models import tasks as cv_tasks  # noqa: E402
+from cv_models.backends import FakeBackend  # noqa: E402
+
+
+def _task(db, **values):
+    task = ProcessingTask(task_id=str(uuid.uuid4()), task_type="analysis", status="queued", **values)
+    db.add(task)
+    db.commit()
+    return task.task_id
+
+
+def _row(db, task_id):
+    db.expire_all()
+    return db.query(ProcessingTask).filter(ProcessingTask.task_id == task_id).first()
+
+
+def _clip(tmp_path, frames=40):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25.0, (160, 120))
+    for i in range(frames):
+        frame = np.zeros((120, 160, 3), dtype=np.uint8)
+        frame[50:58, 10 + 2 * i:18 + 2 * i] = 255
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def test_reporter_coalesces_progress_writes():
+    db = SessionLocal()
+    try:
+        task_id = _task(db)
+        reporter = ProgressReporter(task_id, min_interval=0, min_delta=1.0)
+        reporter.start()
+        for frame in range(1, 100001):
+            reporter.frames(frame, 100000)
+        assert reporter.updates == 100000
+        assert reporter.writes <= 102
+        assert (_row(db, task_id).status, _row(db, task_id).progress) == ("running", 100.0)
+
+        slow = ProgressReporter(task_id, min_interval=3600, min_delta=0)
+        slow.start()
+        slow.update(50.0)
+        assert slow.writes == 1
+        slow.complete({"frames": 10})
+        row = _row(db, task_id)
+        assert (row.status, row.progress, row.result) == ("completed", 100.0, {"frames": 10})
+    finally:
+        db.close()
+
+
+def test_reporter_leaves_cancelled_tasks_alone():
+    db = SessionLocal()
+    try:
+        task_id = _task(db)
+        _row(db, task_id).status = "cancelled"
+        db.commit()
+        assert ProgressReporter(task_id).fail("boom") is False
+        assert _row(db, task_id).status == "cancelled"
+    finally:
+        db.close()
+
+
+def test_dispatch_queues_task_on_celery(monkeypatch):
+    sent = []
+    monkeypatch.setattr(celery_tasks.process_video_task, "apply_async", lambda args, task_id: sent.append((args, task_id)))
+    db = SessionLocal()
+    try:
+        # A fresh video, so no unfinished task from an earlier run is joined
+        video = Video(filename=f"{uuid.uuid4().hex}.mp4", original_name="match.mp4", file_path="/nonexistent.mp4")
+        db.add(video)
+        db.commit()
+        task = TaskService(db).create_rescore_task(video.id, {"goal_line_x": 0.1})
+        assert task.status == "queued"
+        assert sent == [((task.task_id, video.id, "rescore", {"goal_line_x": 0.1}), task.task_id)]
+
+        def unreachable(args, task_id):
+            raise ConnectionError("broker down")
+
+        monkeypatch.setattr(celery_tasks.process_video_task, "apply_async", unreachable)
+        task = TaskService(db).create_rescore_task(video.id, {})
+        assert task.status == "failed"
+        assert "broker down" in task.error_message
+    finally:
+        db.close()
+
+
+def test_worker_runs_pipeline_and_reports_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "inference_backend", "fake")
+    monkeypatch.setattr(settings, "proxy_enabled", False)
+    path = _clip(tmp_path)
+
+    db = SessionLocal()
+    try:
+        video = Video(filename="clip.avi", original_name="clip.avi", file_path=path)
+        db.add(video)
+        db.commit()
+        task_id = _task(db, video_id=video.id)
+
+        celery_tasks.process_video_task.apply(args=(task_id, video.id, "analysis"))
+        row = _row(db, task_id)
+        assert (row.status, row.progress) == ("completed", 100.0)
+        assert row.result["frames"] == 40
+        assert row.result["metrics"]["backend"] == "fake"
+
+        celery_tasks.process_video_task.apply(args=(task_id, video.id, "rescore", {"no_such_rule": 1}))
+        row = _row(db, task_id)
+        assert row.status == "failed"
+        assert "no_such_rule" in row.error_message
+    finally:
+        db.close()
+
+
+def test_frame_gating_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "inference_backend", "fake")
+    monkeypatch.setattr(settings, "proxy_enabled", False)
+    path = _clip(tmp_path)
+
+    db = SessionLocal()
+    try:
+        video = Video(filename="clip.avi", original_name="clip.avi", file_path=path)
+        db.add(video)
+        db.commit()
+
+        for parameters, gated in (({}, False), ({"frame_gating": True}, True)):
+            task_id = _task(db, video_id=video.id)
+            celery_tasks.process_video_task.apply(args=(task_id, video.id, "analysis", parameters))
+            row = _row(db, task_id)
+            assert row.result["frames"] == 40
+            sampling = row.result["metrics"]["sampling"]
+            assert sampling["enabled"] is gated
+            assert (sampling["skipped_frames"] > 0) is gated
+    finally:
+        db.close()
+
+
+def test_batched_inference_matches_frame_by_frame(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "proxy_enabled", False)
+    path = _clip(tmp_path)
+    batch_sizes = []
+    infer_batch = FakeBackend.infer_batch
+
+    def recording_infer_batch(self, frames):
+        batch_sizes.append(len(frames))
+        return infer_batch(self, frames)
+
+    monkeypatch.setattr(FakeBackend, "infer_batch", recording_infer_batch)
+
+    db = SessionLocal()
+    try:
+        video = Video(filename="clip.avi", original_name="clip.avi", file_path=path)
+        db.add(video)
+        db.commit()
+
+        stored = {}
+        for batch_size in (1, 6):
+            batch_sizes.clear()
+            cv_tasks._detect_frames(
+                path, video.id, batch_size=batch_size, max_batch_latency=60.0,
+                detect_every_n=1, adaptive=False, frame_gating=False, backend="fake"
+            )
+            stored[batch_size] = list(VideoService(db).iter_detections(video.id))
+            # 40 frames: six full batches of 6 and a last batch of 4
+            assert batch_sizes == ([1] * 40 if batch_size == 1 else [6] * 6 + [4])
+
+        assert [det["frame"] for det in stored[6]] == list(range(40))
+        assert all(det["objects"] for det in stored[6])
+        assert stored[6] == stored[1]
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("storage", ["database", "columnar"])
+def test_cancelled_analysis_resumes_from_checkpoint(tmp_path, monkeypatch, storage):
+    monkeypatch.setattr(settings, "inference_backend", "fake")
+    monkeypatch.setattr(settings, "proxy_enabled", False)
+    monkeypatch.setattr(settings, "detection_storage", storage)
+    monkeypatch.setattr(settings, "detection_store_dir", str(tmp_path / "stores"))
+    path = _clip(tmp_path)
+    parameters = {"batch_size": 8, "max_batch_latency": 60.0}
+
+    db = SessionLocal()
+    try:
+        video = Video(filename="clip.avi", original_name="clip.avi", file_path=path)
+        db.add(video)
+        db.commit()
+        task_id = _task(db, video_id=video.id)
+
+        # Cancelled while the second batch is being stored
+        checks = []
+
+        def cancel_flag(flagged_id):
+            checks.append(flagged_id)
+            return len(checks) >= 2
+
+        monkeypatch.setattr(progress, "cancel_requested", cancel_flag)
+        result = celery_tasks.process_video_task.apply(args=(task_id, video.id, "analysis", parameters)).get()
+        assert result["status"] == "cancelled"
+        assert len(checks) == 2
+        row = _row(db, task_id)
+        assert row.checkpoint["next_frame"] == 16 and row.checkpoint["frames"] == 16
+        assert [det["frame"] for det in VideoService(db).iter_detections(video.id)] == list(range(16))
+
+        monkeypatch.setattr(progress, "cancel_requested", lambda flagged_id: False)
+        sent = []
+        monkeypatch.setattr(celery_tasks.process_video_task, "apply_async", lambda args, task_id: sent.append(args))
+        _row(db, task_id).status = "cancelled"
+        db.commit()
+        assert TaskService(db).resume_task(task_id).status == "queued"
+
+        celery_tasks.process_video_task.apply(args=sent[0])
+        row = _row(db, task_id)
+        assert (row.status, row.progress, row.checkpoint) == ("completed", 100.0, None)
+        assert row.result["frames"] == 40
+        # Only the frames after the checkpoint went through inference again
+        assert row.result["metrics"]["frames"] == 24
+        assert [det["frame"] for det in VideoService(db).iter_detections(video.id)] == list(range(40))
+    finally:
+        db.close()
+
+
+def test_queued_task_cancelled_before_start_does_not_run():
+    db = SessionLocal()
+    try:
+        task_id = _task(db, video_id=12345)
+        _row(db, task_id).status = "cancelled"
+        db.commit()
+        result = celery_tasks.process_video_task.apply(args=(task_id, 12345, "analysis")).get()
+        assert result == {"status": "cancelled", "video_id": 12345}
+        assert _row(db, task_id).status == "cancelled"
+    finally:
+        db.close()
@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+# Ensure backend is importable
+backend_path = Path(__file__).parent.parent / "platform" / "backend"
+sys.path.append(str(backend_path))
+
+from cv_models.proxy import ProxyMapping, proxy_command, proxy_path  # noqa: E402
+
+
+def test_mapping_restores_original_coordinates_and_frames():
+    # 1080p/50fps original analysed on a 540p/25fps proxy
+    mapping = ProxyMapping(scale_x=2.0, scale_y=2.0, frame_ratio=2.0)
+    objects = mapping.objects([
+        {"class": "ball", "conf": 0.9, "bbox": [10.0, 20.0, 30.0, 40.0]},
+        {"class": "card", "conf": 0.9, "bbox": None},
+    ])
+    assert objects[0]["bbox"] == [20.0, 40.0, 60.0, 80.0]
+    assert objects[1]["bbox"] is None
+    assert mapping.frame(101) == 202
+    assert ProxyMapping().identity and not mapping.identity
+
+
+def test_proxy_command_uses_fixed_short_gop():
+    command = proxy_command("in.mp4", "out.mp4", height=540, fps=25, gop=1)
+    assert command[command.index("-vf") + 1] == "scale=-2:540,fps=25"
+    assert command[command.index("-g") + 1] == "1"
+    assert "-an" in command
+    assert proxy_path("proxies", "abc", 540, 0) == str(Path("proxies") / "abc_540p.mp4")
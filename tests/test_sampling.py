@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Ensure backend is importable
+backend_path = Path(__file__).parent.parent / "platform" / "backend"
+sys.path.append(str(backend_path))
+
+from cv_models.sampling import FrameGate, SamplingPolicy, carry_forward  # noqa: E402
+
+
+def test_gate_skips_static_frames_and_catches_changes():
+    gate = FrameGate(SamplingPolicy(enabled=True, max_skip=10))
+    static = np.full((240, 320, 3), 80, dtype=np.uint8)
+    cut = np.zeros((240, 320, 3), dtype=np.uint8)
+    cut[:, 160:] = 255
+
+    decisions = [gate.should_process(static) for _ in range(15)] + [gate.should_process(cut)]
+
+    # First frame, the forced refresh after max_skip, and the scene cut
+    assert [i for i, processed in enumerate(decisions) if processed] == [0, 11, 15]
+    assert gate.stats()["skipped_frames"] == 13
+    assert abs(gate.stats()["skip_ratio"] - 13 / 16) < 1e-9
+
+
+def test_disabled_policy_processes_every_frame():
+    gate = FrameGate(SamplingPolicy.from_dict({"enabled": False, "unknown": 1}))
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    assert all(gate.should_process(frame) for _ in range(5))
+    assert gate.stats()["skip_ratio"] == 0.0
+
+
+def test_carry_forward_marks_objects_skipped():
+    objects = [{"class": "ball", "conf": 0.9, "bbox": [0, 0, 1, 1]}]
+    assert carry_forward(objects) == [{"class": "ball", "conf": 0.9, "bbox": [0, 0, 1, 1], "skipped": True}]
+    assert "skipped" not in objects[0]
@@ -0,0 +1,173 @@
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+# Use SQLite database for tests
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+# Ensure backend is importable
+backend_path = Path(__file__).parent.parent / "platform" / "backend"
+sys.path.append(str(backend_path))
+
+from main import app  # noqa: E402,F401
+from app.core.celery_app import celery_app  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.database import SessionLocal  # noqa: E402
+from app.models.video import ProcessingTask, Video  # noqa: E402
+from app.services import celery_tasks, progress  # noqa: E402
+from app.services.task_service import TaskService  # noqa: E402
+from app.services.video_service import VideoService  # noqa: E402
+from cv_models import tasks as cv_tasks  # noqa: E402
+from cv_models.segments import plan_segments  # noqa: E402
+
+
+def _covers(segments, frame_count):
+    # Contiguous, non-overlapping and spanning every frame
+    assert segments[0][0] == 0 and segments[-1][1] == frame_count
+    assert all(end == next_start for (_, end), (next_start, _) in zip(segments, segments[1:]))
+    assert all(start < end for start, end in segments)
+
+
+def test_segments_start_on_keyframes():
+    keyframes = [0, 48, 96, 110, 250, 300, 460]
+    segments = plan_segments(500, 100, keyframes)
+    _covers(segments, 500)
+    assert all(start in keyframes for start, _ in segments)
+    assert segments == [(0, 110), (110, 250), (250, 460), (460, 500)]
+
+
+def test_segments_without_keyframes_have_fixed_length():
+    segments = plan_segments(250, 100)
+    _covers(segments, 250)
+    assert segments == [(0, 100), (100, 200), (200, 250)]
+    # No keyframe past the target: the last segment runs to the end
+    assert plan_segments(250, 100, [0, 40]) == [(0, 250)]
+    assert plan_segments(50, 100, [0, 10, 20]) == [(0, 50)]
+
+
+def _clip(tmp_path, frames=40):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25.0, (160, 120))
+    for i in range(frames):
+        frame = np.zeros((120, 160, 3), dtype=np.uint8)
+        frame[50:58, 10 + 2 * i:18 + 2 * i] = 255
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+@pytest.fixture
+def segmented_video(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "inference_backend", "fake")
+    monkeypatch.setattr(settings, "proxy_enabled", False)
+    # Chords run in-process
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    db = SessionLocal()
+    try:
+        video = Video(filename=f"{uuid.uuid4().hex}.avi", original_name="clip.avi", file_path=_clip(tmp_path))
+        db.add(video)
+        db.commit()
+        task = ProcessingTask(task_id=str(uuid.uuid4()), video_id=video.id, task_type="analysis", status="queued")
+        db.add(task)
+        db.commit()
+        yield video.id, task.task_id
+    finally:
+        db.close()
+
+
+def _row(task_id):
+    db = SessionLocal()
+    try:
+        return db.query(ProcessingTask).filter(ProcessingTask.task_id == task_id).first()
+    finally:
+        db.close()
+
+
+def test_segmented_analysis_reports_to_its_task(segmented_video):
+    video_id, task_id = segmented_video
+    db = SessionLocal()
+    try:
+        video_path = db.get(Video, video_id).file_path
+    finally:
+        db.close()
+    assert cv_tasks._plan_video_segments(video_path, video_id, 0.5)["ranges"] == [(0, 12), (12, 24), (24, 36), (36, None)]
+
+    parameters = {"segmented": True, "segment_seconds": 0.5, "batch_size": 4}
+    dispatched = celery_tasks.process_video_task.apply(args=(task_id, video_id, "analysis", parameters)).get()
+    assert (dispatched["status"], dispatched["segments"]) == ("dispatched", 4)
+
+    row = _row(task_id)
+    assert (row.status, row.progress, row.checkpoint) == ("completed", 100.0, None)
+    assert row.result["frames"] == 40
+    assert len(row.result["metrics"]["segments"]) == 4
+
+    # Each segment stored its own frames at their place in the whole video
+    db = SessionLocal()
+    try:
+        assert [det["frame"] for det in VideoService(db).iter_detections(video_id)] == list(range(40))
+    finally:
+        db.close()
+
+
+def test_cancelled_segments_resume_from_their_checkpoints(segmented_video, monkeypatch):
+    video_id, task_id = segmented_video
+    parameters = {"segmented": True, "segment_seconds": 0.5, "batch_size": 4, "max_batch_latency": 60.0}
+
+    # Cancelled after the first segment's first batch
+    checks = []
+
+    def cancel_flag(flagged_id):
+        checks.append(flagged_id)
+        return len(checks) >= 2
+
+    monkeypatch.setattr(progress, "cancel_requested", cancel_flag)
+    db = SessionLocal()
+    try:
+        # Stored on the row, so the resumed run gets them back
+        db.query(ProcessingTask).filter(ProcessingTask.task_id == task_id).update({"parameters": parameters})
+        db.commit()
+    finally:
+        db.close()
+    celery_tasks.process_video_task.apply(args=(task_id, video_id, "analysis", parameters))
+    row = _row(task_id)
+    assert row.result is None
+    assert row.checkpoint["segments"]["0"]["next_frame"] == 4
+
+    monkeypatch.setattr(progress, "cancel_requested", lambda flagged_id: False)
+    sent = []
+    monkeypatch.setattr(celery_tasks.process_video_task, "apply_async", lambda args, task_id: sent.append(args))
+    db = SessionLocal()
+    try:
+        db.query(ProcessingTask).filter(ProcessingTask.task_id == task_id).update({"status": "cancelled"})
+        db.commit()
+        assert TaskService(db).resume_task(task_id).status == "queued"
+    finally:
+        db.close()
+
+    celery_tasks.process_video_task.apply(args=sent[0])
+    row = _row(task_id)
+    assert (row.status, row.checkpoint) == ("completed", None)
+    assert row.result["frames"] == 40
+    # The first segment's stored batch was not decoded again
+    assert sum(segment["frames"] for segment in row.result["metrics"]["segments"]) == 36
+    db = SessionLocal()
+    try:
+        assert [det["frame"] for det in VideoService(db).iter_detections(video_id)] == list(range(40))
+    finally:
+        db.close()
+
+
+def test_short_videos_are_not_split(segmented_video, monkeypatch):
+    video_id, task_id = segmented_video
+    monkeypatch.setattr(settings, "segment_min_seconds", 60.0)
+    result = celery_tasks.process_video_task.apply(
+        args=(task_id, video_id, "analysis", {"segment_seconds": 0.5})
+    ).get()
+    assert result["status"] == "completed"
+    assert "segments" not in result["metrics"]
+    assert _row(task_id).status == "completed"
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Use SQLite database for tests
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+# Ensure backend is importable
+backend_path = Path(__file__).parent.parent / "platform" / "backend"
+sys.path.append(str(backend_path))
+
+from main import app  # noqa: E402
+from app.core.database import SessionLocal  # noqa: E402
+from app.models.video import ProcessingTask, Video  # noqa: E402
+from app.services import celery_tasks  # noqa: E402
+from app.services.task_service import IdempotencyKeyError, TaskService, params_hash  # noqa: E402
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    sent = []
+    monkeypatch.setattr(celery_tasks.process_video_task, "apply_async", lambda args, task_id: sent.append(task_id))
+    return sent
+
+
+def _video(db):
+    video = Video(filename=f"{uuid.uuid4().hex}.mp4", original_name="match.mp4", file_path="/nonexistent.mp4")
+    db.add(video)
+    db.commit()
+    return video.id
+
+
+def test_duplicate_submissions_join_the_unfinished_task(sent):
+    db = SessionLocal()
+    try:
+        video_id = _video(db)
+        service = TaskService(db)
+        first = service.create_rescore_task(video_id, {"goal_line_x": 0.1, "debounce_frames": 3})
+        again = service.create_rescore_task(video_id, {"debounce_frames": 3, "goal_line_x": 0.1})
+        other = service.create_rescore_task(video_id, {"goal_line_x": 0.2})
+        assert again.task_id == first.task_id
+        assert other.task_id != first.task_id
+        assert sent == [first.task_id, other.task_id]
+
+        # Once the task has finished, the same request queues new work
+        service.update_task_status(first.task_id, "completed", progress=100.0)
+        assert service.create_rescore_task(video_id, {"goal_line_x": 0.1, "debounce_frames": 3}).task_id != first.task_id
+
+        analysis = asyncio.run(service.create_processing_task(video_id, "analysis"))
+        assert asyncio.run(service.create_processing_task(video_id, "analysis")).task_id == analysis.task_id
+    finally:
+        db.close()
+
+
+def test_idempotency_key_returns_original_task(sent):
+    db = SessionLocal()
+    try:
+        video_id = _video(db)
+        service = TaskService(db)
+        key = uuid.uuid4().hex
+        first = service.create_rescore_task(video_id, {}, idempotency_key=key)
+        service.update_task_status(first.task_id, "completed", progress=100.0)
+        assert service.create_rescore_task(video_id, {}, idempotency_key=key).task_id == first.task_id
+        assert sent == [first.task_id]
+        with pytest.raises(IdempotencyKeyError):
+            service.create_rescore_task(video_id, {"goal_line_x": 0.3}, idempotency_key=key)
+    finally:
+        db.close()
+
+
+def test_unique_index_settles_concurrent_duplicates(sent):
+    db = SessionLocal()
+    try:
+        video_id = _video(db)
+        winner = ProcessingTask(
+            task_id=str(uuid.uuid4()), video_id=video_id, task_type="rescore",
+            status="running", params_hash=params_hash({})
+        )
+        db.add(winner)
+        db.commit()
+
+        # A request that checked before the winner was inserted
+        loser = ProcessingTask(
+            task_id=str(uuid.uuid4()), video_id=video_id, task_type="rescore",
+            status="pending", params_hash=params_hash({})
+        )
+        assert TaskService(db)._submit(loser).task_id == winner.task_id
+        assert sent == []
+        assert db.query(ProcessingTask).filter(ProcessingTask.video_id == video_id).count() == 1
+    finally:
+        db.close()
+
+
+def test_process_endpoint_honours_idempotency_key(sent):
+    client = TestClient(app)
+    db = SessionLocal()
+    try:
+        video_id = _video(db)
+    finally:
+        db.close()
+
+    key = uuid.uuid4().hex
+    first = client.post(f"/api/v1/videos/{video_id}/process", headers={"Idempotency-Key": key})
+    again = client.post(f"/api/v1/videos/{video_id}/process", headers={"Idempotency-Key": key})
+    assert first.status_code == again.status_code == 200
+    assert first.json()["task_id"] == again.json()["task_id"]
+    assert sent == [first.json()["task_id"]]
+
+    conflict = client.post(f"/api/v1/videos/{video_id}/rescore", json={}, headers={"Idempotency-Key": key})
+    assert conflict.status_code == 422
+
+
+def test_rescore_endpoint_joins_identical_requests(sent):
+    client = TestClient(app)
+    db = SessionLocal()
+    try:
+        video_id = _video(db)
+    finally:
+        db.close()
+
+    first = client.post(f"/api/v1/videos/{video_id}/rescore", json={"goal_debounce_frames": 4})
+    again = client.post(f"/api/v1/videos/{video_id}/rescore", json={"goal_debounce_frames": 4})
+    other = client.post(f"/api/v1/videos/{video_id}/rescore", json={"goal_debounce_frames": 5})
+    assert first.status_code == again.status_code == other.status_code == 200
+    assert first.json()["task_id"] == again.json()["task_id"]
+    assert other.json()["task_id"] != first.json()["task_id"]
+    assert sent == [first.json()["task_id"], other.json()["task_id"]]
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+
+# Use SQLite database for tests
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+# Ensure backend is importable
+backend_path = Path(__file__).parent.parent / "platform" / "backend"
+sys.path.append(str(backend_path))
+
+from main import app  # noqa: E402,F401
+from app.api.tasks import task_event_stream  # noqa: E402
+from app.core.database import SessionLocal  # noqa: E402
+from app.models.video import ProcessingTask  # noqa: E402
+from app.services import progress, task_events  # noqa: E402
+from app.services.task_events import TaskSubscriber  # noqa: E402
+
+
+def test_subscriber_coalesces_and_filters():
+    async def scenario():
+        subscriber = TaskSubscriber(task_type="analysis")
+        subscriber.deliver({"task_id": "a", "task_type": "analysis", "status": "running", "progress": 1.0})
+        subscriber.deliver({"task_id": "a", "progress": 2.0})
+        subscriber.deliver({"task_id": "b", "task_type": "training", "status": "running"})
+        updates, resync = await subscriber.next(1.0)
+        assert resync is False
+        assert updates == [{"task_id": "a", "task_type": "analysis", "status": "running", "progress": 2.0}]
+        assert await subscriber.next(0.01) == ([], False)
+
+    asyncio.run(scenario())
+
+
+def test_stream_sends_snapshot_then_deltas(monkeypatch):
+    broadcaster = task_events.TaskEventBroadcaster(listen=False)
+    monkeypatch.setattr("app.api.tasks.broadcaster", broadcaster)
+
+    async def scenario():
+        async def snapshot():
+            return [{"task_id": "a", "progress": 0.0}]
+
+        subscriber = broadcaster.subscribe()
+        stream = task_event_stream(subscriber, snapshot, keepalive=0.05)
+        first = await stream.__anext__()
+        assert first.startswith("event: snapshot\n") and '"task_id": "a"' in first
+
+        assert await stream.__anext__() == ": keep-alive\n\n"
+
+        broadcaster.deliver({"task_id": "a", "progress": 10.0})
+        broadcaster.deliver({"task_id": "a", "progress": 20.0})
+        assert await stream.__anext__() == 'event: task\ndata: {"task_id": "a", "progress": 20.0}\n\n'
+
+        subscriber.request_resync()
+        assert (await stream.__anext__()).startswith("event: snapshot\n")
+
+        await stream.aclose()
+        assert subscriber not in broadcaster.subscribers
+
+    asyncio.run(scenario())
+
+
+def test_reporter_publishes_writes_and_progress(monkeypatch):
+    published = []
+    monkeypatch.setattr(progress, "publish_task_update", lambda payload: published.append(payload) or True)
+    monkeypatch.setattr(progress.settings, "progress_publish_interval", 0.0)
+    db = SessionLocal()
+    try:
+        task_id = str(uuid.uuid4())
+        db.add(ProcessingTask(task_id=task_id, video_id=7, task_type="analysis", status="queued"))
+        db.commit()
+    finally:
+        db.close()
+
+    reporter = progress.ProgressReporter(task_id, min_interval=3600, min_delta=1.0)
+    reporter.start()
+    reporter.update(0.5)
+    reporter.complete({"frames": 1})
+
+    assert [p.get("status") for p in published] == ["running", None, "completed"]
+    assert published[0]["task_type"] == "analysis" and published[0]["video_id"] == 7
+    assert published[1] == {"task_id": task_id, "progress": 0.5}
+    assert published[2]["progress"] == 100.0
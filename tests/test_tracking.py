@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+
+# Ensure backend is importable
+backend_path = Path(__file__).parent.parent / "platform" / "backend"
+sys.path.append(str(backend_path))
+
+from cv_models.tracking import MultiObjectTracker, StridedDetector  # noqa: E402
+
+
+def _box(x, y, size=10.0):
+    return [x, y, x + size, y + size]
+
+
+def test_tracker_keeps_ids_and_predicts_motion():
+    tracker = MultiObjectTracker()
+    ids = None
+    for step in range(6):
+        objects = tracker.update([
+            {"class": "player", "conf": 0.9, "bbox": _box(10 + 2 * step, 10)},
+            {"class": "player", "conf": 0.9, "bbox": _box(100 - 2 * step, 50)},
+        ])
+        step_ids = [obj["track_id"] for obj in objects]
+        assert ids is None or step_ids == ids
+        ids = step_ids
+
+    predicted = tracker.predict()
+    assert [obj["track_id"] for obj in predicted] == ids
+    assert all(obj["tracked"] for obj in predicted)
+    # Constant velocity carries the boxes on by roughly one step
+    assert abs(predicted[0]["bbox"][0] - 22) < 1.0
+    assert abs(predicted[1]["bbox"][0] - 88) < 1.0
+
+
+def test_strided_detector_runs_model_on_keyframes_only():
+    calls = []
+
+    def detect(frames):
+        calls.append(len(frames))
+        return [[{"class": "ball", "conf": 0.9, "bbox": _box(frame, 0)}] for frame in frames]
+
+    strided = StridedDetector(detect, stride=4)
+    records = strided([(idx, idx) for idx in range(8)]) + strided([(idx, idx) for idx in range(8, 12)])
+
+    assert [record["frame"] for record in records] == list(range(12))
+    assert calls == [2, 1]
+    assert strided.stats()["detected_frames"] == 3
+    assert all(obj["track_id"] == 1 for record in records for obj in record["objects"])
+    assert records[5]["objects"][0]["tracked"]
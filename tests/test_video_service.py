@@ -0,0 +1,204 @@
+import os
+import sys
+from pathlib import Path
+
+# Use SQLite database for tests
+os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+
+# Ensure backend is importable
+backend_path = Path(__file__).parent.parent / "platform" / "backend"
+sys.path.append(str(backend_path))
+
+from main import app  # noqa: E402,F401
+from app.core.database import SessionLocal  # noqa: E402
+from app.services.video_service import VideoService  # noqa: E402
+
+
+def test_bulk_detections_and_events():
+    db = SessionLocal()
+    try:
+        video_service = VideoService(db)
+        video_id = 9001
+        video_service.delete_detections(video_id)
+        video_service.delete_events(video_id)
+
+        written = video_service.add_detections_bulk(
+            video_id,
+            (
+                {"frame_number": frame, "objects": [{"class": "ball", "conf": 0.9}], "timestamp": frame / 25}
+                for frame in range(2500)
+            ),
+            batch_size=1000,
+        )
+        assert written == 2500
+        detections = video_service.get_detections(video_id, frame_start=1000, frame_end=1002)
+        assert [d.frame_number for d in detections] == [1000, 1001, 1002]
+        assert detections[0].objects == [{"class": "ball", "conf": 0.9}]
+
+        video_service.add_events_bulk(video_id, [
+            {"event_type": "goal", "frame_number": 40, "timestamp": 1.6, "confidence": 0.8, "details": {"side": "left"}},
+        ])
+        assert [e.event_type for e in video_service.get_events(video_id)] == ["goal"]
+
+        video_service.delete_detections(video_id, frame_start=100)
+        assert len(video_service.get_detections(video_id)) == 100
+    finally:
+        db.close()
+
+
+def test_columnar_detection_store_round_trip(tmp_path):
+    from app.services.detection_store import ColumnarDetectionWriter
+
+    db = SessionLocal()
+    try:
+        video_service = VideoService(db)
+        video_id = 9002
+        video_service.delete_detections(video_id)
+
+        path = str(tmp_path / "store")
+        writer = ColumnarDetectionWriter(path, fps=25.0, bbox_scale=8.0)
+        writer.write_batch([
+            {"frame": frame, "objects": [{"class": "ball", "conf": 0.5, "bbox": [10.0, 20.0, 30.5, 40.25]}] * (frame % 3)}
+            for frame in range(0, 300)
+        ])
+        store = video_service.register_detection_store(video_id, path, writer.close())
+        assert store.frame_count == 300 and store.object_count == 300
+
+        detections = video_service.get_detections(video_id, frame_start=100, frame_end=102)
+        assert [d["frame_number"] for d in detections] == [100, 101, 102]
+        assert detections[0]["objects"] == [{"class": "ball", "conf": 0.5, "bbox": [10.0, 20.0, 30.5, 40.25]}]
+        assert detections[2]["timestamp"] == 102 / 25.0
+        assert len(video_service.get_detections(video_id, limit=10)) == 10
+        assert sum(1 for _ in video_service.iter_detections(video_id)) == 300
+
+        video_service.delete_detections(video_id)
+        assert video_service.get_detection_stores(video_id) == []
+        assert not os.path.exists(path)
+    finally:
+        db.close()
+
+
+def test_rescore_adds_event_set_version():
+    from app.models.video import Video
+    from cv_models.tasks import rescore_events
+
+    db = SessionLocal()
+    try:
+        video = Video(filename="rescore.mp4", original_name="rescore.mp4", file_path="rescore.mp4", fps=25.0)
+        db.add(video)
+        db.commit()
+        video_service = VideoService(db)
+        ball = {"class": "ball", "conf": 0.9}
+        video_service.add_detections_bulk(video.id, [
+            {"frame_number": frame, "objects": [{**ball, "bbox": [x, 0.5, x + 0.01, 0.51]}], "timestamp": frame / 25}
+            for frame, x in enumerate([0.5, 0.3, 0.1, 0.01, 0.5, 0.5, 0.5])
+        ])
+
+        first = rescore_events(video.id)
+        # A wider goal line turns the frame at x=0.105 into a goal as well
+        second = rescore_events(video.id, {"goal_line_x": 0.12, "goal_debounce_frames": 0})
+        assert (first["event_set_version"], second["event_set_version"]) == (1, 2)
+        assert [s.version for s in video_service.get_event_sets(video.id)] == [2, 1]
+
+        latest = [(e.event_type, e.frame_number) for e in video_service.get_events(video.id, event_type="goal")]
+        original = [(e.event_type, e.frame_number) for e in video_service.get_events(video.id, "goal", version=1)]
+        assert original == [("goal", 3)]
+        assert latest == [("goal", 2)]
+        assert rescore_events(video.id, {"no_such_rule": 1})["status"] == "error"
+    finally:
+        db.close()
+
+
+def test_backfill_checkpoints_and_resumes():
+    from app.models.video import BackfillRun, Video
+    from cv_models.backfill import run_backfill
+
+    db = SessionLocal()
+    try:
+        video = Video(filename="backfill.mp4", original_name="backfill.mp4", file_path="backfill.mp4", fps=25.0)
+        db.add(video)
+        db.commit()
+        video_service = VideoService(db)
+        video_service.add_detections_bulk(video.id, [
+            {"frame_number": frame, "objects": [{"class": "ball", "conf": 0.9, "bbox": [x, 0.5, x + 0.01, 0.51]}],
+             "timestamp": frame / 25}
+            for frame, x in enumerate([0.5, 0.3, 0.1, 0.01, 0.5])
+        ])
+
+        summary = run_backfill({"goal_debounce_frames": 0}, run_id=f"test-{video.id}", workers=1, batch_size=2)
+        assert summary["status"] == "completed"
+        assert summary["last_video_id"] >= video.id
+        assert summary["videos_processed"] >= 1
+
+        event_set = video_service.get_event_sets(video.id)[0]
+        assert (event_set.source, event_set.detector_params) == ("backfill", {"goal_debounce_frames": 0})
+        assert [e.frame_number for e in video_service.get_events(video.id, event_type="goal")] == [3]
+
+        # Resuming a finished run writes nothing new
+        run_backfill(run_id=f"test-{video.id}", workers=1)
+        assert len(video_service.get_event_sets(video.id)) == 1
+        db.expire_all()
+        run = db.query(BackfillRun).filter(BackfillRun.run_id == f"test-{video.id}").first()
+        assert run.videos_processed == summary["videos_processed"]
+    finally:
+        db.close()
+
+
+def test_backfill_resumes_without_duplicating_event_sets(monkeypatch):
+    import pytest
+    from app.models.video import Video
+    from cv_models import backfill
+    from cv_models.backfill import run_backfill
+
+    db = SessionLocal()
+    try:
+        video_service = VideoService(db)
+        video_ids = []
+        for name in ("first", "second"):
+            video = Video(filename=f"{name}.mp4", original_name=f"{name}.mp4", file_path=f"{name}.mp4", fps=25.0)
+            db.add(video)
+            db.commit()
+            video_service.add_detections_bulk(video.id, [
+                {"frame_number": frame, "objects": [{"class": "ball", "conf": 0.9, "bbox": [x, 0.5, x + 0.01, 0.51]}],
+                 "timestamp": frame / 25}
+                for frame, x in enumerate([0.5, 0.1, 0.01])
+            ])
+            video_ids.append(video.id)
+        first_id, second_id = video_ids
+        run_id = f"test-crash-{second_id}"
+
+        # Crash while writing the second video, after the first one's set is published
+        add_events_bulk = VideoService.add_events_bulk
+
+        def crash_on_second(self, video_id, *args, **kwargs):
+            if video_id == second_id:
+                raise RuntimeError("worker killed")
+            return add_events_bulk(self, video_id, *args, **kwargs)
+
+        monkeypatch.setattr(VideoService, "add_events_bulk", crash_on_second)
+        with pytest.raises(RuntimeError, match="worker killed"):
+            run_backfill(run_id=run_id, workers=1, batch_size=1000)
+        monkeypatch.setattr(VideoService, "add_events_bulk", add_events_bulk)
+        assert [s.event_count is not None for s in video_service.get_event_sets(first_id)] == [True]
+
+        assert run_backfill(run_id=run_id, workers=1)["status"] == "completed"
+        db.expire_all()
+        assert [s.source for s in video_service.get_event_sets(first_id)] == ["backfill"]
+        assert [s.version for s in video_service.get_event_sets(second_id) if s.event_count is not None] == [2]
+
+        # An error before the run exists is reported as itself
+        class BrokenSession:
+            def query(self, *args):
+                raise RuntimeError("database is down")
+
+            def rollback(self):
+                pass
+
+            def close(self):
+                pass
+
+        monkeypatch.setattr(backfill, "SessionLocal", BrokenSession)
+        with pytest.raises(RuntimeError, match="database is down"):
+            run_backfill(run_id="unreachable", workers=1)
+    finally:
+        db.close()
@@ -2,6 +2,7 @@ import os
 import sys
 from pathlib import Path
 
+import pytest
 from fastapi.testclient import TestClient
 
 # Use SQLite database for tests
@@ -12,9 +13,17 @@ backend_path = Path(__file__).parent.parent / "platform" / "backend"
 sys.path.append(str(backend_path))
 
 from main import app  # noqa: E402
+from app.core.celery_app import celery_app  # noqa: E402
 
 
-def test_video_upload():
+@pytest.fixture(autouse=True)
+def sent(monkeypatch):
+    sent = []
+    monkeypatch.setattr(celery_app, "send_task", lambda name, args, **options: sent.append((name, args)))
+    return sent
+
+
+def test_video_upload(sent):
     client = TestClient(app)
     video_path = Path(__file__).parent.parent / "dummy_video.mp4"
     with video_path.open("rb") as file:
@@ -26,6 +35,24 @@ def test_video_upload():
     data = response.json()
     for field in ["id", "filename", "status", "message"]:
         assert field in data
+    # The proxy is built at ingest rather than on first use
+    video = client.get(f"/api/v1/videos/{data['id']}").json()
+    assert data["proxy_queued"] is True
+    assert sent == [("cv_models.tasks.generate_video_proxy", (data["id"], video["file_path"]))]
+
+
+def test_proxy_failure_does_not_fail_upload(monkeypatch):
+    def unreachable(name, args, **options):
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(celery_app, "send_task", unreachable)
+    client = TestClient(app)
+    response = client.post(
+        "/api/v1/videos/upload",
+        files={"file": ("match.mp4", os.urandom(1024), "video/mp4")},
+    )
+    assert response.status_code == 200
+    assert response.json()["proxy_queued"] is False
 
 
 def test_video_upload_invalid_extension(tmp_path):
@@ -39,3 +66,320 @@ def test_video_upload_invalid_extension(tmp_path):
         )
     assert response.status_code == 400
     assert response.json()["detail"] == "Unsupported video file extension"
+
+
+def test_video_upload_too_large(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "max_file_size", 1024)
+    monkeypatch.setattr(settings, "upload_chunk_size", 256)
+    client = TestClient(app)
+    response = client.post(
+        "/api/v1/videos/upload",
+        files={"file": ("big.mp4", b"\0" * 4096, "video/mp4")},
+    )
+    assert response.status_code == 413
+    leftovers = [name for name in os.listdir(settings.upload_dir) if name.endswith(".part")]
+    assert leftovers == []
+
+
+def test_stream_upload_to_disk_hashes_and_limits(tmp_path):
+    import asyncio
+    import hashlib
+    import io
+
+    import pytest
+    from fastapi import UploadFile
+    from app.services.storage import FileTooLargeError, stream_upload_to_disk
+
+    payload = b"field hockey" * 1000
+    stored = asyncio.run(stream_upload_to_disk(
+        UploadFile(io.BytesIO(payload), filename="clip.mp4"),
+        str(tmp_path),
+        suffix=".mp4",
+        chunk_size=100,
+    ))
+    assert stored.size == len(payload)
+    assert stored.sha256 == hashlib.sha256(payload).hexdigest()
+    assert Path(stored.path).read_bytes() == payload
+
+    with pytest.raises(FileTooLargeError):
+        asyncio.run(stream_upload_to_disk(
+            UploadFile(io.BytesIO(payload), filename="clip.mp4"),
+            str(tmp_path / "limited"),
+            max_size=500,
+            chunk_size=100,
+        ))
+    assert list((tmp_path / "limited").iterdir()) == []
+
+
+def test_resumable_upload_out_of_order(monkeypatch, sent):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "resumable_chunk_size", 1000)
+    client = TestClient(app)
+    payload = bytes(range(256)) * 10  # 2560 bytes -> chunks of 1000, 1000, 560
+
+    response = client.post(
+        "/api/v1/uploads/",
+        json={"filename": "match.mp4", "total_size": len(payload), "content_type": "video/mp4"},
+    )
+    assert response.status_code == 200
+    upload_id = response.json()["upload_id"]
+
+    for start in (2000, 0):
+        end = min(start + 1000, len(payload)) - 1
+        response = client.put(
+            f"/api/v1/uploads/{upload_id}",
+            content=payload[start:end + 1],
+            headers={"Content-Range": f"bytes {start}-{end}/{len(payload)}"},
+        )
+        assert response.status_code == 200
+
+    progress = client.get(f"/api/v1/uploads/{upload_id}").json()
+    assert progress["missing_chunks"] == [1]
+    assert progress["offset"] == 1000
+    assert progress["received_bytes"] == 1560
+
+    assert client.post(f"/api/v1/uploads/{upload_id}/complete").status_code == 409
+
+    response = client.put(
+        f"/api/v1/uploads/{upload_id}",
+        content=payload[1000:2000],
+        headers={"Content-Range": f"bytes 1000-1999/{len(payload)}"},
+    )
+    assert response.status_code == 200
+
+    response = client.post(f"/api/v1/uploads/{upload_id}/complete")
+    assert response.status_code == 200
+    assert [args[0] for _, args in sent] == [response.json()["id"]]
+    video = client.get(f"/api/v1/videos/{response.json()['id']}").json()
+    assert Path(video["file_path"]).read_bytes() == payload
+    assert video["file_size"] == len(payload)
+
+
+def test_duplicate_upload_reuses_completed_analysis():
+    from app.core.config import settings
+    from app.core.database import SessionLocal
+    from app.models.video import Detection, ProcessingTask
+    from app.services.task_service import detection_cache_key
+
+    client = TestClient(app)
+    payload = os.urandom(2048)
+
+    first = client.post(
+        "/api/v1/videos/upload",
+        files={"file": ("match.mp4", payload, "video/mp4")},
+    ).json()
+    second = client.post(
+        "/api/v1/videos/upload",
+        files={"file": ("match-copy.mp4", payload, "video/mp4")},
+    ).json()
+    assert second["duplicate_of"] == first["id"]
+    assert client.get(f"/api/v1/videos/{first['id']}").json()["file_path"] == \
+        client.get(f"/api/v1/videos/{second['id']}").json()["file_path"]
+
+    db = SessionLocal()
+    try:
+        db.add(ProcessingTask(
+            task_id=f"done-{first['id']}",
+            video_id=first["id"],
+            task_type="analysis",
+            status="completed",
+            model_name=settings.detection_model_name,
+            model_version=settings.detection_model_version,
+            cache_key=detection_cache_key(client.get(f"/api/v1/videos/{first['id']}").json()["content_hash"], "analysis"),
+        ))
+        db.add(Detection(video_id=first["id"], frame_number=0, objects=[], timestamp=0.0))
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.post(f"/api/v1/videos/{second['id']}/process")
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    detections = client.get(f"/api/v1/videos/{second['id']}/detections").json()["detections"]
+    assert [d["frame_number"] for d in detections] == [0]
+
+
+def test_abandoned_uploads_expire_and_free_their_space(monkeypatch):
+    import datetime
+
+    from app.core.config import settings
+    from app.core.database import SessionLocal
+    from app.services.upload_service import UploadService
+
+    client = TestClient(app)
+
+    def create(size=4096):
+        return client.post(
+            "/api/v1/uploads/",
+            json={"filename": "match.mp4", "total_size": size, "content_type": "video/mp4"},
+        )
+
+    def sweep():
+        db = SessionLocal()
+        try:
+            later = datetime.datetime.utcnow() + datetime.timedelta(seconds=settings.upload_session_ttl + 1)
+            return UploadService(db).expire_sessions(now=later)
+        finally:
+            db.close()
+
+    # Start from no open uploads
+    sweep()
+
+    monkeypatch.setattr(settings, "max_open_upload_sessions", 1)
+    first = create()
+    assert first.status_code == 200
+    assert create().status_code == 507
+    monkeypatch.setattr(settings, "max_open_upload_sessions", 32)
+    monkeypatch.setattr(settings, "max_reserved_upload_bytes", 4096 + 1024)
+    assert create(2048).status_code == 507
+
+    upload_id = first.json()["upload_id"]
+    db = SessionLocal()
+    try:
+        part_path = UploadService(db).get_session(upload_id).part_path
+    finally:
+        db.close()
+    assert os.path.exists(part_path)
+
+    # Still active: nothing expires yet
+    db = SessionLocal()
+    try:
+        assert UploadService(db).expire_sessions() == 0
+    finally:
+        db.close()
+
+    assert sweep() == 1
+    assert not os.path.exists(part_path)
+    assert client.get(f"/api/v1/uploads/{upload_id}").json()["status"] == "expired"
+    response = client.put(
+        f"/api/v1/uploads/{upload_id}",
+        content=b"\0" * 4096,
+        headers={"Content-Range": "bytes 0-4095/4096"},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Upload has expired"
+    assert client.post(f"/api/v1/uploads/{upload_id}/complete").status_code == 409
+    # The space is free again
+    assert create(2048).status_code == 200
+    sweep()
+
+
+def test_reused_analysis_replaces_existing_results():
+    from app.core.config import settings
+    from app.core.database import SessionLocal
+    from app.models.video import Detection, EventSet, ProcessingTask
+    from app.services.task_service import detection_cache_key
+    from app.services.video_service import VideoService
+
+    client = TestClient(app)
+    payload = os.urandom(2048)
+    first = client.post("/api/v1/videos/upload", files={"file": ("match.mp4", payload, "video/mp4")}).json()
+    second = client.post("/api/v1/videos/upload", files={"file": ("match-copy.mp4", payload, "video/mp4")}).json()
+    content_hash = client.get(f"/api/v1/videos/{first['id']}").json()["content_hash"]
+
+    db = SessionLocal()
+    try:
+        video_service = VideoService(db)
+        db.add(ProcessingTask(
+            task_id=f"done-{first['id']}",
+            video_id=first["id"],
+            task_type="analysis",
+            status="completed",
+            model_name=settings.detection_model_name,
+            model_version=settings.detection_model_version,
+            cache_key=detection_cache_key(content_hash, "analysis"),
+            result={
+                "status": "completed",
+                "video_id": first["id"],
+                "frames": 2,
+                "detections_ref": f"/api/v1/videos/{first['id']}/detections",
+                "events_ref": f"/api/v1/videos/{first['id']}/events",
+            },
+        ))
+        db.add(Detection(video_id=first["id"], frame_number=0, objects=[], timestamp=0.0))
+        db.add(Detection(video_id=first["id"], frame_number=1, objects=[], timestamp=0.04))
+        db.add(EventSet(video_id=first["id"], version=1, source="analysis", detector_params={}, event_count=0))
+        # The target was already analysed, e.g. under an older cache key
+        db.add(Detection(video_id=second["id"], frame_number=7, objects=[], timestamp=0.28))
+        db.add(EventSet(video_id=second["id"], version=1, source="analysis", detector_params={}, event_count=0))
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.post(f"/api/v1/videos/{second['id']}/process")
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    result = client.get(f"/api/v1/tasks/{response.json()['task_id']}").json()["result"]
+    assert (result["video_id"], result["frames"]) == (second["id"], 2)
+    assert result["detections_ref"] == f"/api/v1/videos/{second['id']}/detections"
+    assert result["events_ref"] == f"/api/v1/videos/{second['id']}/events"
+    detections = client.get(f"/api/v1/videos/{second['id']}/detections").json()["detections"]
+    assert [d["frame_number"] for d in detections] == [0, 1]
+    db = SessionLocal()
+    try:
+        assert [s.version for s in VideoService(db).get_event_sets(second["id"])] == [1]
+    finally:
+        db.close()
+
+
+def test_failed_finalize_releases_the_upload(monkeypatch):
+    import datetime
+
+    from app.core.config import settings
+    from app.core.database import SessionLocal
+    from app.models.video import UploadSession
+    from app.services import upload_service
+    from app.services.upload_service import UploadService
+
+    client = TestClient(app)
+    payload = os.urandom(4096)
+
+    def start():
+        upload_id = client.post(
+            "/api/v1/uploads/",
+            json={"filename": "match.mp4", "total_size": len(payload), "content_type": "video/mp4"},
+        ).json()["upload_id"]
+        response = client.put(
+            f"/api/v1/uploads/{upload_id}",
+            content=payload,
+            headers={"Content-Range": f"bytes 0-{len(payload) - 1}/{len(payload)}"},
+        )
+        assert response.status_code == 200
+        return upload_id
+
+    def hash_fails(path):
+        raise RuntimeError("hashing crashed")
+
+    # Any failure after the claim puts the session back to open, so it can be retried
+    upload_id = start()
+    hash_file = upload_service.hash_file
+    monkeypatch.setattr(upload_service, "hash_file", hash_fails)
+    db = SessionLocal()
+    try:
+        service = UploadService(db)
+        with pytest.raises(RuntimeError):
+            service.complete(service.get_session(upload_id))
+        assert service.get_session(upload_id).status == "open"
+    finally:
+        db.close()
+    monkeypatch.setattr(upload_service, "hash_file", hash_file)
+    response = client.post(f"/api/v1/uploads/{upload_id}/complete")
+    assert response.status_code == 200
+
+    # A finalize that died without cleaning up expires like an idle upload
+    upload_id = start()
+    db = SessionLocal()
+    try:
+        db.query(UploadSession).filter(UploadSession.upload_id == upload_id).update({"status": "finalizing"})
+        db.commit()
+        part_path = UploadService(db).get_session(upload_id).part_path
+        later = datetime.datetime.utcnow() + datetime.timedelta(seconds=settings.upload_session_ttl + 1)
+        assert UploadService(db).expire_sessions(now=later) >= 1
+        db.expire_all()
+        assert UploadService(db).get_session(upload_id).status == "expired"
+    finally:
+        db.close()
+    assert not os.path.exists(part_path)